@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Union
+from app.core.config import settings
+
+# Initialize logger for the Cache Audit Trail
+logger = logging.getLogger("cache")
+
+_MISSING = object()
+
+# A TTL, or a function of the computed value returning one (e.g. short TTLs for error payloads)
+TTL = Union[float, Callable[[Any], float]]
+
+
+def _resolve_ttl(ttl: TTL, value: Any) -> float:
+    return ttl(value) if callable(ttl) else ttl
+
+
+class MemoryCache:
+    """
+    Single-process TTL cache. Default backend: fine for one uvicorn process,
+    but every worker would hold (and refill) its own copy.
+    Bounded: least-recently-used entries are evicted past `max_entries`, and expired
+    entries and leases are swept every SWEEP_EVERY writes.
+    """
+    SWEEP_EVERY = 1000
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # key -> (value, expires), least recently used first
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._leases = {}
+        self._writes = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[1] < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        for key in [k for k, (_, expires) in self._data.items() if expires < now]:
+            del self._data[key]
+        for key in [k for k, expires in self._leases.items() if expires < now]:
+            del self._leases[key]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Named lease: True for exactly one caller until released or `ttl` elapses."""
+        now = time.time()
+        with self._lock:
+            if self._leases.get(key, 0.0) > now:
+                return False
+            self._leases[key] = now + ttl
+            return True
+
+    def release(self, key: str):
+        with self._lock:
+            self._leases.pop(key, None)
+
+    def get_or_compute(self, key: str, ttl: TTL, compute: Callable[[], Any]):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        # Single-flight per key: concurrent threads wait for the first computation
+        with self._lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = compute()
+                    self.set(key, value, _resolve_ttl(ttl, value))
+            return value
+        finally:
+            # Waiters still holding this lock re-check the cache; later callers start fresh
+            with self._lock:
+                if self._inflight.get(key) is lock:
+                    del self._inflight[key]
+
+
+class SQLiteCache:
+    """
+    Cross-process TTL cache in a local SQLite file (WAL mode), shared by every worker
+    on the host. Values are JSON. `get_or_compute` takes a short lease row so only one
+    process computes a missing key while the others wait for its result.
+    """
+    LEASE_SECONDS = 15.0
+    POLL_SECONDS = 0.05
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: a forked child never reuses the parent's)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str, default=None):
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any, ttl: float):
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                     (key, json.dumps(value), time.time() + ttl))
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Named lease across every process on the host: True for exactly one caller until released or expired."""
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO leases (key, expires) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET expires = excluded.expires WHERE leases.expires < ?",
+            (key, now + ttl, now))
+        return cursor.rowcount == 1
+
+    def release(self, key: str):
+        self._connect().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def get_or_compute(self, key: str, ttl: TTL, compute: Callable[[], Any]):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        deadline = time.time() + self.LEASE_SECONDS
+        while not self.acquire(key, self.LEASE_SECONDS):
+            # Another worker is computing this key; wait for it rather than duplicating upstream work
+            time.sleep(self.POLL_SECONDS)
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if time.time() > deadline:
+                break
+        try:
+            value = compute()
+            self.set(key, value, _resolve_ttl(ttl, value))
+            return value
+        finally:
+            self.release(key)
+
+
+def _build_cache():
+    if settings.CACHE_BACKEND == "sqlite":
+        logger.info(f"Shared cache: SQLite at {settings.CACHE_PATH}")
+        return SQLiteCache(settings.CACHE_PATH)
+    return MemoryCache(settings.MEMORY_CACHE_MAX_ENTRIES)
+
+
+# Global instance: from app.core.cache import shared_cache
+shared_cache = _build_cache()
@@ -1,9 +1,19 @@
 import os
+import time
 import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from itertools import count
+from typing import Optional
+from fastapi import Request
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.query_metrics import instrument_engine, instrument_sessions
+from app.core.cache import shared_cache
 
 # Initialize logger for Database Audit Trail
 logger = logging.getLogger("database")
@@ -12,17 +22,17 @@ logger = logging.getLogger("database")
 DATABASE_URL = settings.DATABASE_URL
 
 # 2. Engine Intelligence Layer
-if "sqlite" in DATABASE_URL:
-    # Optimized for rapid local prototyping
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        echo=False # Set to True if you want to see raw SQL in terminal
-    )
-else:
+def _build_engine(url: str):
+    if "sqlite" in url:
+        # Optimized for rapid local prototyping
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=False # Set to True if you want to see raw SQL in terminal
+        )
     # High-Performance Production Configuration (PostgreSQL/MySQL)
-    engine = create_engine(
-        DATABASE_URL,
+    return create_engine(
+        url,
         pool_pre_ping=True,      # Heartbeat check to prevent 500 errors on stale connections
         pool_size=20,            # Increased baseline for concurrent user support
         max_overflow=10,         # Buffer for traffic spikes
@@ -35,8 +45,87 @@ else:
         }
     )
 
+engine = _build_engine(DATABASE_URL)
+replica_engines = [_build_engine(url.strip()) for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+# Per-request query counting & DB timing (see app.core.query_metrics)
+for _engine in (engine, *replica_engines):
+    instrument_engine(_engine)
+
+
+# 2.5 Read-Replica Routing
+class ReplicaRouter:
+    """
+    Round-robin over healthy replicas, falling back to the primary.
+    Each replica is probed at most once per REPLICA_HEALTH_INTERVAL (SELECT 1, plus
+    replay lag on PostgreSQL); a replica that fails a probe or a request is skipped
+    until its next successful probe.
+    """
+
+    def __init__(self, primary, replicas: list):
+        self.primary = primary
+        self.replicas = replicas
+        self._cursor = count()
+        self._lock = threading.Lock()
+        self._health = {id(r): (True, 0.0) for r in replicas}   # id -> (healthy, checked_at)
+
+    def _probe(self, replica) -> bool:
+        try:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                if replica.dialect.name == "postgresql":
+                    lag = conn.execute(text(
+                        "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())")).scalar()
+                    if lag is not None and lag > settings.REPLICA_MAX_LAG_SECONDS:
+                        logger.warning(f"Replica {replica.url.host} lagging {lag:.1f}s; routing reads to primary.")
+                        return False
+            return True
+        except Exception as e:
+            logger.error(f"Replica Health Check FAILURE ({replica.url.host or replica.url.database}): {e}")
+            return False
+
+    def _is_healthy(self, replica) -> bool:
+        healthy, checked_at = self._health[id(replica)]
+        now = time.monotonic()
+        if now - checked_at < settings.REPLICA_HEALTH_INTERVAL:
+            return healthy
+        with self._lock:
+            if self._health[id(replica)][1] != checked_at:
+                return healthy   # Another thread is already probing; keep the previous verdict
+            self._health[id(replica)] = (healthy, now)
+        # Fresh context: the probe is not charged to the current request's query budget
+        healthy = contextvars.Context().run(self._probe, replica)
+        self._health[id(replica)] = (healthy, now)
+        return healthy
+
+    def mark_down(self, replica):
+        self._health[id(replica)] = (False, time.monotonic())
+
+    def engine_for(self, pin_key: Optional[str] = None):
+        """Engine for a read-only unit of work; the primary if pinned or no replica is up."""
+        if not self.replicas or (pin_key and is_pinned(pin_key)):
+            return self.primary
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._cursor) % len(self.replicas)]
+            if self._is_healthy(replica):
+                return replica
+        return self.primary
+
+
+# Read-your-writes: after a write, that user's reads go to the primary until the
+# replicas have had time to catch up. Kept in the shared cache so every worker sees it.
+def pin_to_primary(key: str):
+    if replica_engines:
+        shared_cache.set(f"pin:{key}", 1, settings.READ_YOUR_WRITES_SECONDS)
+
+def is_pinned(key: str) -> bool:
+    return shared_cache.get(f"pin:{key}") is not None
+
+replica_router = ReplicaRouter(engine, replica_engines)
+
 # 3. Session & Identity Factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_sessions(SessionLocal)
 Base = declarative_base()
 
 # 4. Connectivity Handshake (Vitality Check)
@@ -65,4 +154,41 @@ def get_db():
         db.rollback() # Protect data integrity if a request fails mid-way
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def session_scope(bind=None):
+    """
+    Short-lived session for one unit of work inside a longer request (e.g. around a
+    slow upstream call), so the pooled connection is returned as soon as it is done.
+    Pass `bind` to read from a replica engine instead of the primary.
+    """
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_read_db(request: Request):
+    """
+    Read-only Data Bridge.
+    Routes to a replica unless the caller (?email=) wrote within READ_YOUR_WRITES_SECONDS.
+    """
+    email = request.query_params.get("email")
+    bind = replica_router.engine_for(email.lower().strip() if email else None)
+    db = SessionLocal(bind=bind)
+    try:
+        yield db
+    except OperationalError as e:
+        if bind is not engine:
+            logger.error(f"Replica Session Error, taking replica out of rotation: {e}")
+            replica_router.mark_down(bind)
+        raise
+    except Exception as e:
+        logger.error(f"Session Error: {e}")
+        raise
+    finally:
+        db.close()
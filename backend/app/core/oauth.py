@@ -0,0 +1,117 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+import httpx
+from jose import JWTError, jwk, jwt
+
+# Initialize logger for the OAuth Audit Trail
+logger = logging.getLogger("oauth")
+
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+
+DEFAULT_JWKS_TTL = 3600.0     # Used when Google's response carries no max-age
+MIN_FORCED_REFRESH = 60.0     # Unknown-kid refreshes are rate limited (forged tokens can't force a fetch storm)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+# 1. Shared Outbound HTTP Client
+# One pooled client per worker: keep-alive connections and TLS sessions to Google are
+# reused across sign-ins instead of handshaking on every callback.
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0)
+        )
+    return _http_client
+
+async def close_http_client():
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+
+
+# 2. Google Signing Keys
+class GoogleKeySet:
+    """
+    Google's JWKS, parsed once into verification keys and cached for the
+    Cache-Control max-age Google sends. Refreshed in the background by the scheduler;
+    the request path only fetches on a cold cache or an unknown key id (rotation).
+    """
+
+    def __init__(self):
+        self._keys = {}          # kid -> jose Key
+        self._expires = 0.0
+        self._last_forced = 0.0
+        self._lock = asyncio.Lock()
+        self._sync_lock = threading.Lock()
+
+    def _store(self, response: httpx.Response):
+        response.raise_for_status()
+        keys = {entry["kid"]: jwk.construct(entry, entry.get("alg", "RS256")) for entry in response.json()["keys"]}
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        self._keys = keys
+        self._expires = time.monotonic() + (int(match.group(1)) if match else DEFAULT_JWKS_TTL)
+        logger.info(f"Google JWKS refreshed: {len(keys)} keys.")
+
+    def refresh_sync(self):
+        """Blocking refresh for the background job thread."""
+        with self._sync_lock:
+            self._store(httpx.get(GOOGLE_JWKS_URL, timeout=10.0))
+
+    async def _refresh(self, forced: bool = False):
+        async with self._lock:
+            now = time.monotonic()
+            if forced:
+                if now - self._last_forced < MIN_FORCED_REFRESH:
+                    return
+                self._last_forced = now
+            elif now < self._expires:
+                return   # Another request refreshed while we waited
+            self._store(await get_http_client().get(GOOGLE_JWKS_URL))
+
+    async def get(self, kid: str):
+        if time.monotonic() >= self._expires:
+            await self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            await self._refresh(forced=True)
+            key = self._keys.get(kid)
+        return key
+
+
+google_keys = GoogleKeySet()
+
+
+# 3. Authorization-Code Flow
+async def exchange_code(code: str, client_id: str, client_secret: str, redirect_uri: str) -> dict:
+    response = await get_http_client().post(GOOGLE_TOKEN_URL, data={
+        "code": code,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "redirect_uri": redirect_uri,
+        "grant_type": "authorization_code",
+    })
+    return response.json()
+
+async def verify_id_token(id_token: str, client_id: str, access_token: Optional[str] = None) -> dict:
+    """
+    Verifies the id_token locally (RS256 signature, audience, issuer, expiry and, when
+    given, at_hash against the access token) and returns its claims.
+    Raises JWTError on any failure.
+    """
+    kid = jwt.get_unverified_header(id_token).get("kid")
+    key = await google_keys.get(kid)
+    if key is None:
+        raise JWTError(f"Unknown signing key: {kid}")
+    return jwt.decode(id_token, key, algorithms=["RS256"], audience=client_id,
+                      issuer=GOOGLE_ISSUERS, access_token=access_token)
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hmac
+import logging
+import functools
+import inspect
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import uuid4
+from app.core.config import settings
+
+# Initialize logger for the Profiling Audit Trail
+logger = logging.getLogger("profiling")
+
+PROFILE_HEADER = b"x-profile-token"
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:  # Optional dependency: profiling simply stays off without it
+    Profiler = None
+
+
+class _ProfileCapture:
+    """Profilers started for one request: the event-loop view plus any threadpool handler."""
+    __slots__ = ("profile_id", "handler_profiler")
+
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self.handler_profiler = None
+
+
+_active_capture: ContextVar[Optional[_ProfileCapture]] = ContextVar("profile_capture", default=None)
+
+
+# 1. Request Selection
+def _should_profile(scope: dict) -> Optional[str]:
+    """Returns the trigger ("header" / "sample") or None. The only cost on unprofiled requests."""
+    if settings.PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                if hmac.compare_digest(value, settings.PROFILE_TOKEN.encode()):
+                    return "header"
+                break
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+# 2. Artifact Writer
+def _slug(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+def _write_artifacts(capture: _ProfileCapture, profiler, meta: dict):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(
+        settings.PROFILE_DIR,
+        f"{meta['started_at'][:19].replace(':', '')}_{meta['method']}_{_slug(meta['route'])}_{meta['latency_ms']:.0f}ms_{capture.profile_id}"
+    )
+    views = [("", profiler)]
+    if capture.handler_profiler is not None:
+        views.append((".handler", capture.handler_profiler))
+
+    for suffix, view in views:
+        # Interactive call tree + speedscope flamegraph (load at https://www.speedscope.app)
+        with open(f"{stem}{suffix}.html", "w") as f:
+            f.write(view.output(HTMLRenderer()))
+        with open(f"{stem}{suffix}.speedscope.json", "w") as f:
+            f.write(view.output(SpeedscopeRenderer()))
+
+    meta["artifacts"] = [os.path.basename(f"{stem}{suffix}.html") for suffix, _ in views]
+    with open(os.path.join(settings.PROFILE_DIR, "index.ndjson"), "a") as f:
+        f.write(json.dumps(meta) + "\n")
+    logger.info(f"Profile {capture.profile_id}: {meta['method']} {meta['route']} {meta['latency_ms']}ms -> {stem}")
+
+
+# 3. ASGI Middleware
+class ProfilingMiddleware:
+    """
+    Opt-in request profiler. Selected requests (valid X-Profile-Token header, or the
+    PROFILE_SAMPLE_RATE lottery) run under pyinstrument's sampling profiler and leave
+    HTML call-tree + speedscope flamegraph files in PROFILE_DIR, named by route and
+    latency. Only installed when PROFILING_ENABLED is set, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        trigger = _should_profile(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        capture = _ProfileCapture(uuid4().hex[:12])
+        token = _active_capture.set(capture)
+        status = {"code": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", []).append((b"x-profile-id", capture.profile_id.encode()))
+            await send(message)
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            _active_capture.reset(token)
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+            meta = {"profile_id": capture.profile_id, "trigger": trigger, "method": scope["method"],
+                    "route": route, "path": scope.get("path", ""), "status": status["code"],
+                    "latency_ms": latency_ms, "started_at": started_at}
+            if trigger == "header" or latency_ms >= settings.PROFILE_MIN_MS:
+                try:
+                    await asyncio.to_thread(_write_artifacts, capture, profiler, meta)
+                except Exception as e:
+                    logger.error(f"Profile Write Failure: {str(e)}")
+
+
+# 4. Threadpool Handlers
+def _profile_sync_endpoint(fn):
+    """
+    pyinstrument samples a single thread, so sync endpoints (run in the threadpool)
+    get their own profiler when the surrounding request is being profiled.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        capture = _active_capture.get()
+        if capture is None:
+            return fn(*args, **kwargs)
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="disabled")
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            capture.handler_profiler = profiler
+    return wrapper
+
+
+def install_profiling(app):
+    """Wires the middleware and sync-endpoint hooks; call after all routes are registered."""
+    if not settings.PROFILING_ENABLED:
+        return
+    if Profiler is None:
+        logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed; profiling stays off.")
+        return
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is not None and dependant.call is not None and not inspect.iscoroutinefunction(dependant.call):
+            dependant.call = _profile_sync_endpoint(dependant.call)
+    app.add_middleware(ProfilingMiddleware)
+    logger.info(f"Request profiling enabled (sample rate {settings.PROFILE_SAMPLE_RATE}, artifacts in {settings.PROFILE_DIR}).")
@@ -0,0 +1,185 @@
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import settings
+
+# Initialize logger for the Query Audit Trail
+logger = logging.getLogger("query_metrics")
+
+
+class QueryStats:
+    """Mutable per-request tally shared across the event loop and threadpool."""
+    __slots__ = ("count", "db_time", "conn_hold", "scope", "committed")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.db_time = 0.0
+        self.conn_hold = 0.0   # Seconds a pooled connection was checked out for this request
+        self.scope = scope
+        self.committed = False
+
+    @property
+    def budget(self) -> Optional[int]:
+        return get_query_budget(self.scope.get("endpoint")) if self.scope else None
+
+    @property
+    def over_budget(self) -> bool:
+        budget = self.budget
+        return budget is not None and self.count > budget
+
+    @property
+    def db_time_ms(self) -> float:
+        return round(self.db_time * 1000, 2)
+
+    @property
+    def conn_hold_ms(self) -> float:
+        return round(self.conn_hold * 1000, 2)
+
+    @property
+    def route(self) -> str:
+        # Resolved lazily: the router fills scope["route"] after the middleware starts the tally
+        if not self.scope:
+            return "<background>"
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "<unknown>")
+
+
+class PoolUsage:
+    """
+    Per-route connection-pool occupancy: connections currently held, the peak,
+    and how long each checkout lasted. Shows which routes actually pin the pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def _entry(self, route: str) -> dict:
+        return self._routes.setdefault(route, {"in_use": 0, "peak_in_use": 0, "checkouts": 0,
+                                               "hold_ms_total": 0.0, "hold_ms_max": 0.0})
+
+    def checkout(self, route: str):
+        with self._lock:
+            entry = self._entry(route)
+            entry["in_use"] += 1
+            entry["checkouts"] += 1
+            entry["peak_in_use"] = max(entry["peak_in_use"], entry["in_use"])
+
+    def checkin(self, route: str, held: float):
+        held_ms = held * 1000
+        with self._lock:
+            entry = self._entry(route)
+            entry["in_use"] -= 1
+            entry["hold_ms_total"] += held_ms
+            entry["hold_ms_max"] = max(entry["hold_ms_max"], held_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {**e, "hold_ms_total": round(e["hold_ms_total"], 2), "hold_ms_max": round(e["hold_ms_max"], 2),
+                        "hold_ms_avg": round(e["hold_ms_total"] / e["checkouts"], 2) if e["checkouts"] else 0.0}
+                for route, e in sorted(self._routes.items())
+            }
+
+
+pool_usage = PoolUsage()
+
+
+# Contextvars are copied into threadpool workers, but the QueryStats object
+# they point at is shared, so sync endpoints still report into the request.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# 1. Request Scope Protocol
+def start_request_stats(scope: Optional[dict] = None) -> QueryStats:
+    stats = QueryStats(scope)
+    _current_stats.set(stats)
+    return stats
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+# 2. Engine Instrumentation
+def instrument_engine(engine):
+    """Hooks cursor execution events so every statement is counted and timed."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.db_time += time.perf_counter() - started
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute; drop their timer
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    # Pool occupancy: the checkout remembers its request, since checkin may run elsewhere
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, connection_record, connection_proxy):
+        stats = _current_stats.get()
+        route = stats.route if stats is not None else "<background>"
+        connection_record.info["checkout"] = (time.perf_counter(), stats, route)
+        pool_usage.checkout(route)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, connection_record):
+        checkout = connection_record.info.pop("checkout", None)
+        if checkout is None:
+            return
+        started, stats, route = checkout
+        held = time.perf_counter() - started
+        if stats is not None:
+            stats.conn_hold += held
+        pool_usage.checkin(route, held)
+
+
+# 3. Commit-Time Enforcement
+class QueryBudgetExceeded(Exception):
+    """Raised before a commit in a request that has already run past its @query_budget."""
+
+
+def instrument_sessions(session_factory):
+    """
+    With ENFORCE_QUERY_BUDGETS on, a write route over budget fails before it commits,
+    so the 500 never reports a failure for a write that actually went through.
+    """
+
+    @event.listens_for(session_factory, "before_commit")
+    def _before_commit(session):
+        stats = _current_stats.get()
+        if stats is not None and settings.ENFORCE_QUERY_BUDGETS and stats.over_budget:
+            raise QueryBudgetExceeded(f"Query budget exceeded: {stats.count} statements (budget {stats.budget})")
+
+    @event.listens_for(session_factory, "after_commit")
+    def _after_commit(session):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.committed = True
+
+
+# 4. Route Budget Declarations
+def query_budget(max_queries: int):
+    """
+    Declares the maximum number of SQL statements a route may execute.
+    Usage: place under the route decorator -> @query_budget(2)
+    """
+    def decorator(fn):
+        fn.__query_budget__ = max_queries
+        return fn
+    return decorator
+
+def get_query_budget(endpoint) -> Optional[int]:
+    return getattr(endpoint, "__query_budget__", None)
@@ -0,0 +1,193 @@
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from app.core.config import settings
+from app.core.cache import shared_cache
+
+# Initialize logger for the Scheduler Audit Trail
+logger = logging.getLogger("scheduler")
+
+# Indian markets and off-peak windows are defined in IST (no DST, so a fixed offset is exact)
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class Job:
+    """One registered job: its schedule plus running timing metrics."""
+
+    def __init__(self, name: str, fn: Callable, interval: Optional[float] = None, at: Optional[str] = None,
+                 weekdays: Optional[tuple] = None, jitter: float = 0.0, exclusive: bool = True,
+                 run_at_start: bool = False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.at = tuple(int(part) for part in at.split(":")) if at else None
+        self.weekdays = weekdays
+        self.jitter = jitter
+        self.exclusive = exclusive          # At most one worker process runs each occurrence
+        self.run_at_start = run_at_start
+        self.wakeup: Optional[asyncio.Event] = None
+        self.running = False
+        self.stats = {"runs": 0, "failures": 0, "skipped": 0, "coalesced": 0,
+                      "last_started": None, "last_duration_ms": None, "max_duration_ms": 0.0,
+                      "total_duration_ms": 0.0, "last_error": None}
+
+    def next_delay(self, now: datetime) -> Optional[float]:
+        """Seconds until the next occurrence (before jitter); None for on-demand jobs."""
+        if self.interval:
+            return self.interval
+        if self.at is None:
+            return None
+        hour, minute = self.at
+        target = now.astimezone(IST).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        while target <= now or (self.weekdays and target.weekday() not in self.weekdays):
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    def lease_seconds(self) -> float:
+        # Held for most of the period, so sibling workers firing a little later skip this occurrence
+        return self.interval * 0.9 if self.interval else 3600.0
+
+
+class Scheduler:
+    """
+    Lightweight in-process scheduler started from the FastAPI lifespan.
+    Jobs are plain functions run in a worker thread, so DB and network work never
+    blocks the event loop. Each job has its own loop: a job never overlaps itself,
+    triggers that arrive mid-run are coalesced into one follow-up run, and exclusive
+    jobs take a shared-cache lease so only one gunicorn worker runs each occurrence.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._tasks = []
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # 1. Registration
+    def every(self, seconds: float, *, name: Optional[str] = None, jitter: float = 0.0,
+              exclusive: bool = True, run_at_start: bool = False):
+        def decorator(fn):
+            job = Job(name or fn.__name__, fn, interval=seconds, jitter=jitter,
+                      exclusive=exclusive, run_at_start=run_at_start)
+            self.jobs[job.name] = job
+            return fn
+        return decorator
+
+    def daily(self, at: str, *, weekdays: Optional[tuple] = None, name: Optional[str] = None,
+              jitter: float = 0.0, exclusive: bool = True):
+        """Runs once a day at `at` ("HH:MM", IST), optionally only on some weekdays (0 = Monday)."""
+        def decorator(fn):
+            job = Job(name or fn.__name__, fn, at=at, weekdays=weekdays, jitter=jitter, exclusive=exclusive)
+            self.jobs[job.name] = job
+            return fn
+        return decorator
+
+    def on_demand(self, *, name: Optional[str] = None, exclusive: bool = True, run_at_start: bool = False):
+        """No schedule: runs only when triggered (and once at startup if `run_at_start`)."""
+        def decorator(fn):
+            job = Job(name or fn.__name__, fn, exclusive=exclusive, run_at_start=run_at_start)
+            self.jobs[job.name] = job
+            return fn
+        return decorator
+
+    # 2. Event Triggers
+    def trigger(self, name: str) -> bool:
+        """
+        Runs a job as soon as possible instead of waiting for its next slot.
+        Thread-safe: sync routes call this from the threadpool.
+        False when the scheduler isn't running (disabled, or not started yet).
+        """
+        job = self.jobs[name]
+        if job.wakeup is None or self._event_loop is None or self._event_loop.is_closed():
+            return False
+        if job.running:
+            job.stats["coalesced"] += 1
+        self._event_loop.call_soon_threadsafe(job.wakeup.set)
+        return True
+
+    # 3. Execution
+    async def _run(self, job: Job, triggered: bool = False):
+        # Scheduled occurrences keep the lease for most of the period; triggered runs
+        # only hold it while running, so they never suppress the next scheduled slot
+        lease = f"job:{job.name}"
+        lease_seconds = job.lease_seconds() if not triggered else max(job.lease_seconds(), 60.0)
+        if job.exclusive and not await asyncio.to_thread(shared_cache.acquire, lease, lease_seconds):
+            job.stats["skipped"] += 1
+            return
+
+        job.running = True
+        job.stats["last_started"] = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(job.fn)
+            job.stats["runs"] += 1
+            job.stats["last_error"] = None
+            if job.exclusive and triggered:
+                await asyncio.to_thread(shared_cache.release, lease)
+        except Exception as e:
+            job.stats["failures"] += 1
+            job.stats["last_error"] = str(e)
+            logger.error(f"Job {job.name} FAILURE: {str(e)}")
+            if job.exclusive:
+                # Let another worker (or the next slot) retry instead of waiting out the lease
+                await asyncio.to_thread(shared_cache.release, lease)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            job.running = False
+            job.stats["last_duration_ms"] = round(elapsed_ms, 2)
+            job.stats["total_duration_ms"] += elapsed_ms
+            job.stats["max_duration_ms"] = max(job.stats["max_duration_ms"], round(elapsed_ms, 2))
+
+    async def _loop(self, job: Job):
+        if job.run_at_start:
+            await self._run(job)
+        while True:
+            delay = job.next_delay(datetime.now(timezone.utc))
+            if delay is not None:
+                delay += random.uniform(0, job.jitter)
+            try:
+                await asyncio.wait_for(job.wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            triggered = job.wakeup.is_set()
+            job.wakeup.clear()
+            await self._run(job, triggered)
+
+    # 4. Lifespan Hooks
+    async def start(self):
+        if not settings.SCHEDULER_ENABLED:
+            logger.info("Scheduler disabled (SCHEDULER_ENABLED=false).")
+            return
+        self._event_loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            job.wakeup = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+        logger.info(f"Scheduler started: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for job in self.jobs.values():
+            job.wakeup = None
+
+    def metrics(self) -> dict:
+        report = {}
+        for name, job in self.jobs.items():
+            runs = job.stats["runs"] + job.stats["failures"]
+            report[name] = {
+                **job.stats,
+                "total_duration_ms": round(job.stats["total_duration_ms"], 2),
+                "avg_duration_ms": round(job.stats["total_duration_ms"] / runs, 2) if runs else None,
+                "running": job.running,
+                "schedule": f"every {job.interval}s" if job.interval else
+                            f"daily {job.at[0]:02d}:{job.at[1]:02d} IST" if job.at else "on demand",
+            }
+        return report
+
+
+# Global instance: jobs register with @scheduler.every(...) / @scheduler.daily(...)
+scheduler = Scheduler()
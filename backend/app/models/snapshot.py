@@ -0,0 +1,36 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from datetime import datetime, timezone
+
+class PortfolioSnapshot(Base):
+    __tablename__ = "portfolio_snapshots"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+
+    # 1. Identity Linkage
+    # Append-only: one row per *changed* /api/portfolio/sync, never updated in place.
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    ts = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    # 2. Metric Snapshot (mirrors Portfolio core metrics)
+    monthly_income = Column(Float, default=0.0)
+    monthly_expenses = Column(Float, default=0.0)
+    savings = Column(Float, default=0.0)
+    investments = Column(Float, default=0.0)
+
+    # 3. Covering Index
+    # Trend queries filter on user_id, range/bucket on ts and read only the metrics,
+    # so PostgreSQL can answer them with an index-only scan.
+    __table_args__ = (
+        Index(
+            "ix_portfolio_snapshots_user_ts", "user_id", "ts",
+            postgresql_include=["monthly_income", "monthly_expenses", "savings", "investments"]
+        ),
+    )
+
+    # 4. Relationship
+    owner = relationship("User", back_populates="portfolio_snapshots")
+
+    def __repr__(self):
+        return f"<PortfolioSnapshot(user_id={self.user_id}, ts={self.ts})>"
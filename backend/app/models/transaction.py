@@ -0,0 +1,34 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Float, ForeignKey, Date, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from datetime import datetime, timezone
+
+class Transaction(Base):
+    __tablename__ = "transactions"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+
+    # 1. Identity Linkage
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # 2. Trade Details
+    # Ledger rows are append-only; quantity is always positive and `side` gives direction.
+    instrument = Column(String, nullable=False)       # e.g. ISIN or ticker: "INF109K01Z48", "RELIANCE"
+    side = Column(String, nullable=False)             # BUY | SELL
+    trade_date = Column(Date, nullable=False)
+    quantity = Column(Float, nullable=False)
+    price = Column(Float, nullable=False)             # Per-unit price in INR
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # 3. FIFO Replay Index
+    # The tax engine reads a user's ledger ordered by instrument, then trade date.
+    __table_args__ = (
+        Index("ix_transactions_user_instrument_date", "user_id", "instrument", "trade_date"),
+    )
+
+    # 4. Relationship
+    owner = relationship("User", back_populates="transactions")
+
+    def __repr__(self):
+        return f"<Transaction({self.side} {self.quantity} {self.instrument} @ {self.price})>"
@@ -30,6 +30,9 @@ class User(Base):
     # 1-to-Many links for Goals and History
     goals = relationship("Goal", back_populates="owner", cascade="all, delete-orphan")
     chat_history = relationship("ChatHistory", back_populates="user", cascade="all, delete-orphan")
+    # Append-only sync history can be large; let the FK's ON DELETE CASCADE clean it up
+    portfolio_snapshots = relationship("PortfolioSnapshot", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    transactions = relationship("Transaction", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<User(email={self.email}, role={self.role})>"
\ No newline at end of file
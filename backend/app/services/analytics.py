@@ -1,10 +1,15 @@
 import logging
+import contextvars
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.models.user import User
 from app.models.portfolio import Portfolio
 from app.models.goal import Goal
 from app.services.finance_math import calculate_sip
+from app.services.percentile_index import percentile_index
+from app.core.cache import shared_cache
+from app.core.config import settings
 
 # Initialize Authority Logger
 logger = logging.getLogger(__name__)
@@ -50,6 +55,39 @@ def calculate_health_score(savings: float, expenses: float, income: float) -> in
         logger.error(f"Health Score Calculation Error: {str(e)}")
         return 0
 
+def summarize_goals(goals) -> tuple:
+    """
+    Objective Progress Matrix: totals the target/current amounts across goals.
+    Returns (total_target, total_current, completion_percentage).
+    """
+    total_goal_target = sum(float(g.target_amount or 0.0) for g in goals)
+    total_goal_current = sum(float(g.current_amount or 0.0) for g in goals)
+
+    goal_completion_pct = (total_goal_current / total_goal_target * 100) if total_goal_target > 0 else 0.0
+    return total_goal_target, total_goal_current, goal_completion_pct
+
+def project_net_worth(net_worth: float, monthly_surplus: float, years: int = 10, cagr: float = 12.0) -> tuple:
+    """
+    Wealth Strategy Projection: adds each year's surplus to principal, then compounds.
+    Returns (chart_data, final_projected_value) with Recharts-ready yearly points.
+    """
+    investable_surplus = max(monthly_surplus, 0.0)
+    growth = 1 + cagr / 100
+    chart_data = []
+    projected_value = net_worth
+
+    for year in range(1, years + 1):
+        # Add annual surplus to principal, then compound by the CAGR target
+        annual_contribution = investable_surplus * 12
+        projected_value = (projected_value + annual_contribution) * growth
+
+        chart_data.append({
+            "year": f"Y{year}",
+            "value": round(projected_value)
+        })
+
+    return chart_data, projected_value
+
 def get_comprehensive_stats(db: Session, email: str) -> dict:
     """
     Aggregates database metrics into a unified Financial Vitality Audit.
@@ -59,11 +97,15 @@ def get_comprehensive_stats(db: Session, email: str) -> dict:
 
     try:
         # 1. Secure Data Retrieval
-        portfolio = db.query(Portfolio).filter(Portfolio.owner_email == normalized_email).first()
+        # Role/level ride along in the same query: the peer segment for the benchmark
+        record = (db.query(Portfolio, User.role, User.level)
+                  .join(User, User.id == Portfolio.user_id)
+                  .filter(Portfolio.owner_email == normalized_email)
+                  .first())
         active_goals = db.query(Goal).filter(Goal.user_email == normalized_email).all()
         
         # Immediate fallback mapping if identity lacks financial data
-        if not portfolio:
+        if not record:
             return {
                 "summary": {"health_score": 0, "net_worth": 0, "monthly_surplus": 0, "emergency_fund_months": 0},
                 "goals": {"completion_percentage": 0, "count": 0, "shortfall": 0},
@@ -71,6 +113,8 @@ def get_comprehensive_stats(db: Session, email: str) -> dict:
                 "status": "No Authority Record Found"
             }
 
+        portfolio, role, level = record
+
         # Ensure values default to 0.0 if empty to prevent TypeErrors
         p_income = float(portfolio.monthly_income or 0.0)
         p_expenses = float(portfolio.monthly_expenses or 0.0)
@@ -82,29 +126,19 @@ def get_comprehensive_stats(db: Session, email: str) -> dict:
         total_net_worth = p_savings + p_investments
         
         # 3. Objective Progress Matrix
-        total_goal_target = sum(float(g.target_amount or 0.0) for g in active_goals)
-        total_goal_current = sum(float(g.current_amount or 0.0) for g in active_goals)
-        
-        goal_completion_pct = (total_goal_current / total_goal_target * 100) if total_goal_target > 0 else 0.0
+        total_goal_target, total_goal_current, goal_completion_pct = summarize_goals(active_goals)
 
         # 4. Wealth Strategy Projection (12% CAGR Target) -> Native formatting for Recharts
-        investable_surplus = max(surplus, 0.0)
-        chart_data = []
-        projected_value = total_net_worth
-        
-        for year in range(1, 11):
-            # Add annual surplus to principal, then compound by 12%
-            annual_contribution = investable_surplus * 12
-            projected_value = (projected_value + annual_contribution) * 1.12
-            
-            chart_data.append({
-                "year": f"Y{year}",
-                "value": round(projected_value)
-            })
+        chart_data, projected_value = project_net_worth(total_net_worth, surplus)
         
         # 5. Vitality Calibration
         health_score = calculate_health_score(p_savings, p_expenses, p_income)
         emergency_months = round(p_savings / p_expenses, 1) if p_expenses > 0 else 12.0
+        if not settings.SCHEDULER_ENABLED:
+            # No startup job to build the peer index: build it lazily if nobody has yet.
+            # Fresh context: the one-off scan is not charged to this request's query budget.
+            contextvars.Context().run(percentile_index.ensure_built, db)
+        peer_rank = percentile_index.rank(role, level, health_score)
 
         # 6. Structured Quantum Output
         return {
@@ -114,6 +148,7 @@ def get_comprehensive_stats(db: Session, email: str) -> dict:
                 "health_score": health_score,
                 "emergency_fund_months": emergency_months
             },
+            "benchmark": peer_rank,
             "goals": {
                 "count": len(active_goals),
                 "completion_percentage": round(goal_completion_pct, 1),
@@ -133,4 +168,26 @@ def get_comprehensive_stats(db: Session, email: str) -> dict:
         return {"status": "Database Error", "summary": {"health_score": 0}, "projections": {"chart_data": []}}
     except Exception as e:
         logger.error(f"Unexpected Analytics Engine Failure: {str(e)}")
-        return {"status": "System Error", "summary": {"health_score": 0}, "projections": {"chart_data": []}}
\ No newline at end of file
+        return {"status": "System Error", "summary": {"health_score": 0}, "projections": {"chart_data": []}}
+
+def _stats_key(email: str) -> str:
+    return f"analytics:{email}"
+
+
+def get_cached_stats(db: Session, email: str) -> dict:
+    """
+    Dashboard payload through the shared cache: every worker serves the same entry
+    until it expires or a write path calls invalidate_stats(). Failures are never cached.
+    """
+    key = _stats_key(email)
+    cached = shared_cache.get(key)
+    if cached is not None:
+        return cached
+    stats = get_comprehensive_stats(db, email)
+    if stats.get("status") in ("Success", "No Authority Record Found"):
+        shared_cache.set(key, stats, settings.ANALYTICS_CACHE_SECONDS)
+    return stats
+
+
+def invalidate_stats(email: str):
+    shared_cache.delete(_stats_key(email))
@@ -0,0 +1,103 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.core.cache import shared_cache
+from app.core.config import settings
+from app.core.database import session_scope
+from app.core.scheduler import scheduler
+from app.core.oauth import google_keys
+from app.models.history import ChatHistory
+from app.services.analytics import get_cached_stats
+from app.services.cohort_analytics import refresh_cohort_report
+from app.services.market_engine import MARKET_INDICES, get_index_analysis, snapshot_ttl
+from app.services.percentile_index import percentile_index
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = (0, 1, 2, 3, 4)
+COMPACTION_BATCH = 5000   # Rows deleted per transaction, keeps locks and WAL growth short
+
+
+# 1. Market Pre-Open Warmup (NSE opens 09:15 IST)
+# Per worker: seeds each process's indicator state from six months of bars, so the
+# first dashboard of the day doesn't pay for the history download.
+@scheduler.daily("09:05", weekdays=WEEKDAYS, jitter=60, exclusive=False)
+def prefetch_market_data():
+    for index in MARKET_INDICES:
+        snapshot = get_index_analysis(index)
+        shared_cache.set(f"market:{index}", snapshot, snapshot_ttl(snapshot))
+    logger.info(f"Market prefetch complete for {len(MARKET_INDICES)} indices.")
+
+
+# 2. Peer Percentile Index
+# Exclusive: one worker publishes the shared histograms at startup and then daily; syncs
+# keep them current in between, and every worker ranks against the published copy.
+# The daily rebuild also corrects any update lost to a busy lease. Trigger it to force one.
+@scheduler.every(86400, jitter=600, run_at_start=True)
+def refresh_percentile_index():
+    with session_scope() as db:
+        percentile_index.build(db)
+
+
+# 3. Population Cohort Report (full table scan) moved off the request path.
+# Exclusive: one worker per hour; at startup (or when a request finds the cache cold) too.
+@scheduler.every(3600, jitter=300, run_at_start=True)
+def precompute_cohort_report():
+    with session_scope() as db:
+        report = refresh_cohort_report(db)
+    logger.info(f"Cohort report refreshed: {report.get('population', 0)} portfolios ({report.get('status')}).")
+
+
+# 4. Google Sign-In Keys
+# Per worker: keeps the JWKS warm so OAuth callbacks verify id_tokens without a fetch.
+@scheduler.every(3600, jitter=300, exclusive=False, run_at_start=True)
+def refresh_google_jwks():
+    if settings.GOOGLE_CLIENT_ID:
+        google_keys.refresh_sync()
+
+
+# 5. Stale Dashboard Warm-up (event-triggered)
+# Write paths invalidate a user's cached dashboard; this recomputes it off the request
+# path so the next dashboard load is a cache hit. Per worker: it drains this process's queue.
+_stale_users = set()
+_stale_lock = threading.Lock()
+
+def mark_analytics_stale(email: str):
+    """Called after a portfolio write. Without a running scheduler the next read recomputes instead."""
+    with _stale_lock:
+        _stale_users.add(email)
+    if not scheduler.trigger("refresh_stale_analytics"):
+        with _stale_lock:
+            _stale_users.discard(email)
+
+@scheduler.on_demand(exclusive=False)
+def refresh_stale_analytics():
+    with _stale_lock:
+        emails = list(_stale_users)
+        _stale_users.clear()
+    with session_scope() as db:
+        for email in emails:
+            get_cached_stats(db, email)
+    logger.info(f"Dashboard cache warmed for {len(emails)} users.")
+
+
+# 6. Chat History Compaction (off-peak)
+@scheduler.daily("03:00", jitter=600)
+def compact_chat_history():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CHAT_RETENTION_DAYS)
+    removed = 0
+    with session_scope() as db:
+        while True:
+            ids = [row[0] for row in db.query(ChatHistory.id)
+                   .filter(ChatHistory.timestamp < cutoff)
+                   .order_by(ChatHistory.id)
+                   .limit(COMPACTION_BATCH)
+                   .all()]
+            if not ids:
+                break
+            db.query(ChatHistory).filter(ChatHistory.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            removed += len(ids)
+    logger.info(f"Chat history compaction removed {removed} exchanges older than {settings.CHAT_RETENTION_DAYS} days.")
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.price_store import load_prices, list_symbols
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+# Signal codes, in the same precedence classify_market() applies them
+STABLE, BULLISH, VOLATILE, BEARISH = 0, 1, 2, 3
+SIGNAL_NAMES = {STABLE: "STABLE", BULLISH: "BULLISH / PEAK", VOLATILE: "VOLATILE", BEARISH: "BEARISH / CRASH"}
+
+WINDOW = 20
+TRADING_DAYS_PER_MONTH = 21
+
+# What each signal's advice claims, expressed as a testable forward outcome:
+#   BEARISH  "Buy the Dip"              -> forward return is positive
+#   VOLATILE "avoid large lump sums"    -> SIP beats lump sum over the horizon
+#   BULLISH  "avoid FOMO buying"        -> SIP beats lump sum over the horizon
+#   STABLE   "strategy is optimal"      -> forward return is positive
+_SIP_CLAIMS = (VOLATILE, BULLISH)
+
+_STAT_FIELDS = ("n", "hits", "sum_return", "sum_sq_return", "lump_wins", "sum_sip")
+
+
+def evaluate_signals(high: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Vectorized twin of market_engine.classify_market over a whole price history.
+    Returns an int8 signal per bar; -1 where fewer than WINDOW bars are available.
+    """
+    n = close.size
+    signals = np.full(n, -1, dtype=np.int8)
+    if n < WINDOW:
+        return signals
+
+    # SMA20 via cumulative sums; rolling 20-day high via a strided window view
+    csum = np.concatenate(([0.0], np.cumsum(close)))
+    sma = (csum[WINDOW:] - csum[:-WINDOW]) / WINDOW
+    recent_max = sliding_window_view(high, WINDOW).max(axis=1)
+
+    price = close[WINDOW - 1:]
+    prev_close = close[WINDOW - 2:-1]
+    daily_change_pct = (price - prev_close) / prev_close * 100
+    is_bullish = price > sma
+    drop_from_peak = (recent_max - price) / recent_max * 100
+
+    signals[WINDOW - 1:] = np.select(
+        [drop_from_peak > 10, ~is_bullish & (daily_change_pct < -1.5), is_bullish & (drop_from_peak < 1.5)],
+        [BEARISH, VOLATILE, BULLISH],
+        default=STABLE
+    )
+    return signals
+
+
+def sip_vs_lump(close: np.ndarray, horizon: int, sip_months: int) -> tuple:
+    """
+    For every start bar t with a full horizon ahead, returns (lump_return, sip_return):
+      lump: invest 1 at close[t], value at close[t + horizon]
+      sip : invest 1/sip_months every TRADING_DAYS_PER_MONTH bars from t, value at close[t + horizon]
+    """
+    starts = close.size - horizon
+    if starts <= 0:
+        return np.empty(0), np.empty(0)
+
+    exit_price = close[horizon:]
+    lump = exit_price / close[:starts] - 1
+
+    # units bought per unit currency, averaged over the instalments (all shifts vectorized)
+    inverse = 1.0 / close
+    units = np.zeros(starts)
+    # Every instalment must land strictly before the exit bar
+    instalments = min(sip_months, (horizon - 1) // TRADING_DAYS_PER_MONTH + 1)
+    for k in range(instalments):
+        offset = k * TRADING_DAYS_PER_MONTH
+        units += inverse[offset:offset + starts]
+    sip = exit_price * units / instalments - 1
+    return lump, sip
+
+
+def backtest_prices(prices: dict, horizon: int = 252, sip_months: int = 12) -> dict:
+    """Per-signal sufficient statistics for one symbol (mergeable across symbols)."""
+    close = prices["close"]
+    signals = evaluate_signals(prices["high"], close)
+    lump, sip = sip_vs_lump(close, horizon, sip_months)
+    signals = signals[:lump.size]
+
+    stats = {}
+    for code in SIGNAL_NAMES:
+        mask = signals == code
+        fwd = lump[mask]
+        sip_ret = sip[mask]
+        if code in _SIP_CLAIMS:
+            hits = np.count_nonzero(sip_ret > fwd)
+        else:
+            hits = np.count_nonzero(fwd > 0)
+        stats[code] = {
+            "n": int(mask.sum()),
+            "hits": int(hits),
+            "sum_return": float(fwd.sum()),
+            "sum_sq_return": float((fwd * fwd).sum()),
+            "lump_wins": int(np.count_nonzero(fwd > sip_ret)),
+            "sum_sip": float(sip_ret.sum()),
+        }
+    return stats
+
+
+def _backtest_symbol(args: tuple) -> tuple:
+    symbol, data_dir, horizon, sip_months = args
+    try:
+        return symbol, backtest_prices(load_prices(symbol, data_dir), horizon, sip_months)
+    except Exception as e:
+        logger.error(f"Backtest Failure for {symbol}: {str(e)}")
+        return symbol, None
+
+
+def _summarize(stats: dict) -> dict:
+    n = stats["n"]
+    if n == 0:
+        return {"observations": 0}
+    mean = stats["sum_return"] / n
+    variance = max(stats["sum_sq_return"] / n - mean * mean, 0.0)
+    return {
+        "observations": n,
+        "hit_rate": round(stats["hits"] / n * 100, 2),
+        # Forward return == lump-sum return from the signal date over the horizon
+        "mean_forward_return": round(mean * 100, 2),
+        "forward_return_std": round(float(np.sqrt(variance)) * 100, 2),
+        "lump_sum_win_rate": round(stats["lump_wins"] / n * 100, 2),
+        "mean_sip_return": round(stats["sum_sip"] / n * 100, 2),
+    }
+
+
+def run_backtest(symbols: Optional[list] = None, data_dir: Optional[str] = None,
+                 horizon: int = 252, sip_months: int = 12, workers: Optional[int] = None) -> dict:
+    """
+    Replays every stored symbol through the signal rules, one process per symbol batch,
+    and merges the per-signal statistics into a single report.
+    """
+    symbols = symbols or list_symbols(data_dir)
+    started = time.perf_counter()
+    totals = {code: dict.fromkeys(_STAT_FIELDS, 0) for code in SIGNAL_NAMES}
+    per_symbol = {}
+
+    jobs = [(symbol, data_dir, horizon, sip_months) for symbol in symbols]
+    if workers == 1 or len(jobs) <= 1:
+        results = list(map(_backtest_symbol, jobs))
+    else:
+        pool_size = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=pool_size) as pool:
+            results = list(pool.map(_backtest_symbol, jobs, chunksize=max(len(jobs) // (pool_size * 4), 1)))
+
+    for symbol, stats in results:
+        if stats is None:
+            continue
+        per_symbol[symbol] = {SIGNAL_NAMES[code]: _summarize(s) for code, s in stats.items()}
+        for code, s in stats.items():
+            for field in _STAT_FIELDS:
+                totals[code][field] += s[field]
+
+    return {
+        "symbols": len(per_symbol),
+        "horizon_days": horizon,
+        "sip_months": sip_months,
+        "signals": {SIGNAL_NAMES[code]: _summarize(s) for code, s in totals.items()},
+        "per_symbol": per_symbol,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the market status rules on stored daily bars.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to replay (default: everything in PRICE_DATA_DIR).")
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--horizon", type=int, default=252, help="Forward window in trading days.")
+    parser.add_argument("--sip-months", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--per-symbol", action="store_true", help="Include per-symbol breakdown in the output.")
+    args = parser.parse_args()
+
+    report = run_backtest(args.symbols, args.data_dir, args.horizon, args.sip_months, args.workers)
+    if not args.per_symbol:
+        report.pop("per_symbol")
+    json.dump(report, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,221 @@
+import logging
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.transaction import Transaction
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+# Listed equity / equity-oriented funds. Held for more than 12 months -> long term.
+LTCG_HOLDING_MONTHS = 12
+# (transfers on or after, STCG rate, LTCG rate), newest first: Finance (No. 2) Act 2024
+# raised both rates from 23-Jul-2024; before FY2018-19 listed-equity LTCG was exempt.
+TAX_REGIMES = (
+    (date(2024, 7, 23), 0.20, 0.125),
+    (date(2018, 4, 1), 0.15, 0.10),
+    (date.min, 0.15, 0.0),
+)
+# Annual LTCG exemption by the first calendar year of the FY it applies from
+LTCG_EXEMPTIONS = ((2024, 125000.0), (2018, 100000.0))
+QTY_EPSILON = 1e-9
+
+_CACHE_SIZE = 256
+_cache = OrderedDict()           # (user_id, ledger_version) -> report
+_cache_lock = threading.Lock()
+
+
+def _fy_start(d) -> int:
+    return d.year if d.month >= 4 else d.year - 1
+
+
+def financial_year(d) -> str:
+    """Indian FY label, April to March: 2024-07-01 -> 'FY2024-25'."""
+    start = _fy_start(d)
+    return f"FY{start}-{str(start + 1)[-2:]}"
+
+
+def tax_rates(sell_date) -> tuple:
+    """(STCG rate, LTCG rate) for a transfer on `sell_date`."""
+    for effective, stcg_rate, ltcg_rate in TAX_REGIMES:
+        if sell_date >= effective:
+            return stcg_rate, ltcg_rate
+    return TAX_REGIMES[-1][1:]
+
+
+def ltcg_exemption(fy_start: int) -> float:
+    for first_year, exemption in LTCG_EXEMPTIONS:
+        if fy_start >= first_year:
+            return exemption
+    return 0.0
+
+
+def is_long_term(buy_date, sell_date) -> bool:
+    """Calendar months, not days: a sale on the 12-month anniversary is still short term."""
+    month = buy_date.month - 1 + LTCG_HOLDING_MONTHS
+    year, month = buy_date.year + month // 12, month % 12 + 1
+    anniversary = date(year, month, min(buy_date.day, calendar.monthrange(year, month)[1]))
+    return sell_date > anniversary
+
+
+def _set_off(gains: dict, loss: float) -> float:
+    """Absorbs `loss` (positive number) into rate -> gain buckets, highest rate first; returns the rest."""
+    for rate in sorted(gains, reverse=True):
+        used = min(gains[rate], loss)
+        gains[rate] -= used
+        loss -= used
+    return loss
+
+
+class _LotQueue:
+    """
+    FIFO lots for one instrument held in parallel lists with a moving head index,
+    so consuming a lot is O(1) and nothing is shifted or re-allocated.
+    """
+    __slots__ = ("dates", "qty", "price", "head")
+
+    def __init__(self):
+        self.dates, self.qty, self.price = [], [], []
+        self.head = 0
+
+    def buy(self, trade_date, quantity: float, price: float):
+        self.dates.append(trade_date)
+        self.qty.append(quantity)
+        self.price.append(price)
+
+    def sell(self, trade_date, quantity: float, price: float, realize) -> float:
+        """Matches `quantity` against the oldest lots; returns any unmatched remainder."""
+        while quantity > QTY_EPSILON and self.head < len(self.qty):
+            i = self.head
+            matched = min(self.qty[i], quantity)
+            realize(self.dates[i], trade_date, matched, self.price[i], price)
+            self.qty[i] -= matched
+            quantity -= matched
+            if self.qty[i] <= QTY_EPSILON:
+                self.head += 1
+        return quantity
+
+    def open_position(self) -> tuple:
+        qty = sum(self.qty[self.head:])
+        cost = sum(q * p for q, p in zip(self.qty[self.head:], self.price[self.head:]))
+        return qty, cost
+
+
+def compute_capital_gains(rows) -> dict:
+    """
+    FIFO lot matching over (instrument, side, trade_date, quantity, price) rows,
+    ordered by instrument then trade date. Pure function: no database access.
+    """
+    years = {}
+    queues = {}
+    unmatched = {}
+    realized_lots = 0
+
+    def realize(buy_date, sell_date, qty, buy_price, sell_price):
+        nonlocal realized_lots
+        realized_lots += 1
+        bucket = years.setdefault(_fy_start(sell_date), {"stcg": {}, "ltcg": {}, "proceeds": 0.0})
+        gain = qty * (sell_price - buy_price)
+        stcg_rate, ltcg_rate = tax_rates(sell_date)
+        kind, rate = ("ltcg", ltcg_rate) if is_long_term(buy_date, sell_date) else ("stcg", stcg_rate)
+        # Gains are bucketed by the rate in force on the sell date (a FY can straddle a rate change)
+        bucket[kind][rate] = bucket[kind].get(rate, 0.0) + gain
+        bucket["proceeds"] += qty * sell_price
+
+    for instrument, side, trade_date, quantity, price in rows:
+        queue = queues.get(instrument)
+        if queue is None:
+            queue = queues[instrument] = _LotQueue()
+        if side == "BUY":
+            queue.buy(trade_date, quantity, price)
+        else:
+            remainder = queue.sell(trade_date, quantity, price, realize)
+            if remainder > QTY_EPSILON:
+                unmatched[instrument] = unmatched.get(instrument, 0.0) + remainder
+
+    # Per-year set-off: short-term losses reduce STCG first, then LTCG; long-term losses
+    # only reduce LTCG; the LTCG exemption comes last. Each is applied to the highest-rate
+    # gains first, as a taxpayer would claim it. Loss carry-forward is not modelled.
+    summary = []
+    total_tax = 0.0
+    for fy_start in sorted(years):
+        bucket = years[fy_start]
+        stcg = {rate: gain for rate, gain in bucket["stcg"].items() if gain > 0}
+        ltcg = {rate: gain for rate, gain in bucket["ltcg"].items() if gain > 0}
+        st_loss = -sum(gain for gain in bucket["stcg"].values() if gain < 0)
+        lt_loss = -sum(gain for gain in bucket["ltcg"].values() if gain < 0)
+        _set_off(ltcg, _set_off(stcg, st_loss))
+        _set_off(ltcg, lt_loss)
+
+        exemption = ltcg_exemption(fy_start)
+        net_ltcg = sum(ltcg.values())
+        _set_off(ltcg, exemption)
+        tax = sum(rate * gain for rate, gain in stcg.items()) + sum(rate * gain for rate, gain in ltcg.items())
+        total_tax += tax
+        summary.append({
+            "financial_year": financial_year(date(fy_start, 4, 1)),
+            "proceeds": round(bucket["proceeds"], 2),
+            "stcg": round(sum(bucket["stcg"].values()), 2),
+            "ltcg": round(sum(bucket["ltcg"].values()), 2),
+            "ltcg_exemption_used": round(min(net_ltcg, exemption), 2),
+            "taxable_stcg": round(sum(stcg.values()), 2),
+            "taxable_ltcg": round(sum(ltcg.values()), 2),
+            "estimated_tax": round(tax, 2)
+        })
+
+    holdings = []
+    for instrument, queue in queues.items():
+        qty, cost = queue.open_position()
+        if qty > QTY_EPSILON:
+            holdings.append({"instrument": instrument, "quantity": round(qty, 6), "average_cost": round(cost / qty, 4)})
+
+    return {
+        "years": summary,
+        "total_estimated_tax": round(total_tax, 2),
+        "realized_lots": realized_lots,
+        "open_holdings": holdings,
+        "unmatched_sells": {k: round(v, 6) for k, v in unmatched.items()},
+        "status": "Success"
+    }
+
+
+def get_capital_gains(db: Session, user_id: int) -> dict:
+    """
+    Capital-gains report for a user's ledger, cached per ledger version.
+    The version probe is a single aggregate on the (user_id, ...) index; the ledger
+    itself is only replayed when a transaction was added or removed since last time.
+    """
+    try:
+        count, max_id = db.query(func.count(Transaction.id), func.max(Transaction.id)).filter(
+            Transaction.user_id == user_id).one()
+        key = (user_id, count, max_id)
+
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+        rows = (
+            db.query(Transaction.instrument, Transaction.side, Transaction.trade_date,
+                     Transaction.quantity, Transaction.price)
+            .filter(Transaction.user_id == user_id)
+            .order_by(Transaction.instrument, Transaction.trade_date, Transaction.id)
+            .all()
+        )
+        report = compute_capital_gains(rows)
+        report["ledger_version"] = f"{count}:{max_id or 0}"
+
+        with _cache_lock:
+            _cache[key] = report
+            if len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+        return report
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database Query Failure in Capital Gains: {str(db_err)}")
+        return {"status": "Database Error", "years": [], "total_estimated_tax": 0}
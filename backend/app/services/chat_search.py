@@ -0,0 +1,146 @@
+import re
+import logging
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 50
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+
+# --- 1. INDEX SETUP (run at startup after create_all) ---
+# PostgreSQL: the tsvector column, its trigger and GIN index are created by the one-off
+# migration in migrate_chat_search.py (batched backfill, CONCURRENTLY), never
+# at import: an ALTER TABLE here would take ACCESS EXCLUSIVE on every worker's boot.
+_pg_index_ready = True
+
+# SQLite: an external-content FTS5 table kept in sync by triggers (no duplicated text).
+# The content view adds `owner` (hex of the email, a single token) so MATCH itself is
+# restricted to one user's rows before anything is ranked.
+_SQLITE_DDL = (
+    "CREATE VIEW IF NOT EXISTS chat_history_search_src AS "
+    "SELECT id, query, response, hex(lower(user_email)) AS owner FROM chat_history",
+    "CREATE VIRTUAL TABLE chat_history_fts USING fts5(query, response, owner, "
+    "content='chat_history_search_src', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER chat_history_fts_ai AFTER INSERT ON chat_history BEGIN "
+    "INSERT INTO chat_history_fts(rowid, query, response, owner) "
+    "VALUES (new.id, new.query, new.response, hex(lower(new.user_email))); END",
+    "CREATE TRIGGER chat_history_fts_ad AFTER DELETE ON chat_history BEGIN "
+    "INSERT INTO chat_history_fts(chat_history_fts, rowid, query, response, owner) "
+    "VALUES ('delete', old.id, old.query, old.response, hex(lower(old.user_email))); END",
+    "CREATE TRIGGER chat_history_fts_au AFTER UPDATE OF query, response, user_email ON chat_history BEGIN "
+    "INSERT INTO chat_history_fts(chat_history_fts, rowid, query, response, owner) "
+    "VALUES ('delete', old.id, old.query, old.response, hex(lower(old.user_email))); "
+    "INSERT INTO chat_history_fts(rowid, query, response, owner) "
+    "VALUES (new.id, new.query, new.response, hex(lower(new.user_email))); END",
+    # Backfill rows written before the index existed
+    "INSERT INTO chat_history_fts(chat_history_fts) VALUES ('rebuild')",
+)
+
+# Earlier layout without the owner column: dropped and rebuilt once
+_SQLITE_LEGACY_DROP = (
+    "DROP TRIGGER IF EXISTS chat_history_fts_ai",
+    "DROP TRIGGER IF EXISTS chat_history_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_history_fts_au",
+    "DROP TABLE IF EXISTS chat_history_fts",
+)
+
+
+def ensure_search_index(engine):
+    """Creates the SQLite FTS5 index if missing; on PostgreSQL only checks the migration ran."""
+    global _pg_index_ready
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                _pg_index_ready = conn.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'chat_history' AND column_name = 'search_vector'")).first() is not None
+                if not _pg_index_ready:
+                    logger.warning("Chat search disabled: run `python migrate_chat_search.py` once.")
+            elif engine.dialect.name == "sqlite":
+                columns = {row[1] for row in conn.execute(text("PRAGMA table_info(chat_history_fts)"))}
+                if "owner" not in columns:
+                    for statement in (_SQLITE_LEGACY_DROP if columns else ()) + _SQLITE_DDL:
+                        conn.execute(text(statement))
+                    logger.info("Chat search: FTS5 index created and backfilled.")
+    except SQLAlchemyError as db_err:
+        logger.error(f"Chat Search Index Setup Failure: {str(db_err)}")
+
+
+# --- 2. SEARCH ---
+
+def _fts5_query(raw: str, email: str) -> str:
+    """
+    Free text -> FTS5 MATCH expression: every word required (each quoted so user input is
+    never syntax), searched in query/response only, and constrained to the owner's rows.
+    """
+    terms = " ".join(f'"{token}"' for token in re.findall(r"\w+", raw.lower()))
+    if not terms:
+        return ""
+    return f'{{query response}} : ({terms}) AND owner : "{email.encode().hex().upper()}"'
+
+
+def search_chat_history(db: Session, email: str, query: str, page: int = 1, page_size: int = 20) -> dict:
+    """
+    Ranked, paginated full-text search over one user's advisor conversations.
+    Pages are fetched with one extra row to report `has_more` without counting every match;
+    highlights are only computed for the rows on the page.
+    """
+    normalized_email = email.lower().strip()
+    page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+    params = {"email": normalized_email, "limit": page_size + 1, "offset": (max(page, 1) - 1) * page_size}
+    response = {"query": query, "page": page, "page_size": page_size, "has_more": False, "results": []}
+
+    try:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            if not _pg_index_ready:
+                return {**response, "status": "Search Unavailable"}
+            params.update(q=query, opts=f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+                                        "MaxFragments=2, MinWords=8, MaxWords=30")
+            rows = db.execute(text(
+                "WITH q AS (SELECT websearch_to_tsquery('english', :q) AS tsq), "
+                "hits AS ("
+                "  SELECT c.id, c.timestamp, c.query, c.response, ts_rank_cd(c.search_vector, q.tsq) AS rank "
+                "  FROM chat_history c, q "
+                "  WHERE c.user_email = :email AND c.search_vector @@ q.tsq "
+                "  ORDER BY rank DESC, c.id DESC LIMIT :limit OFFSET :offset) "
+                "SELECT hits.id, hits.timestamp, hits.rank, "
+                "  ts_headline('english', hits.query, q.tsq, :opts), "
+                "  ts_headline('english', hits.response, q.tsq, :opts) "
+                "FROM hits, q ORDER BY hits.rank DESC, hits.id DESC"
+            ), params).all()
+        else:
+            match = _fts5_query(query, normalized_email)
+            if not match:
+                return {**response, "status": "Success"}
+            params["match"] = match
+            # bm25() is lower-is-better; negate so `rank` reads the same way as ts_rank_cd
+            rows = db.execute(text(
+                "SELECT c.id, c.timestamp, -bm25(chat_history_fts, 2.0, 1.0, 0.0) AS rank, "
+                f"  snippet(chat_history_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 16), "
+                f"  snippet(chat_history_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 24) "
+                "FROM chat_history_fts JOIN chat_history c ON c.id = chat_history_fts.rowid "
+                "WHERE chat_history_fts MATCH :match AND c.user_email = :email "
+                "ORDER BY rank DESC, c.id DESC LIMIT :limit OFFSET :offset"
+            ), params).all()
+
+        response["has_more"] = len(rows) > page_size
+        response["results"] = [
+            {
+                "id": chat_id,
+                "timestamp": ts.isoformat() if hasattr(ts, "isoformat") else ts,
+                "rank": round(float(rank), 4),
+                "query_highlight": query_hl,
+                "response_highlight": response_hl
+            }
+            for chat_id, ts, rank, query_hl, response_hl in rows[:page_size]
+        ]
+        response["status"] = "Success"
+        return response
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database Query Failure in Chat Search: {str(db_err)}")
+        return {**response, "status": "Database Error"}
@@ -0,0 +1,227 @@
+import logging
+from itertools import islice
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.user import User
+from app.models.portfolio import Portfolio
+from app.models.goal import Goal
+from app.core.cache import shared_cache
+from app.core.config import settings
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50_000          # Rows materialized at once; bounds peak memory
+LOW_RUNWAY_MONTHS = 3.0      # "Under 3 months of runway" advisory threshold
+PROJECTION_YEARS = 10
+PROJECTION_GROWTH = 1.12     # Same 12% CAGR target as the per-user dashboard
+COHORT_CACHE_KEY = "analytics:cohort"
+COHORT_CACHE_SECONDS = 2 * 3600   # Refreshed hourly by the background job; the slack covers a missed run
+
+
+def calculate_health_scores(savings: np.ndarray, expenses: np.ndarray, income: np.ndarray) -> np.ndarray:
+    """
+    Column-wise twin of analytics.calculate_health_score.
+    Produces identical integers for every row (see bench_system.py equivalence audit).
+    """
+    has_income = income > 0
+    safe_income = np.where(has_income, income, 1.0)
+    has_expenses = expenses > 0
+    safe_expenses = np.where(has_expenses, expenses, 1.0)
+
+    # 1. Savings Rate Score (Max 40 Points)
+    savings_rate = ((income - expenses) / safe_income) * 100
+    rate_score = np.minimum(np.maximum(savings_rate * 2, 0), 40.0)
+
+    # 2. Runway Score (Max 40 Points)
+    months_covered = savings / safe_expenses
+    runway_score = np.where(has_expenses, np.minimum((months_covered / 6.0) * 40.0, 40.0), 40.0)
+
+    # 3. Expense Control Score (Max 20 Points)
+    expense_ratio = expenses / safe_income
+    ratio_score = np.select([expense_ratio <= 0.5, expense_ratio <= 0.8], [20.0, 10.0], default=0.0)
+
+    scores = np.trunc(rate_score + runway_score + ratio_score).astype(np.int64)
+    return np.where(has_income, scores, 0)
+
+def project_net_worths(net_worth: np.ndarray, monthly_surplus: np.ndarray) -> np.ndarray:
+    """Column-wise twin of analytics.project_net_worth (final value only)."""
+    annual_contribution = np.maximum(monthly_surplus, 0.0) * 12
+    projected = net_worth.astype(np.float64, copy=True)
+    for _ in range(PROJECTION_YEARS):
+        projected = (projected + annual_contribution) * PROJECTION_GROWTH
+    return projected
+
+
+class _CohortAccumulator:
+    """Fixed-size running totals; memory is independent of population size."""
+
+    def __init__(self):
+        self.population = 0
+        self.score_counts = np.zeros(101, dtype=np.int64)
+        self.low_runway = 0
+        self.segments = {}
+        self.seg_users = np.zeros(0, dtype=np.int64)
+        self.seg_score = np.zeros(0)
+        self.seg_net_worth = np.zeros(0)
+        self.seg_projected = np.zeros(0)
+        self.seg_goal_target = np.zeros(0)
+        self.seg_goal_current = np.zeros(0)
+
+    def _segment_index(self, roles, levels) -> np.ndarray:
+        idx = np.fromiter(
+            (self.segments.setdefault((r, l), len(self.segments)) for r, l in zip(roles, levels)),
+            dtype=np.int64, count=len(roles)
+        )
+        grow = len(self.segments) - len(self.seg_users)
+        if grow > 0:
+            for name in ("seg_users", "seg_score", "seg_net_worth", "seg_projected", "seg_goal_target", "seg_goal_current"):
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros(grow, dtype=column.dtype)]))
+        return idx
+
+    def add(self, rows: list):
+        roles, levels, income, expenses, savings, investments, goal_target, goal_current = zip(*rows)
+        income = np.asarray(income, dtype=np.float64)
+        expenses = np.asarray(expenses, dtype=np.float64)
+        savings = np.asarray(savings, dtype=np.float64)
+        net_worth = savings + np.asarray(investments, dtype=np.float64)
+
+        scores = calculate_health_scores(savings, expenses, income)
+        projected = project_net_worths(net_worth, income - expenses)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            runway = np.where(expenses > 0, savings / expenses, np.inf)
+
+        self.population += len(rows)
+        self.score_counts += np.bincount(np.clip(scores, 0, 100), minlength=101)
+        self.low_runway += int(np.count_nonzero(runway < LOW_RUNWAY_MONTHS))
+
+        idx = self._segment_index(roles, levels)
+        size = len(self.segments)
+        self.seg_users += np.bincount(idx, minlength=size)
+        self.seg_score += np.bincount(idx, weights=scores, minlength=size)
+        self.seg_net_worth += np.bincount(idx, weights=net_worth, minlength=size)
+        self.seg_projected += np.bincount(idx, weights=projected, minlength=size)
+        self.seg_goal_target += np.bincount(idx, weights=np.asarray(goal_target, dtype=np.float64), minlength=size)
+        self.seg_goal_current += np.bincount(idx, weights=np.asarray(goal_current, dtype=np.float64), minlength=size)
+
+    def _percentile(self, q: float) -> int:
+        cumulative = np.cumsum(self.score_counts)
+        return int(np.searchsorted(cumulative, q * self.population, side="left"))
+
+    def report(self, min_segment_size: int = 0) -> dict:
+        if self.population == 0:
+            return {"population": 0, "health_score": {}, "runway": {}, "segments": [], "status": "No Cohort Data"}
+        if self.population < min_segment_size:
+            # Population-wide percentiles of a handful of users are individual figures
+            return {"population": self.population, "health_score": {}, "runway": {}, "segments": [],
+                    "status": "Cohort Too Small"}
+
+        scores = np.arange(101)
+        segments = []
+        suppressed = 0
+        for (role, level), i in sorted(self.segments.items(), key=lambda item: item[1]):
+            users = int(self.seg_users[i])
+            if users < min_segment_size:
+                suppressed += 1
+                continue
+            target = self.seg_goal_target[i]
+            segments.append({
+                "role": role,
+                "level": level,
+                "users": users,
+                "avg_health_score": round(float(self.seg_score[i] / users), 1),
+                "avg_net_worth": round(float(self.seg_net_worth[i] / users), 2),
+                "avg_ten_year_projection": round(float(self.seg_projected[i] / users), 2),
+                "goal_completion_percentage": round(float(self.seg_goal_current[i] / target * 100), 1) if target > 0 else 0.0
+            })
+
+        return {
+            "population": self.population,
+            "health_score": {
+                "mean": round(float((self.score_counts * scores).sum() / self.population), 1),
+                "p10": self._percentile(0.10),
+                "median": self._percentile(0.50),
+                "p90": self._percentile(0.90),
+                # 10-point buckets for the distribution chart: 0-9, 10-19, ..., 90-100
+                "distribution": [
+                    {"bucket": f"{b}-{b + 9 if b < 90 else 100}", "users": int(self.score_counts[b:b + 10 if b < 90 else 101].sum())}
+                    for b in range(0, 100, 10)
+                ]
+            },
+            "runway": {
+                "under_3_months": self.low_runway,
+                "under_3_months_share": round(self.low_runway / self.population * 100, 2)
+            },
+            "segments": segments,
+            "suppressed_segments": suppressed,
+            "status": "Success"
+        }
+
+
+def get_cohort_report(db: Session, chunk_size: int = CHUNK_SIZE, min_segment_size: int = 0) -> dict:
+    """
+    Population-wide Financial Vitality Audit.
+    Streams every portfolio (with per-user goal totals) through a single server-side
+    cursor and folds each chunk into column-wise aggregates.
+    """
+    try:
+        goal_totals = (
+            db.query(
+                Goal.user_id.label("user_id"),
+                func.sum(Goal.target_amount).label("target"),
+                func.sum(Goal.current_amount).label("current")
+            )
+            .group_by(Goal.user_id)
+            .subquery()
+        )
+
+        rows = iter(
+            db.query(
+                User.role,
+                User.level,
+                func.coalesce(Portfolio.monthly_income, 0.0),
+                func.coalesce(Portfolio.monthly_expenses, 0.0),
+                func.coalesce(Portfolio.savings, 0.0),
+                func.coalesce(Portfolio.investments, 0.0),
+                func.coalesce(goal_totals.c.target, 0.0),
+                func.coalesce(goal_totals.c.current, 0.0)
+            )
+            .join(Portfolio, Portfolio.user_id == User.id)
+            .outerjoin(goal_totals, goal_totals.c.user_id == User.id)
+            .yield_per(chunk_size)
+        )
+
+        accumulator = _CohortAccumulator()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            accumulator.add(chunk)
+
+        return accumulator.report(min_segment_size)
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database Query Failure in Cohort Analytics: {str(db_err)}")
+        return {"status": "Database Error", "population": 0, "segments": []}
+    except Exception as e:
+        logger.error(f"Unexpected Cohort Engine Failure: {str(e)}")
+        return {"status": "System Error", "population": 0, "segments": []}
+
+
+def refresh_cohort_report(db: Session) -> dict:
+    """Recomputes the full-population report into the shared cache (background job)."""
+    report = get_cohort_report(db, min_segment_size=settings.COHORT_MIN_SEGMENT_SIZE)
+    if report.get("status") in ("Success", "Cohort Too Small", "No Cohort Data"):
+        shared_cache.set(COHORT_CACHE_KEY, report, COHORT_CACHE_SECONDS)
+    return report
+
+
+def get_cached_cohort_report() -> Optional[dict]:
+    """The precomputed report, or None while the background job hasn't produced one."""
+    return shared_cache.get(COHORT_CACHE_KEY)
@@ -0,0 +1,113 @@
+import io
+import csv
+import json
+import zlib
+import logging
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.core.database import session_scope, replica_router
+from app.models.goal import Goal
+from app.models.portfolio import Portfolio
+from app.models.history import ChatHistory
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+EXPORT_FETCH_ROWS = 200   # Server-side cursor batch (yield_per) within each chunk
+
+# 1. Export Datasets
+# model, owner column, exported columns (also the CSV column order).
+# Only plain columns are selected: no ORM identity map, no relationship loads.
+EXPORT_DATASETS = {
+    "portfolio": (Portfolio, Portfolio.owner_email, (
+        Portfolio.id, Portfolio.owner_email, Portfolio.monthly_income, Portfolio.monthly_expenses,
+        Portfolio.savings, Portfolio.investments, Portfolio.last_updated)),
+    "goals": (Goal, Goal.user_email, (
+        Goal.id, Goal.user_email, Goal.title, Goal.category, Goal.target_amount, Goal.current_amount,
+        Goal.deadline, Goal.status, Goal.created_at, Goal.updated_at)),
+    "chat_history": (ChatHistory, ChatHistory.user_email, (
+        ChatHistory.id, ChatHistory.user_email, ChatHistory.timestamp, ChatHistory.user_role,
+        ChatHistory.user_level, ChatHistory.query, ChatHistory.response)),
+}
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Unserializable export value: {type(value).__name__}")
+
+
+# 2. Chunked Reader
+def _read_chunks(dataset: str, email: Optional[str], fmt: str, bind) -> Iterator[str]:
+    """
+    Keyset-paginates one dataset in EXPORT_CHUNK_ROWS slices. Each slice is read through
+    a server-side cursor in its own short session and encoded before the session closes,
+    so the pooled connection is never held while a slow client drains the response.
+    """
+    model, owner_column, columns = EXPORT_DATASETS[dataset]
+    keys = [column.key for column in columns]
+    last_id = 0
+
+    while True:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        rows = 0
+        with session_scope(bind) as db:
+            chunk = db.query(*columns).filter(model.id > last_id)
+            if email is not None:
+                chunk = chunk.filter(owner_column == email)
+            for row in chunk.order_by(model.id).limit(settings.EXPORT_CHUNK_ROWS).yield_per(EXPORT_FETCH_ROWS):
+                if writer is not None:
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps({"record": dataset, **dict(zip(keys, row))}, default=_json_default))
+                    buffer.write("\n")
+                last_id = row.id
+                rows += 1
+
+        if rows:
+            yield buffer.getvalue()
+        if rows < settings.EXPORT_CHUNK_ROWS:
+            return
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compresses on the fly into a single gzip member; only the current chunk is ever buffered."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# 3. Export Stream
+def stream_export(fmt: str, datasets: list, email: Optional[str] = None, compress: bool = False) -> Iterator[bytes]:
+    """
+    Body generator for a StreamingResponse. `email=None` exports every tenant.
+    Memory stays bounded by one chunk regardless of history size.
+    """
+    # One read node for the whole export; a user who just wrote reads from the primary
+    bind = replica_router.engine_for(email)
+
+    def encoded() -> Iterator[bytes]:
+        exported = {}
+        try:
+            for dataset in datasets:
+                exported[dataset] = 0
+                if fmt == "csv":
+                    yield (",".join(column.key for column in EXPORT_DATASETS[dataset][2]) + "\r\n").encode()
+                for text in _read_chunks(dataset, email, fmt, bind):
+                    exported[dataset] += 1
+                    yield text.encode()
+        except Exception as e:
+            # Headers are already sent: the truncated body is the client's only signal
+            logger.error(f"Data Export FAILURE ({email or 'all tenants'}, {dataset}): {str(e)}")
+            raise
+        logger.info(f"Data export complete for {email or 'all tenants'}: {exported} chunks.")
+
+    return _gzip(encoded()) if compress else encoded()
@@ -0,0 +1,137 @@
+import logging
+from typing import Optional
+
+import numpy as np
+
+from app.services.price_store import load_prices
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+MAX_START_DATES = 5000   # Start dates are thinned evenly beyond this to keep responses interactive
+DAYS_PER_YEAR = 365.0
+
+
+def xirr(amounts: np.ndarray, times: np.ndarray, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    Vectorized XIRR: one annualized rate per row of `amounts` (cash flows, outflows negative)
+    at `times` (years since each row's first flow). Safeguarded Newton: steps that leave the
+    current sign-change bracket fall back to bisection, so every row converges.
+    """
+    rows = amounts.shape[0]
+    lo = np.full(rows, -0.9999)
+    hi = np.full(rows, 100.0)
+    rate = np.full(rows, 0.1)
+    active = np.ones(rows, dtype=bool)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        r = rate[active]
+        a = amounts[active]
+        t = times[active]
+
+        # NPV and derivative via log discounting for overflow safety
+        discount = np.exp(-t * np.log1p(r)[:, None])
+        npv = (a * discount).sum(axis=1)
+        dnpv = (-t * a * discount).sum(axis=1) / (1 + r)
+
+        # NPV is decreasing in r for "contribute then redeem" flows: shrink the bracket
+        positive = npv > 0
+        lo_a = np.where(positive, r, lo[active])
+        hi_a = np.where(positive, hi[active], r)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = r - npv / dnpv
+        bisect = (lo_a + hi_a) / 2
+        step = np.where(np.isfinite(newton) & (newton > lo_a) & (newton < hi_a), newton, bisect)
+
+        done = (np.abs(step - r) < tol) | (np.abs(npv) < tol) | (hi_a - lo_a < tol)
+        lo[active], hi[active], rate[active] = lo_a, hi_a, step
+        idx = np.flatnonzero(active)
+        active[idx[done]] = False
+
+    return rate
+
+
+def _shift_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    dates (S,) + months (M,) -> (S, M) calendar dates, keeping the day of month and clamping
+    it to the target month's last day (31 Jan + 1 month = 28/29 Feb, not early March).
+    """
+    month_start = dates.astype("datetime64[M]")
+    day_offset = dates - month_start.astype("datetime64[D]")
+    target = month_start[:, None] + months[None, :]
+    month_end = (target + 1).astype("datetime64[D]") - np.timedelta64(1, "D")
+    return np.minimum(target.astype("datetime64[D]") + day_offset[:, None], month_end)
+
+
+def simulate_historical_sip(symbol: str, amount: float, years: int, step_up_percent: float = 0.0,
+                            start: Optional[str] = None, end: Optional[str] = None,
+                            data_dir: Optional[str] = None) -> dict:
+    """
+    Replays a monthly SIP (with yearly step-up, as in calculate_sip) against stored daily closes
+    for every eligible start date at once, and returns the rolling XIRR distribution.
+    """
+    prices = load_prices(symbol, data_dir)
+    dates, close = prices["dates"], prices["close"]
+    months = int(years * 12)
+    if amount <= 0 or months <= 0 or dates.size == 0:
+        return {"status": "Invalid Parameters", "start_dates": 0}
+
+    # 1. Eligible start dates: the whole horizon must fit inside the stored history
+    mask = _shift_months(dates, np.array([months]))[:, 0] <= dates[-1]
+    if start:
+        mask &= dates >= np.datetime64(start, "D")
+    if end:
+        mask &= dates <= np.datetime64(end, "D")
+    starts = dates[mask]
+    if starts.size == 0:
+        return {"status": "Insufficient History", "start_dates": 0}
+    if starts.size > MAX_START_DATES:
+        starts = starts[np.linspace(0, starts.size - 1, MAX_START_DATES).astype(np.int64)]
+
+    # 2. Contribution schedule (S x M): first trading day on/after each monthly date
+    schedule = _shift_months(starts, np.arange(months))
+    buy_idx = np.minimum(np.searchsorted(dates, schedule, side="left"), dates.size - 1)
+    exit_idx = np.minimum(
+        np.searchsorted(dates, _shift_months(starts, np.array([months]))[:, 0], side="left"), dates.size - 1)
+
+    instalment = amount * (1 + step_up_percent / 100) ** (np.arange(months) // 12)
+    units = (instalment[None, :] / close[buy_idx]).sum(axis=1)
+    invested = float(instalment.sum())
+    final_value = units * close[exit_idx]
+
+    # 3. Cash flows for XIRR: -instalments on buy days, +final value on the exit day
+    day0 = dates[buy_idx[:, :1]]
+    times = np.concatenate([
+        (dates[buy_idx] - day0).astype(np.float64),
+        (dates[exit_idx][:, None] - day0).astype(np.float64)
+    ], axis=1) / DAYS_PER_YEAR
+    flows = np.concatenate([np.broadcast_to(-instalment, (starts.size, months)), final_value[:, None]], axis=1)
+    rates = xirr(flows, times) * 100
+
+    percentiles = np.percentile(rates, [5, 25, 50, 75, 95])
+    best, worst = int(np.argmax(rates)), int(np.argmin(rates))
+    return {
+        "start_dates": int(starts.size),
+        "total_invested": int(round(invested)),
+        "xirr": {
+            "mean": round(float(rates.mean()), 2),
+            "p5": round(float(percentiles[0]), 2),
+            "p25": round(float(percentiles[1]), 2),
+            "median": round(float(percentiles[2]), 2),
+            "p75": round(float(percentiles[3]), 2),
+            "p95": round(float(percentiles[4]), 2),
+            "negative_share": round(float((rates < 0).mean() * 100), 2),
+            "best": {"start": str(starts[best]), "xirr": round(float(rates[best]), 2)},
+            "worst": {"start": str(starts[worst]), "xirr": round(float(rates[worst]), 2)},
+        },
+        # Columnar rolling-return series for the chart
+        "series": {
+            "start": [str(d) for d in starts],
+            "xirr": np.round(rates, 2).tolist(),
+            "value": np.round(final_value).astype(np.int64).tolist(),
+        },
+        "status": "Success"
+    }
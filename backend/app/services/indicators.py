@@ -0,0 +1,223 @@
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+# --- Incremental Technical-Indicator Engine ---
+# Every indicator keeps O(window) state and does O(1) work per bar:
+#   update(x) -> commits a completed bar
+#   peek(x)   -> value as if x were appended, without committing (live intraday bar)
+
+
+class SMA:
+    __slots__ = ("window", "values", "total", "_since_resync")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._since_resync = 0
+
+    def update(self, x: float):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        # Periodic exact re-sum bounds floating drift from add/subtract
+        self._since_resync += 1
+        if self._since_resync >= 1024:
+            self.total = math.fsum(self.values)
+            self._since_resync = 0
+
+    def peek(self, x: float) -> Optional[float]:
+        n = len(self.values)
+        if n + 1 < self.window:
+            return None
+        total = self.total + x - (self.values[0] if n == self.window else 0.0)
+        return total / self.window
+
+
+class EMA:
+    __slots__ = ("alpha", "period", "value", "_seed")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self._seed = SMA(period)   # Seeded with the SMA of the first `period` bars
+
+    def update(self, x: float):
+        if self.value is None:
+            seed = self._seed.peek(x)
+            self._seed.update(x)
+            self.value = seed
+        else:
+            self.value += self.alpha * (x - self.value)
+
+    def peek(self, x: float) -> Optional[float]:
+        if self.value is None:
+            return self._seed.peek(x)
+        return self.value + self.alpha * (x - self.value)
+
+
+class _WilderAverage:
+    """Simple mean for the first `period` samples, then Wilder smoothing."""
+    __slots__ = ("period", "value", "_count", "_sum")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    def _next(self, x: float):
+        if self.value is not None:
+            return (self.value * (self.period - 1) + x) / self.period, self._count, self._sum
+        count, total = self._count + 1, self._sum + x
+        return (total / self.period if count == self.period else None), count, total
+
+    def update(self, x: float):
+        self.value, self._count, self._sum = self._next(x)
+
+    def peek(self, x: float) -> Optional[float]:
+        return self._next(x)[0]
+
+
+class RSI:
+    __slots__ = ("prev", "gain", "loss")
+
+    def __init__(self, period: int = 14):
+        self.prev = None
+        self.gain = _WilderAverage(period)
+        self.loss = _WilderAverage(period)
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss) -> Optional[float]:
+        if avg_gain is None or avg_loss is None:
+            return None
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, close: float):
+        if self.prev is not None:
+            change = close - self.prev
+            self.gain.update(max(change, 0.0))
+            self.loss.update(max(-change, 0.0))
+        self.prev = close
+
+    def peek(self, close: float) -> Optional[float]:
+        if self.prev is None:
+            return None
+        change = close - self.prev
+        return self._rsi(self.gain.peek(max(change, 0.0)), self.loss.peek(max(-change, 0.0)))
+
+
+class Bollinger:
+    """Bands at `k` population standard deviations around the rolling mean."""
+    __slots__ = ("k", "mean", "squares")
+
+    def __init__(self, window: int = 20, k: float = 2.0):
+        self.k = k
+        self.mean = SMA(window)
+        self.squares = SMA(window)
+
+    def update(self, x: float):
+        self.mean.update(x)
+        self.squares.update(x * x)
+
+    def peek(self, x: float) -> Optional[tuple]:
+        mean = self.mean.peek(x)
+        if mean is None:
+            return None
+        std = math.sqrt(max(self.squares.peek(x * x) - mean * mean, 0.0))
+        return mean - self.k * std, mean + self.k * std
+
+
+class RollingMax:
+    """Monotonic deque of (bar_index, value); front is always the window maximum."""
+    __slots__ = ("window", "items", "count")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.items = deque()
+        self.count = 0
+
+    def update(self, x: float):
+        while self.items and self.items[-1][1] <= x:
+            self.items.pop()
+        self.items.append((self.count, x))
+        self.count += 1
+        if self.items[0][0] <= self.count - self.window - 1:
+            self.items.popleft()
+
+    def peek(self, x: float) -> float:
+        # Appending bar `count` expires bar `count - window`; it can only be the front
+        expiring = self.count - self.window
+        for i, value in self.items:
+            if i > expiring:
+                return max(value, x)
+        return x
+
+
+class ATR:
+    __slots__ = ("prev_close", "avg")
+
+    def __init__(self, period: int = 14):
+        self.prev_close = None
+        self.avg = _WilderAverage(period)
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def update(self, high: float, low: float, close: float):
+        self.avg.update(self._true_range(high, low))
+        self.prev_close = close
+
+    def peek(self, high: float, low: float) -> Optional[float]:
+        return self.avg.peek(self._true_range(high, low))
+
+
+class SymbolState:
+    """
+    Compact per-symbol indicator state.
+    `push` commits completed daily bars; `preview` evaluates the live bar in O(1).
+    """
+
+    def __init__(self, window: int = 20):
+        self.lock = threading.Lock()
+        self.last_ts = None
+        self.prev_close = None
+        self.sma = SMA(window)
+        self.ema = EMA(window)
+        self.rsi = RSI(14)
+        self.bands = Bollinger(window, 2.0)
+        self.high_max = RollingMax(window)
+        self.atr = ATR(14)
+        self.bars = 0
+
+    def push(self, ts, high: float, low: float, close: float):
+        self.sma.update(close)
+        self.ema.update(close)
+        self.rsi.update(close)
+        self.bands.update(close)
+        self.high_max.update(high)
+        self.atr.update(high, low, close)
+        self.prev_close = close
+        self.last_ts = ts
+        self.bars += 1
+
+    def preview(self, high: float, low: float, close: float) -> dict:
+        bands = self.bands.peek(close)
+        return {
+            "price": close,
+            "prev_close": self.prev_close,
+            "sma": self.sma.peek(close),
+            "ema": self.ema.peek(close),
+            "rsi": self.rsi.peek(close),
+            "bollinger": bands,
+            "recent_max": self.high_max.peek(high),
+            "atr": self.atr.peek(high, low),
+        }
@@ -1,70 +1,134 @@
 import yfinance as yf
-import pandas as pd
-import numpy as np
+
+from app.core.config import settings
+from app.services.indicators import SymbolState
+
+# Indices exposed to the dashboard ticker: display name -> Yahoo Finance symbol
+MARKET_INDICES = {
+    "NIFTY 50": "^NSEI",
+    "SENSEX": "^BSESN",
+    "NIFTY BANK": "^NSEBANK",
+}
+
+SMA_WINDOW = 20
+
+# Fallback payloads returned when the upstream feed fails
+FAILURE_STATUSES = ("OFFLINE", "DATA_ERROR")
+
+# Per-symbol incremental indicator state, committed through the last *completed* bar
+_STATES = {}
+
+def classify_market(price: float, prev_close: float, sma: float, recent_max: float) -> dict:
+    """
+    Signal Generation Logic shared by the live engine and the backtester.
+    """
+    daily_change_pct = ((price - prev_close) / prev_close) * 100
+    # Bullish if price stays above its 20-day average
+    is_bullish_raw = price > sma
+    # Drawdown: drop from the recent 20-day peak
+    drop_from_peak = ((recent_max - price) / recent_max) * 100
+
+    if drop_from_peak > 10:
+        status = "BEARISH / CRASH"
+        advice = "Significant drawdown detected. Historical data suggests this is a 'Buy the Dip' zone for long-term investors."
+    elif not is_bullish_raw and daily_change_pct < -1.5:
+        status = "VOLATILE"
+        advice = "Short-term trend is weak with high volatility. Stick to your existing SIP; avoid large lump sums today."
+    elif is_bullish_raw and drop_from_peak < 1.5:
+        status = "BULLISH / PEAK"
+        advice = "Market is trading near all-time highs. Maintain discipline; avoid 'FOMO' buying at these levels."
+    else:
+        status = "STABLE"
+        advice = "Market is in a healthy consolidation phase. Your current investment strategy is optimal."
+
+    return {
+        "daily_change_pct": daily_change_pct,
+        "is_bullish": is_bullish_raw,
+        "drawdown": drop_from_peak,
+        "status": status,
+        "recommendation": advice
+    }
+
+def is_market_failure(snapshot: dict) -> bool:
+    return snapshot.get("status") in FAILURE_STATUSES
+
+def snapshot_ttl(snapshot: dict) -> float:
+    """Cache TTL for a market snapshot: one tick, or a short retry window for failures."""
+    return settings.MARKET_ERROR_RETRY_SECONDS if is_market_failure(snapshot) else settings.MARKET_TICK_SECONDS
+
+def _fetch_bars(symbol: str, period: str):
+    hist = yf.Ticker(symbol).history(period=period)
+    return (
+        list(hist.index),
+        hist['High'].to_numpy(dtype=float).tolist(),
+        hist['Low'].to_numpy(dtype=float).tolist(),
+        hist['Close'].to_numpy(dtype=float).tolist()
+    )
+
+def _round(value, digits=2):
+    return round(float(value), digits) if value is not None else None
 
 def get_nifty_analysis():
+    return get_index_analysis("NIFTY 50")
+
+def get_index_analysis(index: str):
     try:
+        symbol = MARKET_INDICES[index]
+        state = _STATES.get(symbol)
+
         # 1. Data Fetching
-        # Fetching Nifty 50 (^NSEI)
-        nifty = yf.Ticker("^NSEI")
-        # 5 days of 1-minute data for price accuracy, 6 months for SMA stability
-        hist = nifty.history(period="6mo")
-        
-        if hist.empty or len(hist) < 20:
+        # First call seeds the indicator state from 6 months of history; afterwards a
+        # 5-day window is enough to pick up newly completed bars plus the live one.
+        stamps, highs, lows, closes = _fetch_bars(symbol, "6mo" if state is None else "5d")
+        if state is not None and (not stamps or stamps[0] > state.last_ts):
+            # Window no longer overlaps committed state (long idle): reseed
+            state = None
+            stamps, highs, lows, closes = _fetch_bars(symbol, "6mo")
+
+        if len(closes) < 2 or (state is None and len(closes) < SMA_WINDOW):
             return {
-                "status": "OFFLINE", 
+                "status": "OFFLINE",
                 "recommendation": "Market data feed interrupted. Check connection."
             }
 
-        # 2. Extract Price Metrics
-        # iloc[-1] is the most recent closing (or live) price
-        current_price = hist['Close'].iloc[-1]
-        prev_close = hist['Close'].iloc[-2]
-        daily_change_pct = ((current_price - prev_close) / prev_close) * 100
-        
-        # 3. Moving Average Calculation
-        # SMA20 is the industry standard for short-term trend identification
-        hist['SMA20'] = hist['Close'].rolling(window=20).mean()
-        current_sma = hist['SMA20'].iloc[-1]
-        
-        # 4. Momentum & Volatility Logic
-        # Bullish if price stays above its 20-day average
-        is_bullish_raw = current_price > current_sma
-        
-        # Calculate Drawdown (Drop from recent 20-day peak)
-        recent_max = hist['High'].tail(20).max()
-        drop_from_peak = ((recent_max - current_price) / recent_max) * 100
-
-        # 5. Signal Generation Logic
-        if drop_from_peak > 10:
-            status = "BEARISH / CRASH"
-            advice = "Significant drawdown detected. Historical data suggests this is a 'Buy the Dip' zone for long-term investors."
-        elif not is_bullish_raw and daily_change_pct < -1.5:
-            status = "VOLATILE"
-            advice = "Short-term trend is weak with high volatility. Stick to your existing SIP; avoid large lump sums today."
-        elif is_bullish_raw and drop_from_peak < 1.5:
-            status = "BULLISH / PEAK"
-            advice = "Market is trading near all-time highs. Maintain discipline; avoid 'FOMO' buying at these levels."
-        else:
-            status = "STABLE"
-            advice = "Market is in a healthy consolidation phase. Your current investment strategy is optimal."
-
-        # 6. Type-Safe Return for FastAPI Serialization
+        # 2. Incremental Indicator Update
+        # Completed bars are committed once (O(1) each); the latest/live bar is only previewed.
+        if state is None:
+            state = SymbolState(SMA_WINDOW)
+        with state.lock:
+            for ts, high, low, close in zip(stamps[:-1], highs[:-1], lows[:-1], closes[:-1]):
+                if state.last_ts is None or ts > state.last_ts:
+                    state.push(ts, high, low, close)
+            live = state.preview(highs[-1], lows[-1], closes[-1])
+        _STATES[symbol] = state
+
+        # 3. Signal Generation
+        signal = classify_market(live["price"], live["prev_close"], live["sma"], live["recent_max"])
+        bands = live["bollinger"]
+
+        # 4. Type-Safe Return for FastAPI Serialization
         # We cast everything to standard Python types (float, bool, str)
         return {
-            "index": "NIFTY 50",
-            "price": round(float(current_price), 2),
-            "change_pct": f"{round(float(daily_change_pct), 2)}%",
-            "sma_20": round(float(current_sma), 2),
-            "status": str(status),
-            "is_bullish": bool(is_bullish_raw), 
-            "drawdown": round(float(drop_from_peak), 2),
-            "recommendation": str(advice)
+            "index": index,
+            "price": round(float(live["price"]), 2),
+            "change_pct": f"{round(float(signal['daily_change_pct']), 2)}%",
+            "sma_20": round(float(live["sma"]), 2),
+            "status": str(signal["status"]),
+            "is_bullish": bool(signal["is_bullish"]),
+            "drawdown": round(float(signal["drawdown"]), 2),
+            "recommendation": str(signal["recommendation"]),
+            "indicators": {
+                "ema_20": _round(live["ema"]),
+                "rsi_14": _round(live["rsi"]),
+                "atr_14": _round(live["atr"]),
+                "bollinger_lower": _round(bands[0]) if bands else None,
+                "bollinger_upper": _round(bands[1]) if bands else None
+            }
         }
 
     except Exception as e:
         # Fallback for unexpected API or calculation errors
         return {
-            "status": "DATA_ERROR", 
+            "status": "DATA_ERROR",
             "recommendation": f"Market Intelligence Link Failed. Debug: {str(e)}"
-        }
\ No newline at end of file
+        }
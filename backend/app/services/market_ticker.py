@@ -0,0 +1,162 @@
+import json
+import time
+import asyncio
+import logging
+from typing import Optional
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.cache import shared_cache
+from app.services.market_engine import MARKET_INDICES, get_index_analysis, is_market_failure
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = 4        # Frames buffered per connection before dropping the oldest
+MAX_CONSECUTIVE_DROPS = 8  # A client this far behind is disconnected (1013 Try Again Later)
+
+
+class _Subscriber:
+    """One WebSocket connection: its index set and a bounded outbound frame queue."""
+    __slots__ = ("websocket", "queue", "indices", "dropped", "sender")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.indices = set()
+        self.dropped = 0
+        self.sender = None
+
+    def offer(self, payload: str) -> bool:
+        """Non-blocking enqueue. Drops the stalest frame when full; False = evict."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+        return self.dropped < MAX_CONSECUTIVE_DROPS
+
+
+class MarketTicker:
+    """
+    Single-producer market fan-out.
+    One task fetches each subscribed index once per interval, serializes it once,
+    and hands the same payload to every subscriber's queue. Upstream load is
+    independent of how many dashboards are connected.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers = set()
+        self._snapshots = {}   # index -> (monotonic_ts, snapshot_dict, payload_str)
+        self._producer: Optional[asyncio.Task] = None
+
+    # 1. Snapshot Cache (also serves /api/market-status)
+    def latest(self, index: str) -> Optional[dict]:
+        """Most recent snapshot if it is no older than one tick, else None."""
+        cached = self._snapshots.get(index)
+        if cached and time.monotonic() - cached[0] <= self.interval:
+            return cached[1]
+        return None
+
+    # 2. Producer Loop
+    def _ensure_producer(self):
+        if self._producer is None or self._producer.done():
+            self._producer = asyncio.create_task(self._produce())
+
+    async def _refresh(self, index: str):
+        # Each worker runs its own producer; the shared cache collapses them to one upstream fetch per tick
+        snapshot = await asyncio.to_thread(
+            shared_cache.get_or_compute, f"market:{index}",
+            lambda snap: settings.MARKET_ERROR_RETRY_SECONDS if is_market_failure(snap) else self.interval,
+            lambda: get_index_analysis(index))
+        payload = json.dumps({"type": "tick", "index": index, "data": snapshot})
+        if is_market_failure(snapshot):
+            # Still broadcast, but never serve a failure from latest() for a whole tick
+            self._snapshots.pop(index, None)
+        else:
+            self._snapshots[index] = (time.monotonic(), snapshot, payload)
+
+        for sub in list(self._subscribers):
+            if index in sub.indices and not sub.offer(payload):
+                self._evict(sub)
+
+    async def _produce(self):
+        while self._subscribers:
+            wanted = set().union(*(sub.indices for sub in self._subscribers))
+            started = time.monotonic()
+            try:
+                await asyncio.gather(*(self._refresh(index) for index in wanted))
+            except Exception as e:
+                logger.error(f"Market Ticker Refresh Failure: {str(e)}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    # 3. Per-Connection Delivery
+    async def _pump(self, sub: _Subscriber):
+        try:
+            while True:
+                payload = await sub.queue.get()
+                await sub.websocket.send_text(payload)
+                sub.dropped = 0
+        except Exception:
+            # Socket closed underneath us; serve() handles deregistration
+            pass
+
+    def _evict(self, sub: _Subscriber):
+        logger.warning("Market Ticker: evicting slow consumer.")
+        self._subscribers.discard(sub)
+        if sub.sender:
+            sub.sender.cancel()
+        asyncio.create_task(sub.websocket.close(code=1013))
+
+    def _subscribe(self, sub: _Subscriber, indices: list):
+        for index in indices:
+            sub.indices.add(index)
+            cached = self._snapshots.get(index)
+            if cached:
+                # Immediate frame so a new dashboard doesn't wait a full interval
+                sub.offer(cached[2])
+
+    async def serve(self, websocket: WebSocket):
+        """
+        Protocol (client -> server JSON):
+          {"action": "subscribe", "indices": ["NIFTY 50", "SENSEX"]}
+          {"action": "unsubscribe", "indices": ["SENSEX"]}
+        Server -> client frames: {"type": "tick", "index": ..., "data": <market-status payload>}
+        """
+        await websocket.accept()
+        sub = _Subscriber(websocket)
+        sub.sender = asyncio.create_task(self._pump(sub))
+        self._subscribers.add(sub)
+
+        try:
+            while True:
+                try:
+                    message = await websocket.receive_json()
+                    action = message.get("action")
+                    indices = message.get("indices", [])
+                    if not isinstance(indices, list):
+                        raise TypeError("indices must be a list")
+                    indices = [i for i in indices if isinstance(i, str) and i in MARKET_INDICES]
+                except (ValueError, AttributeError, TypeError):
+                    sub.offer(json.dumps({"type": "error", "detail": "Malformed message."}))
+                    continue
+
+                if action == "subscribe":
+                    self._subscribe(sub, indices)
+                    self._ensure_producer()
+                elif action == "unsubscribe":
+                    sub.indices.difference_update(indices)
+                else:
+                    sub.offer(json.dumps({"type": "error", "detail": f"Unknown action: {action}"}))
+                    continue
+
+                sub.offer(json.dumps({"type": "subscribed", "indices": sorted(sub.indices)}))
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            self._subscribers.discard(sub)
+            sub.sender.cancel()
+
+
+# Global instance shared by the WebSocket route and /api/market-status
+market_ticker = MarketTicker(interval=settings.MARKET_TICK_SECONDS)
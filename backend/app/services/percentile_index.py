@@ -0,0 +1,217 @@
+import time
+import uuid
+import logging
+import threading
+from itertools import islice
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import shared_cache
+from app.models.user import User
+from app.models.portfolio import Portfolio
+from app.services.cohort_analytics import calculate_health_scores, CHUNK_SIZE
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+MAX_SCORE = 100  # calculate_health_score is bounded to 0..100
+
+INDEX_KEY = "percentile:index"       # {"version": ..., "segments": {"role/level": [101 counts]}}
+VERSION_KEY = "percentile:version"   # Polled on every lookup; the histograms only on change
+INDEX_TTL = 7 * 86400                # Rebuilt daily by the scheduler (or lazily without it)
+UPDATE_LEASE = "percentile:update"
+UPDATE_LEASE_SECONDS = 5.0
+UPDATE_WAIT_SECONDS = 2.0
+
+
+class _ScoreTree:
+    """
+    Fenwick tree over the 101 possible integer health scores of one segment.
+    Insert/remove and "how many peers scored below X" are O(log 101).
+    """
+    __slots__ = ("tree", "total")
+
+    def __init__(self, counts=None):
+        self.tree = [0] * (MAX_SCORE + 2)
+        self.total = 0
+        if counts is not None:
+            # O(n) bulk construction from a dense histogram
+            for i, c in enumerate(counts, start=1):
+                self.tree[i] += int(c)
+                parent = i + (i & -i)
+                if parent <= MAX_SCORE + 1:
+                    self.tree[parent] += self.tree[i]
+            self.total = int(sum(counts))
+
+    def add(self, score: int, delta: int):
+        self.total += delta
+        i = score + 1
+        while i <= MAX_SCORE + 1:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_below(self, score: int) -> int:
+        """Number of members with a score strictly lower than `score`."""
+        total, i = 0, score
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class HealthScorePercentileIndex:
+    """
+    Per role/level peer ranking of health scores, shared by every worker process.
+    The published index is one score histogram per segment in the shared cache: a build
+    replaces it from a database scan, and syncs/persona changes move a single member
+    under a short cross-process lease. Each worker ranks against a local Fenwick copy that
+    is reloaded whenever the published version changes, so all workers agree.
+    A sync committed while a build is scanning may be missed until the next build.
+    """
+
+    def __init__(self, cache=shared_cache):
+        self._cache = cache
+        self._lock = threading.Lock()         # Guards _segments/_version
+        self._build_lock = threading.Lock()   # One build at a time per process
+        self._version = None
+        self._segments = {}   # "role/level" -> _ScoreTree, local copy of the published version
+
+    # 1. Bulk Build Protocol
+    def build(self, db: Session, chunk_size: int = CHUNK_SIZE):
+        with self._build_lock:
+            histograms = self._scan(db, chunk_size)
+            if self._publish(lambda segments: histograms, rebuild=True):
+                logger.info(f"Percentile index built: {sum(map(sum, histograms.values()))} users "
+                            f"across {len(histograms)} segments.")
+
+    def _scan(self, db: Session, chunk_size: int) -> dict:
+        rows = iter(
+            db.query(
+                User.role,
+                User.level,
+                func.coalesce(Portfolio.savings, 0.0),
+                func.coalesce(Portfolio.monthly_expenses, 0.0),
+                func.coalesce(Portfolio.monthly_income, 0.0)
+            )
+            .join(Portfolio, Portfolio.user_id == User.id)
+            .yield_per(chunk_size)
+        )
+
+        histograms = {}
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            roles, levels, savings, expenses, income = zip(*chunk)
+            scores = np.clip(calculate_health_scores(
+                np.asarray(savings, dtype=np.float64),
+                np.asarray(expenses, dtype=np.float64),
+                np.asarray(income, dtype=np.float64)
+            ), 0, MAX_SCORE).tolist()
+            for role, level, score in zip(roles, levels, scores):
+                histograms.setdefault(_segment_key(role, level), [0] * (MAX_SCORE + 1))[score] += 1
+        return histograms
+
+    def ensure_built(self, db: Session):
+        """Builds the shared index only if no worker has published one yet."""
+        if self._cache.get(VERSION_KEY) is not None:
+            return
+        with self._build_lock:
+            if self._cache.get(VERSION_KEY) is None:
+                histograms = self._scan(db, CHUNK_SIZE)
+                self._publish(lambda segments: histograms, rebuild=True)
+
+    # 2. Incremental Maintenance
+    def _publish(self, update, rebuild: bool = False) -> bool:
+        """Read-modify-write of the shared histograms under the update lease."""
+        deadline = time.time() + UPDATE_WAIT_SECONDS
+        while not self._cache.acquire(UPDATE_LEASE, UPDATE_LEASE_SECONDS):
+            if time.time() > deadline:
+                logger.warning("Percentile index update skipped: lease busy (next build corrects it).")
+                return False
+            time.sleep(0.01)
+        try:
+            current = self._cache.get(INDEX_KEY)
+            if current is None and not rebuild:
+                return False   # Nothing published yet: the pending build will include this change
+            segments = update({k: list(v) for k, v in current["segments"].items()} if current else {})
+            version = uuid.uuid4().hex
+            self._cache.set(INDEX_KEY, {"version": version, "segments": segments}, INDEX_TTL)
+            self._cache.set(VERSION_KEY, version, INDEX_TTL)
+            return True
+        finally:
+            self._cache.release(UPDATE_LEASE)
+
+    def _move(self, previous: Optional[tuple], current: tuple):
+        """Moves one member from (segment, score) `previous` (None: new member) to `current`."""
+        if previous == current:
+            return
+
+        def update(segments: dict) -> dict:
+            if previous is not None and previous[0] in segments:
+                counts = segments[previous[0]]
+                counts[previous[1]] = max(counts[previous[1]] - 1, 0)
+            segments.setdefault(current[0], [0] * (MAX_SCORE + 1))[current[1]] += 1
+            return segments
+
+        self._publish(update)
+
+    def record_score(self, role: str, level: str, previous_score: Optional[int], score: int):
+        """Called after /api/portfolio/sync; `previous_score` is None for a first sync."""
+        segment = _segment_key(role, level)
+        previous = (segment, _clamp(previous_score)) if previous_score is not None else None
+        self._move(previous, (segment, _clamp(score)))
+
+    def record_persona(self, previous_role: str, previous_level: str, role: str, level: str,
+                       score: Optional[int]):
+        """Moves a member to its new role/level segment; `score` is None without a portfolio."""
+        if score is not None:
+            score = _clamp(score)
+            self._move((_segment_key(previous_role, previous_level), score), (_segment_key(role, level), score))
+
+    # 3. Peer Lookup
+    def _refresh(self):
+        version = self._cache.get(VERSION_KEY)
+        if version == self._version:
+            return
+        published = self._cache.get(INDEX_KEY) if version is not None else None
+        with self._lock:
+            if published is None:
+                self._segments, self._version = {}, None
+            else:
+                self._segments = {key: _ScoreTree(counts) for key, counts in published["segments"].items()}
+                self._version = published["version"]
+
+    def rank(self, role: str, level: str, score: int) -> dict:
+        score = _clamp(score)
+        segment = _segment_key(role, level)
+        self._refresh()
+        with self._lock:
+            tree = self._segments.get(segment)
+            if tree is None or tree.total == 0:
+                return {"percentile": None, "segment": None, "peers": 0}
+            below = tree.count_below(score)
+            ties = tree.count_below(score + 1) - below
+            total = tree.total
+        # Mid-rank convention: half of the tied peers count as "below"
+        percentile = (below + 0.5 * ties) / total * 100
+        return {
+            "percentile": round(percentile, 1),
+            "segment": segment,
+            "peers": total
+        }
+
+
+def _segment_key(role: str, level: str) -> str:
+    return f"{role}/{level}"
+
+
+def _clamp(score: int) -> int:
+    return min(max(int(score), 0), MAX_SCORE)
+
+
+# Global instance shared by the analytics and sync paths
+percentile_index = HealthScorePercentileIndex()
@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.user import User
+from app.models.snapshot import PortfolioSnapshot
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("daily", "weekly", "monthly")
+MAX_POINTS = 500  # Upper bound on chart points returned per request
+
+SNAPSHOT_FIELDS = ("monthly_income", "monthly_expenses", "savings", "investments")
+
+
+def snapshot_if_changed(db: Session, portfolio, user_id: int, values: dict) -> bool:
+    """
+    Appends a PortfolioSnapshot when the incoming sync differs from the stored Portfolio.
+    Must be called *before* the Portfolio row is overwritten. Returns True if a row was added.
+    """
+    unchanged = portfolio is not None and all(
+        float(getattr(portfolio, field) or 0.0) == float(values[field]) for field in SNAPSHOT_FIELDS
+    )
+    if unchanged:
+        return False
+
+    db.add(PortfolioSnapshot(user_id=user_id, **{field: values[field] for field in SNAPSHOT_FIELDS}))
+    return True
+
+
+def _bucket_expression(dialect: str, bucket: str):
+    """Truncates the snapshot timestamp to the start of its day/week/month."""
+    ts = PortfolioSnapshot.ts
+    if dialect == "postgresql":
+        return func.date_trunc({"daily": "day", "weekly": "week", "monthly": "month"}[bucket], ts)
+    # SQLite: weeks start on Monday to match PostgreSQL's date_trunc('week')
+    if bucket == "daily":
+        return func.date(ts)
+    if bucket == "weekly":
+        return func.date(ts, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m-01", ts)
+
+
+def get_portfolio_trend(db: Session, email: str, bucket: str = "weekly", days: Optional[int] = None) -> dict:
+    """
+    Downsampled net-worth & savings-rate history for trend charts.
+    One grouped query over the (user_id, ts) covering index; raw syncs never leave the database.
+    """
+    normalized_email = email.lower().strip()
+    if bucket not in BUCKETS:
+        return {"status": "Invalid Bucket", "bucket": bucket, "points": []}
+
+    try:
+        bucket_col = _bucket_expression(db.get_bind().dialect.name, bucket).label("bucket")
+        user_id = select(User.id).where(User.email == normalized_email).scalar_subquery()
+
+        query = (
+            db.query(
+                bucket_col,
+                func.avg(PortfolioSnapshot.monthly_income),
+                func.avg(PortfolioSnapshot.monthly_expenses),
+                func.avg(PortfolioSnapshot.savings + PortfolioSnapshot.investments),
+                func.count(PortfolioSnapshot.id)
+            )
+            .filter(PortfolioSnapshot.user_id == user_id)
+        )
+        if days:
+            query = query.filter(PortfolioSnapshot.ts >= datetime.now(timezone.utc) - timedelta(days=days))
+
+        # Newest buckets first so the cap keeps the most recent window, then restore order
+        rows = query.group_by(bucket_col).order_by(bucket_col.desc()).limit(MAX_POINTS).all()
+
+        points = []
+        for period, income, expenses, net_worth, syncs in reversed(rows):
+            income = float(income or 0.0)
+            expenses = float(expenses or 0.0)
+            points.append({
+                "date": period.date().isoformat() if isinstance(period, datetime) else str(period),
+                "net_worth": round(float(net_worth or 0.0), 2),
+                "monthly_income": round(income, 2),
+                "monthly_expenses": round(expenses, 2),
+                "savings_rate": round((income - expenses) / income * 100, 1) if income > 0 else 0.0,
+                "syncs": int(syncs)
+            })
+
+        return {"bucket": bucket, "points": points, "status": "Success"}
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database Query Failure in Portfolio History: {str(db_err)}")
+        return {"status": "Database Error", "bucket": bucket, "points": []}
@@ -0,0 +1,72 @@
+import os
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+# Local daily-bar archive: one file per symbol under PRICE_DATA_DIR.
+#   <SYMBOL>.csv  -> Date,Open,High,Low,Close[,Volume] (import format)
+#   <SYMBOL>.npz  -> columnar cache written on first load; what the engines actually read
+
+
+def _path(symbol: str, ext: str, data_dir: Optional[str] = None) -> str:
+    safe = symbol.replace("^", "").replace("/", "_").upper()
+    return os.path.join(data_dir or settings.PRICE_DATA_DIR, f"{safe}.{ext}")
+
+
+def list_symbols(data_dir: Optional[str] = None) -> list:
+    root = data_dir or settings.PRICE_DATA_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted({os.path.splitext(f)[0] for f in os.listdir(root) if f.endswith((".csv", ".npz"))})
+
+
+def save_history(symbol: str, period: str = "max", data_dir: Optional[str] = None) -> int:
+    """Downloads daily bars from Yahoo Finance into the local archive. Returns the bar count."""
+    import yfinance as yf
+
+    hist = yf.Ticker(symbol).history(period=period, auto_adjust=True)
+    os.makedirs(data_dir or settings.PRICE_DATA_DIR, exist_ok=True)
+    hist[["Open", "High", "Low", "Close"]].to_csv(_path(symbol, "csv", data_dir), index_label="Date")
+    npz = _path(symbol, "npz", data_dir)
+    if os.path.exists(npz):
+        os.remove(npz)
+    return len(hist)
+
+
+def load_prices(symbol: str, data_dir: Optional[str] = None) -> dict:
+    """
+    Returns {"dates": datetime64[D], "high", "low", "close": float64} arrays, oldest first.
+    CSV imports are converted to an .npz cache once, so repeated loads are a memory copy.
+    """
+    npz = _path(symbol, "npz", data_dir)
+    csv = _path(symbol, "csv", data_dir)
+
+    if os.path.exists(npz) and (not os.path.exists(csv) or os.path.getmtime(npz) >= os.path.getmtime(csv)):
+        with np.load(npz) as archive:
+            return {key: archive[key] for key in ("dates", "high", "low", "close")}
+
+    if not os.path.exists(csv):
+        raise FileNotFoundError(f"No stored prices for {symbol} in {data_dir or settings.PRICE_DATA_DIR}")
+
+    frame = pd.read_csv(csv, usecols=["Date", "High", "Low", "Close"])
+    frame["Date"] = pd.to_datetime(frame["Date"], utc=True).dt.tz_localize(None)
+    frame = frame.dropna().sort_values("Date").drop_duplicates("Date", keep="last")
+
+    prices = {
+        "dates": frame["Date"].to_numpy().astype("datetime64[D]"),
+        "high": frame["High"].to_numpy(dtype=np.float64),
+        "low": frame["Low"].to_numpy(dtype=np.float64),
+        "close": frame["Close"].to_numpy(dtype=np.float64),
+    }
+    try:
+        np.savez(npz, **prices)
+    except OSError as e:
+        logger.warning(f"Price cache write skipped for {symbol}: {str(e)}")
+    return prices
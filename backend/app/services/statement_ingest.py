@@ -0,0 +1,317 @@
+import io
+import re
+import csv
+import logging
+import calendar
+from datetime import datetime, date
+from typing import Iterator, Optional
+
+# Initialize Authority Logger
+logger = logging.getLogger(__name__)
+
+# --- 1. CATEGORY RULEBOOK ---
+# Merchant / narration keywords (lowercase) -> category. Matching is substring-based
+# because bank narrations glue tokens together ("UPI/SWIGGY8812/..." or "NEFT-SALARY").
+CATEGORY_KEYWORDS = {
+    "income": ["salary", "sal cr", "payroll", "stipend", "interest", "int.pd", "dividend", "bonus"],
+    "investment": ["zerodha", "groww", "upstox", "mutual fund", "sip", "nps", "ppf", "bse star", "clearing corp"],
+    "transfer": ["self transfer", "own account", "to self", "sweep"],
+    "refund": ["refund", "reversal", "cashback"],
+    "rent": ["rent", "nobroker", "housing"],
+    "emi": ["emi", "loan", "bajaj fin", "home ln"],
+    "food": ["swiggy", "zomato", "dominos", "mcdonald", "restaurant", "cafe", "blinkit", "zepto", "bigbasket"],
+    "shopping": ["amazon", "flipkart", "myntra", "ajio", "nykaa", "meesho"],
+    "transport": ["uber", "ola", "rapido", "irctc", "metro", "fastag", "petrol", "fuel", "indigo", "makemytrip"],
+    "utilities": ["electricity", "bescom", "tata power", "airtel", "jio", "vodafone", "broadband", "gas", "water bill"],
+    "health": ["pharmacy", "apollo", "hospital", "medplus", "1mg", "practo", "insurance", "lic"],
+    "entertainment": ["netflix", "spotify", "hotstar", "prime video", "bookmyshow", "youtube"],
+    "cash": ["atm", "cash wdl", "nwd"],
+}
+
+# Credits in these categories are money coming back, not earnings; debits in these
+# are money moved into the user's own assets, not spending.
+NON_INCOME = {"refund", "transfer", "investment"}
+NON_EXPENSE = {"transfer", "investment"}
+UNCATEGORIZED = "other"
+
+# Narrations usually lead with the merchant ("UPI/AMAZON REFUND/..."), so these
+# categories override any other keyword found in the same narration
+PRIORITY_CATEGORIES = ("refund", "transfer")
+
+
+class KeywordMatcher:
+    """
+    Compiles every keyword into ONE prefix-factored regular expression (a trie rendered as
+    regex), so each narration is scanned once by the C regex engine instead of looping
+    over rules. A keyword from a priority category wins wherever it appears; otherwise
+    the leftmost match wins, and among keywords starting at the same position the
+    longest wins.
+    """
+
+    def __init__(self, rules: dict, priority: tuple = ()):
+        self._priority = {category: rank for rank, category in enumerate(priority)}
+        self._category = {}
+        trie = {}
+        for category, keywords in rules.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                self._category.setdefault(keyword, category)
+                node = trie
+                for ch in keyword:
+                    node = node.setdefault(ch, {})
+                node[""] = True
+        # Letter boundaries stop "rent" matching inside "current" while still allowing
+        # digits/punctuation glued to merchant names ("SWIGGY8812", "UPI/ZOMATO")
+        self._pattern = re.compile(r"(?<![a-z])" + self._render(trie) + r"(?![a-z])")
+
+    @classmethod
+    def _render(cls, node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + cls._render(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Branches are tried before the empty alternative, so longer keywords win
+        return f"(?:{body})?" if terminal else body
+
+    def categorize(self, text: str) -> str:
+        chosen = None
+        for keyword in self._pattern.findall(text.lower()):
+            category = self._category[keyword]
+            if category in self._priority:
+                if chosen is None or self._priority.get(chosen, len(self._priority)) > self._priority[category]:
+                    chosen = category
+            elif chosen is None:
+                chosen = category
+        return chosen or UNCATEGORIZED
+
+
+default_matcher = KeywordMatcher(CATEGORY_KEYWORDS, priority=PRIORITY_CATEGORIES)
+
+
+# --- 2. STREAMING PARSERS ---
+# Each parser yields (date, description, signed_amount) one row at a time; credits positive.
+
+_DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d-%m-%y", "%Y-%m-%d", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y", "%d.%m.%Y")
+
+_HEADER_ALIASES = {
+    "date": ("txn date", "transaction date", "value date", "date", "posting date"),
+    "description": ("narration", "description", "particulars", "remarks", "details", "transaction details"),
+    "debit": ("withdrawal amt", "withdrawal", "debit", "dr amount", "debit amount"),
+    "credit": ("deposit amt", "deposit", "credit", "cr amount", "credit amount"),
+    "amount": ("amount", "transaction amount"),
+}
+
+
+def _amount(raw: str) -> float:
+    raw = (raw or "").replace(",", "").replace("₹", "").strip()
+    if not raw:
+        return 0.0
+    if raw.lower().endswith(("cr", "dr")):
+        sign = -1.0 if raw.lower().endswith("dr") else 1.0
+        return sign * float(raw[:-2].strip())
+    return float(raw)
+
+
+class _DateParser:
+    """
+    Locks onto the first format that parses, and memoizes raw strings: a statement
+    has hundreds of rows per distinct day, and strptime dominates the parse cost.
+    """
+    _MAX_CACHE = 20000
+
+    def __init__(self):
+        self.fmt = None
+        self.cache = {}
+
+    def __call__(self, raw: str) -> Optional[date]:
+        parsed = self.cache.get(raw)
+        if parsed is None:
+            parsed = self._parse(raw.strip())
+            if len(self.cache) >= self._MAX_CACHE:
+                self.cache.clear()
+            self.cache[raw] = parsed
+        return parsed
+
+    def _parse(self, raw: str) -> Optional[date]:
+        if self.fmt:
+            try:
+                return datetime.strptime(raw, self.fmt).date()
+            except ValueError:
+                pass
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(raw, fmt).date()
+                self.fmt = fmt
+                return parsed
+            except ValueError:
+                continue
+        return None
+
+
+def _map_header(row: list) -> Optional[dict]:
+    normalized = [cell.strip().lower().rstrip(".") for cell in row]
+    columns = {}
+    for field, aliases in _HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[field] = normalized.index(alias)
+                break
+    has_amount = "amount" in columns or "debit" in columns or "credit" in columns
+    return columns if "date" in columns and "description" in columns and has_amount else None
+
+
+def parse_csv(stream: io.TextIOBase) -> Iterator[tuple]:
+    """Bank CSV exports: skips preamble lines until a recognizable header row."""
+    reader = csv.reader(stream)
+    columns = None
+    parse_date = _DateParser()
+
+    for row in reader:
+        if columns is None:
+            columns = _map_header(row)
+            continue
+        try:
+            txn_date = parse_date(row[columns["date"]])
+            if txn_date is None:
+                continue  # Footer / summary lines
+            if "amount" in columns:
+                amount = _amount(row[columns["amount"]])
+            else:
+                amount = (_amount(row[columns["credit"]]) if "credit" in columns else 0.0) - \
+                         (_amount(row[columns["debit"]]) if "debit" in columns else 0.0)
+            yield txn_date, row[columns["description"]], amount
+        except (IndexError, ValueError):
+            continue
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def parse_ofx(stream: io.TextIOBase, chunk_size: int = 65536) -> Iterator[tuple]:
+    """
+    OFX 1.x (SGML, unclosed leaf tags) and 2.x (XML). Tokenizes fixed-size chunks so a
+    statement written on a single line still streams in constant memory.
+    """
+    buffer = ""
+    current = None
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Only tokenize up to the last complete tag; keep the tail for the next chunk
+        cut = len(buffer) if not chunk else max(buffer.rfind("<"), 0)
+        for closing, tag, value in _OFX_TAG.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    posted = current.get("DTPOSTED", "")[:8]
+                    try:
+                        yield (
+                            datetime.strptime(posted, "%Y%m%d").date(),
+                            current.get("NAME", "") + " " + current.get("MEMO", ""),
+                            float(current.get("TRNAMT", "0").replace(",", ""))
+                        )
+                    except ValueError:
+                        pass
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+
+# --- 3. AGGREGATION ---
+
+def summarize_statement(rows: Iterator[tuple], matcher: KeywordMatcher = default_matcher) -> dict:
+    """
+    Folds a transaction stream into per-month income/expense totals and category spend.
+    State is O(months x categories), independent of the number of rows.
+    """
+    months = {}
+    categories = {}
+    processed = 0
+    uncategorized = 0
+    first = last = None
+
+    for txn_date, description, amount in rows:
+        processed += 1
+        if first is None or txn_date < first:
+            first = txn_date
+        if last is None or txn_date > last:
+            last = txn_date
+        category = matcher.categorize(description)
+        if category == UNCATEGORIZED:
+            uncategorized += 1
+
+        month = months.setdefault((txn_date.year, txn_date.month), [0.0, 0.0])
+        if amount > 0 and category not in NON_INCOME:
+            month[0] += amount
+        elif amount < 0 and category not in NON_EXPENSE:
+            month[1] -= amount
+            categories[category] = categories.get(category, 0.0) - amount
+
+    ordered = sorted(months)
+    return {
+        "rows": processed,
+        "uncategorized_rows": uncategorized,
+        "period": {"from": first.isoformat(), "to": last.isoformat()} if processed else None,
+        "months": [
+            {"month": f"{y}-{m:02d}", "income": round(months[(y, m)][0], 2), "expenses": round(months[(y, m)][1], 2)}
+            for y, m in ordered
+        ],
+        "expense_categories": {k: round(v, 2) for k, v in sorted(categories.items(), key=lambda kv: -kv[1])},
+    }
+
+
+# A boundary month counts as complete when the statement reaches this close to its edge
+# (the first/last transactions rarely fall exactly on the 1st or the month end)
+MONTH_EDGE_SLACK_DAYS = 3
+
+
+def complete_months(summary: dict) -> list:
+    """Drops a leading/trailing month the statement only partially covers."""
+    months = summary["months"]
+    if not months or not summary.get("period"):
+        return []
+    start = date.fromisoformat(summary["period"]["from"])
+    end = date.fromisoformat(summary["period"]["to"])
+    if start.day > 1 + MONTH_EDGE_SLACK_DAYS:
+        months = [m for m in months if m["month"] != f"{start.year}-{start.month:02d}"]
+    if end.day < calendar.monthrange(end.year, end.month)[1] - MONTH_EDGE_SLACK_DAYS:
+        months = [m for m in months if m["month"] != f"{end.year}-{end.month:02d}"]
+    return months
+
+
+def monthly_averages(summary: dict, recent_months: int = 3) -> Optional[dict]:
+    """
+    Average income/expenses over the most recent complete months.
+    None when the statement doesn't cover a single full month.
+    """
+    months = complete_months(summary)[-recent_months:]
+    if not months:
+        return None
+    return {
+        "monthly_income": round(sum(m["income"] for m in months) / len(months), 2),
+        "monthly_expenses": round(sum(m["expenses"] for m in months) / len(months), 2),
+        "months": [m["month"] for m in months],
+    }
+
+
+def ingest_statement(binary_stream, filename: str = "") -> dict:
+    """Detects CSV vs OFX and streams the upload through the matcher and aggregator."""
+    text = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", errors="replace", newline="")
+    is_ofx = filename.lower().endswith((".ofx", ".qfx"))
+    if not is_ofx and not filename.lower().endswith(".csv"):
+        head = text.read(512)
+        is_ofx = "OFXHEADER" in head.upper() or "<OFX>" in head.upper()
+        text.seek(0)
+
+    try:
+        summary = summarize_statement(parse_ofx(text) if is_ofx else parse_csv(text))
+    finally:
+        text.detach()  # Leave the caller's upload stream open
+    summary["format"] = "OFX" if is_ofx else "CSV"
+    return summary
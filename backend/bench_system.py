@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.finance_math import calculate_sip, calculate_runway
+from app.services.analytics import calculate_health_score, project_net_worth, summarize_goals
+from app.services.cohort_analytics import calculate_health_scores, project_net_worths
+
+# Committed with the repo so `--check` works from a clean checkout. Timings are machine
+# specific: re-record with --save-baseline (and commit it) when the CI runner type changes.
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.25  # Fail when a kernel gets >25% slower than its baseline
+
+HORIZONS = [1, 5, 10, 20, 30, 50]
+STEP_UPS = [0.0, 10.0]
+GOAL_COUNTS = [1, 10, 100, 1000]
+
+
+# --- 1. FROZEN REFERENCE KERNELS ---
+# Verbatim copies of the current hot paths. Any optimized implementation must
+# reproduce these outputs exactly before its timings are trusted.
+
+def _reference_sip(amount, rate, years, step_up_percent=0.0, inflation_rate=6.0):
+    if amount <= 0 or years <= 0:
+        return {
+            "total_invested": 0, "estimated_returns": 0, "total_value": 0,
+            "post_tax_value": 0, "estimated_tax": 0, "inflation_adjusted_value": 0,
+            "chart_data": [{"year": 0, "invested": 0, "value": 0, "real_value": 0}]
+        }
+    monthly_rate = rate / 12 / 100
+    months = int(years * 12)
+    total_invested = 0.0
+    current_value = 0.0
+    investment_details = [{"year": 0, "invested": 0, "value": 0, "real_value": 0}]
+    current_monthly = float(amount)
+    for month in range(1, months + 1):
+        if month > 1 and month % 12 == 1:
+            current_monthly += (current_monthly * step_up_percent / 100)
+        total_invested += current_monthly
+        current_value = (current_value + current_monthly) * (1 + monthly_rate)
+        if month % 12 == 0:
+            elapsed_years = month // 12
+            inflation_factor = (1 + (inflation_rate / 100)) ** elapsed_years
+            real_value = current_value / inflation_factor
+            investment_details.append({
+                "year": elapsed_years,
+                "invested": int(round(total_invested)),
+                "value": int(round(current_value)),
+                "real_value": int(round(real_value))
+            })
+    total_gains = current_value - total_invested
+    estimated_tax = max(0.0, total_gains - 125000.0) * 0.125
+    post_tax_value = current_value - estimated_tax
+    return {
+        "total_invested": int(round(total_invested)),
+        "estimated_returns": int(round(total_gains)),
+        "total_value": int(round(current_value)),
+        "post_tax_value": int(round(post_tax_value)),
+        "estimated_tax": int(round(estimated_tax)),
+        "inflation_adjusted_value": int(round(investment_details[-1]["real_value"])) if investment_details else 0,
+        "chart_data": investment_details
+    }
+
+def _reference_runway(savings, monthly_expenses):
+    if monthly_expenses <= 0:
+        return 999.0
+    return round(float(savings) / float(monthly_expenses), 1)
+
+def _reference_health_score(savings, expenses, income):
+    if income <= 0:
+        return 0
+    surplus = income - expenses
+    savings_rate = (surplus / income) * 100
+    rate_score = min(max(savings_rate * 2, 0), 40.0)
+    if expenses <= 0:
+        runway_score = 40.0
+    else:
+        runway_score = min(((savings / expenses) / 6.0) * 40.0, 40.0)
+    expense_ratio = (expenses / income)
+    if expense_ratio <= 0.5:
+        ratio_score = 20.0
+    elif expense_ratio <= 0.8:
+        ratio_score = 10.0
+    else:
+        ratio_score = 0.0
+    return int(rate_score + runway_score + ratio_score)
+
+def _reference_projection(net_worth, monthly_surplus):
+    investable_surplus = max(monthly_surplus, 0.0)
+    chart_data = []
+    projected_value = net_worth
+    for year in range(1, 11):
+        projected_value = (projected_value + investable_surplus * 12) * 1.12
+        chart_data.append({"year": f"Y{year}", "value": round(projected_value)})
+    return chart_data, projected_value
+
+def _reference_goals(goals):
+    total_target = sum(float(g.target_amount or 0.0) for g in goals)
+    total_current = sum(float(g.current_amount or 0.0) for g in goals)
+    pct = (total_current / total_target * 100) if total_target > 0 else 0.0
+    return total_target, total_current, pct
+
+
+# --- 2. INPUT GRIDS ---
+
+def _make_goals(count):
+    return [
+        SimpleNamespace(target_amount=100000.0 + i * 2500, current_amount=(i * 7919) % 90000 or None)
+        for i in range(count)
+    ]
+
+def _sip_cases():
+    cases = [(0, 12.0, 10, 0.0), (5000, 12.0, 0, 0.0), (5000, 0.0, 10, 10.0)]
+    for years in HORIZONS:
+        for step_up in STEP_UPS:
+            cases.append((5000, 12.0, years, step_up))
+            cases.append((123456.78, 7.3, years, step_up))
+    return cases
+
+def _profile_cases():
+    # (savings, expenses, income) edges: no income, no expenses, overspend, 6m+ runway
+    cases = [(0, 0, 0), (50000, 0, 40000), (10000, 60000, 40000), (600000, 20000, 100000)]
+    for income in (15000, 45000, 120000, 500000):
+        for expense_ratio in (0.0, 0.3, 0.5, 0.65, 0.8, 0.95, 1.2):
+            for runway in (0, 1.5, 3, 6, 24):
+                expenses = income * expense_ratio
+                cases.append((expenses * runway, expenses, income))
+    return cases
+
+
+# --- 3. EQUIVALENCE AUDIT ---
+
+def check_equivalence() -> list:
+    """Compares every kernel against its frozen reference across the input grids."""
+    failures = []
+
+    for amount, rate, years, step_up in _sip_cases():
+        if calculate_sip(amount, rate, years, step_up_percent=step_up) != _reference_sip(amount, rate, years, step_up):
+            failures.append(f"calculate_sip{(amount, rate, years, step_up)}")
+
+    for savings, expenses, income in _profile_cases():
+        if calculate_health_score(savings, expenses, income) != _reference_health_score(savings, expenses, income):
+            failures.append(f"calculate_health_score{(savings, expenses, income)}")
+        if calculate_runway(savings, expenses) != _reference_runway(savings, expenses):
+            failures.append(f"calculate_runway{(savings, expenses)}")
+        net_worth, surplus = savings * 1.5, income - expenses
+        if project_net_worth(net_worth, surplus) != _reference_projection(net_worth, surplus):
+            failures.append(f"project_net_worth{(net_worth, surplus)}")
+
+    # Vectorized cohort kernels must agree row-for-row with the scalar references
+    savings, expenses, income = (np.asarray(col, dtype=np.float64) for col in zip(*_profile_cases()))
+    expected_scores = [_reference_health_score(s, e, i) for s, e, i in zip(savings, expenses, income)]
+    if calculate_health_scores(savings, expenses, income).tolist() != expected_scores:
+        failures.append("calculate_health_scores(profile grid)")
+    expected_projection = [_reference_projection(s * 1.5, i - e)[1] for s, e, i in zip(savings, expenses, income)]
+    if project_net_worths(savings * 1.5, income - expenses).tolist() != expected_projection:
+        failures.append("project_net_worths(profile grid)")
+
+    for count in [0] + GOAL_COUNTS:
+        goals = _make_goals(count)
+        if summarize_goals(goals) != _reference_goals(goals):
+            failures.append(f"summarize_goals(n={count})")
+
+    return failures
+
+
+# --- 4. TIMING HARNESS ---
+
+def _time_call(fn, repeat=5) -> float:
+    """Best-of-N seconds per call, auto-scaling the loop count like `python -m timeit`."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def run_benchmarks() -> dict:
+    results = {}
+    for years in HORIZONS:
+        for step_up in STEP_UPS:
+            results[f"calculate_sip/y{years}/step{int(step_up)}"] = _time_call(
+                lambda: calculate_sip(5000, 12.0, years, step_up_percent=step_up))
+
+    profiles = _profile_cases()
+    results["calculate_health_score/grid"] = _time_call(
+        lambda: [calculate_health_score(s, e, i) for s, e, i in profiles])
+    results["calculate_runway/grid"] = _time_call(
+        lambda: [calculate_runway(s, e) for s, e, _ in profiles])
+    results["project_net_worth/grid"] = _time_call(
+        lambda: [project_net_worth(s * 1.5, i - e) for s, e, i in profiles])
+
+    for count in GOAL_COUNTS:
+        goals = _make_goals(count)
+        results[f"summarize_goals/n{count}"] = _time_call(lambda: summarize_goals(goals))
+
+    rng = np.random.default_rng(7)
+    income = rng.uniform(0, 300000, 1_000_000)
+    expenses = income * rng.uniform(0.2, 1.2, income.size)
+    savings = expenses * rng.uniform(0, 12, income.size)
+    results["calculate_health_scores/1M"] = _time_call(lambda: calculate_health_scores(savings, expenses, income), repeat=3)
+    results["project_net_worths/1M"] = _time_call(lambda: project_net_worths(savings, income - expenses), repeat=3)
+
+    return results
+
+
+# --- 5. BASELINE PROTOCOL ---
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = seconds / reference
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {seconds * 1e6:.1f}µs vs baseline {reference * 1e6:.1f}µs ({ratio:.2f}x)")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Finance math & analytics kernel benchmarks.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Path to the baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Record current timings as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown ratio before failing (0.25 = 25%%).")
+    parser.add_argument("--check", action="store_true",
+                        help="Regression gate (CI): a missing baseline is an error instead of a warning.")
+    args = parser.parse_args(argv)
+
+    if args.check and not os.path.exists(args.baseline):
+        print(f"❌ [BASELINE]: --check needs a baseline at {args.baseline}. Record one with --save-baseline.")
+        return 2
+
+    print("🚀 Initializing Kernel Benchmark Audit...")
+    print("-" * 50)
+
+    failures = check_equivalence()
+    if failures:
+        print(f"❌ [EQUIVALENCE]: {len(failures)} mismatches against reference output.")
+        for failure in failures[:20]:
+            print(f"   - {failure}")
+        return 1
+    print("✅ [EQUIVALENCE]: All kernels match the reference output exactly.")
+
+    results = run_benchmarks()
+    for name, seconds in results.items():
+        print(f"   {name:<40} {seconds * 1e6:>12.2f} µs")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+        print(f"✅ [BASELINE]: Saved {len(results)} timings to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ [BASELINE]: No baseline found; timings not compared. Run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ [REGRESSION]: {len(regressions)} kernels slower than {int(args.threshold * 100)}% budget.")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+
+    print("-" * 50)
+    print("🏁 Benchmark Audit Complete. No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import os
+import multiprocessing
+
+# --- Multi-Worker Server Profile ---
+# gunicorn -c gunicorn.conf.py main:app
+# Each worker is a full uvicorn event loop; the app is imported once in the master
+# (preload) and forked, so schema sync and module-level setup run a single time.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2, 8)))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+timeout = 120            # LLM calls can take tens of seconds
+graceful_timeout = 30
+keepalive = 5
+max_requests = 2000      # Recycle workers periodically to bound memory growth
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+# Workers share cached market snapshots, dashboard payloads and LLM answers
+# through the SQLite cache file unless the environment picks another backend
+os.environ.setdefault("CACHE_BACKEND", "sqlite")
+
+
+def post_fork(server, worker):
+    # Connections opened by the master during preload must not be shared across
+    # processes: drop the inherited pool without closing the parent's sockets
+    from app.core.database import engine, replica_engines
+    for db_engine in (engine, *replica_engines):
+        db_engine.dispose(close=False)
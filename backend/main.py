@@ -1,18 +1,29 @@
 import os
+import hmac
+import asyncio
+import logging
 import httpx
-import secrets
-from datetime import date
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Query, Body
+from jose import JWTError
+from fastapi import FastAPI, Depends, HTTPException, Query, Body, Request, Header, WebSocket, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, FileResponse
+from fastapi.responses import RedirectResponse, FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Union
 
 # Core & Database Infrastructure
-from app.core.database import engine, Base, get_db, verify_db_connection
+from app.core.config import settings
+from app.core.database import engine, Base, get_db, get_read_db, session_scope, pin_to_primary, verify_db_connection
+from app.core.query_metrics import start_request_stats, query_budget, pool_usage, QueryBudgetExceeded
+from app.core.cache import shared_cache
+from app.core.scheduler import scheduler
+from app.core.oauth import exchange_code, verify_id_token, close_http_client
+from app.core.profiling import install_profiling
 from app.core.security import (
     get_password_hash, 
     verify_password, 
@@ -24,23 +35,51 @@ from app.models.user import User
 from app.models.portfolio import Portfolio
 from app.models.history import ChatHistory
 from app.models.goal import Goal
+from app.models.snapshot import PortfolioSnapshot  # noqa: F401 -- registers the table for create_all
+from app.models.transaction import Transaction
 
 # Intelligent Engine Services
-from app.services.ai_service import get_ai_finance_advice 
-from app.services.analytics import get_comprehensive_stats
-from app.services.finance_math import calculate_sip
-from app.services.market_engine import get_nifty_analysis 
+from app.services.ai_service import load_advisor_context, generate_advice, advisor_unavailable
+from app.services.analytics import get_cached_stats, invalidate_stats, calculate_health_score
+from app.services.cohort_analytics import get_cached_cohort_report, refresh_cohort_report
+from app.services.percentile_index import percentile_index
+from app.services.finance_math import calculate_sip, rows_to_columns
+from app.services.historical_sip import simulate_historical_sip
+from app.services.capital_gains import get_capital_gains
+from app.services.statement_ingest import ingest_statement, monthly_averages
+from app.services.portfolio_history import snapshot_if_changed, get_portfolio_trend
+from app.services.chat_search import ensure_search_index, search_chat_history
+from app.services.data_export import EXPORT_DATASETS, EXPORT_MEDIA_TYPES, stream_export
+from app.services.market_engine import get_nifty_analysis, snapshot_ttl, MARKET_INDICES
+from app.services.market_ticker import market_ticker
+from app.services.background_jobs import mark_analytics_stale  # Also registers the scheduled jobs
 
 # --- SYSTEM INITIALIZATION ---
 load_dotenv()
+logger = logging.getLogger("main")
 
 # Global Schema Sync - Ensures all tables are mapped in PostgreSQL
 Base.metadata.create_all(bind=engine)
+# Full-text index over chat history (tsvector + GIN on PostgreSQL, FTS5 on SQLite)
+ensure_search_index(engine)
+
+# --- LIFESPAN PROTOCOL ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Verify Database Connectivity on Boot, then run background jobs until shutdown."""
+    verify_db_connection()
+    # Peer percentile index builds as an exclusive startup job (lazily on first lookup when
+    # the scheduler is off); lookups return null until ready
+    await scheduler.start()
+    yield
+    await scheduler.stop()
+    await close_http_client()
 
 app = FastAPI(
     title="FinancePro AI - Authority Engine",
     version="4.0.0",
-    description="Quantum Finance Intelligence Layer"
+    description="Quantum Finance Intelligence Layer",
+    lifespan=lifespan
 )
 
 # Security: CORS Policy optimized to prevent "Backend connection failed" errors
@@ -58,11 +97,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- STARTUP PROTOCOL ---
-@app.on_event("startup")
-async def startup_event():
-    """Verify Database Connectivity on Boot"""
-    verify_db_connection()
+# --- QUERY BUDGET INSTRUMENTATION ---
+@app.middleware("http")
+async def query_instrumentation(request: Request, call_next):
+    """Counts SQL statements per request and checks them against the route's @query_budget."""
+    stats = start_request_stats(request.scope)
+    response = await call_next(request)
+    budget = stats.budget
+
+    if stats.over_budget:
+        logger.warning(f"Query budget exceeded on {request.url.path}: {stats.count}/{budget} statements")
+        # A committed write is reported as it happened; its overrun still shows in the logs
+        # and X-DB-* headers. Writes over budget *before* commit already failed in the session.
+        if settings.ENFORCE_QUERY_BUDGETS and not stats.committed:
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": f"Query budget exceeded: {stats.count} statements (budget {budget})"}
+            )
+
+    if settings.DEBUG:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = str(stats.db_time_ms)
+        response.headers["X-DB-Conn-Hold-Ms"] = str(stats.conn_hold_ms)
+        if budget is not None:
+            response.headers["X-DB-Query-Budget"] = str(budget)
+    return response
+
+@app.exception_handler(QueryBudgetExceeded)
+async def query_budget_exceeded(request: Request, exc: QueryBudgetExceeded):
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
+
+# --- OPERATOR ACCESS ---
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Gate for operator endpoints. They don't exist (404) unless ADMIN_TOKEN is configured."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required.")
 
 
 # --- VALIDATION SCHEMAS ---
@@ -94,6 +166,17 @@ class PersonaUpdate(BaseModel):
     role: str
     level: str
 
+class TransactionEntry(BaseModel):
+    instrument: str
+    side: str = Field(pattern="^(BUY|SELL)$")
+    trade_date: date
+    quantity: float = Field(gt=0)
+    price: float = Field(ge=0)
+
+class LedgerImport(BaseModel):
+    email: str
+    transactions: List[TransactionEntry]
+
 class ForgotPasswordRequest(BaseModel):
     email: str
 
@@ -102,6 +185,91 @@ class ResetPasswordRequest(BaseModel):
     new_password: str
 
 
+# --- RESPONSE SCHEMAS ---
+# Typed responses are serialized straight to JSON bytes by pydantic-core,
+# skipping jsonable_encoder's per-object reflection.
+CHART_LAYOUT = Query("rows", pattern="^(rows|columnar)$",
+                     description="'columnar' returns chart series as parallel arrays instead of one object per point")
+
+EXPORT_FORMAT = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+EXPORT_DATASET = Query("all", pattern=f"^(all|{'|'.join(EXPORT_DATASETS)})$",
+                       description="CSV exports one dataset per file; NDJSON tags each line with its dataset")
+
+class GoalOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    user_email: str
+    title: str
+    category: Optional[str] = None
+    target_amount: float
+    current_amount: Optional[float] = None
+    deadline: Optional[date] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class SIPChartPoint(BaseModel):
+    year: int
+    invested: int
+    value: int
+    real_value: int
+
+class SIPChartColumns(BaseModel):
+    year: List[int]
+    invested: List[int]
+    value: List[int]
+    real_value: List[int]
+
+class SIPProjection(BaseModel):
+    total_invested: int
+    estimated_returns: int
+    total_value: int
+    post_tax_value: int
+    estimated_tax: int
+    inflation_adjusted_value: int
+    chart_data: Union[SIPChartColumns, List[SIPChartPoint]]
+
+# Fallback payloads (no portfolio, errors) carry only some keys: every field is optional
+# and the route sets response_model_exclude_unset so absent keys stay absent.
+class DashboardSummary(BaseModel):
+    net_worth: Optional[float] = None
+    monthly_surplus: Optional[float] = None
+    health_score: Optional[int] = None
+    emergency_fund_months: Optional[float] = None
+
+class PeerBenchmark(BaseModel):
+    percentile: Optional[float] = None
+    segment: Optional[str] = None
+    peers: int = 0
+
+class GoalProgress(BaseModel):
+    count: Optional[int] = None
+    completion_percentage: Optional[float] = None
+    shortfall: Optional[float] = None
+
+class NetWorthPoint(BaseModel):
+    year: str
+    value: int
+
+class NetWorthColumns(BaseModel):
+    year: List[str] = []
+    value: List[int] = []
+
+class NetWorthProjection(BaseModel):
+    ten_year_total: Optional[float] = None
+    chart_data: Union[NetWorthColumns, List[NetWorthPoint]] = []
+
+class ComprehensiveStats(BaseModel):
+    summary: Optional[DashboardSummary] = None
+    benchmark: Optional[PeerBenchmark] = None
+    goals: Optional[GoalProgress] = None
+    projections: Optional[NetWorthProjection] = None
+    insights: Optional[str] = None
+    status: str
+
+
 # --- 1. AUTHORITY IDENTITY PROTOCOLS ---
 
 @app.get("/api/health")
@@ -110,6 +278,7 @@ def engine_health():
     return {"status": "Operational", "engine": "FastAPI + PostgreSQL Architecture"}
 
 @app.post("/api/register")
+@query_budget(2)
 def create_account(user: UserAuth, db: Session = Depends(get_db)):
     """Initialize New Authority Node"""
     email_normalized = user.email.lower().strip()
@@ -135,12 +304,14 @@ def create_account(user: UserAuth, db: Session = Depends(get_db)):
     }
 
 @app.post("/api/login")
+@query_budget(1)
 def authorize_session(user: UserAuth, db: Session = Depends(get_db)):
     """Session Handshake and JWT Generation"""
     email_normalized = user.email.lower().strip()
     db_user = db.query(User).filter(User.email == email_normalized).first()
     
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    # OAuth-only accounts have no password hash and can only sign in through Google
+    if not db_user or not db_user.hashed_password or not verify_password(user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid Credentials")
     
     return {
@@ -151,6 +322,7 @@ def authorize_session(user: UserAuth, db: Session = Depends(get_db)):
     }
 
 @app.post("/api/user/update-persona")
+@query_budget(3)
 def update_user_persona(data: PersonaUpdate, db: Session = Depends(get_db)):
     """Permanent Identity Calibration in PostgreSQL"""
     user = db.query(User).filter(User.email == data.email.lower().strip()).first()
@@ -158,14 +330,21 @@ def update_user_persona(data: PersonaUpdate, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="Identity node not found.")
     
+    portfolio = db.query(Portfolio).filter(Portfolio.user_id == user.id).first()
+    score = portfolio_health_score(portfolio) if portfolio else None
+    previous_role, previous_level, email = user.role, user.level, user.email
     user.role = data.role
     user.level = data.level
     
     db.commit()
-    db.refresh(user)
-    return {"status": "Identity Calibrated", "role": user.role, "level": user.level}
+    percentile_index.record_persona(previous_role, previous_level, data.role, data.level, score)
+    # Pin first: a dashboard read landing between the two would re-cache replica data
+    pin_to_primary(email)
+    invalidate_stats(email)
+    return {"status": "Identity Calibrated", "role": data.role, "level": data.level}
 
 @app.post("/api/reset-password")
+@query_budget(2)
 def reset_password(req: ResetPasswordRequest, db: Session = Depends(get_db)):
     """Finalizes the new security phrase."""
     email_normalized = req.email.lower().strip()
@@ -200,60 +379,64 @@ async def google_login_entry():
     )
     return RedirectResponse(url=google_url)
 
-@app.get("/api/auth/google/callback")
-async def google_callback(code: str, db: Session = Depends(get_db)):
-    async with httpx.AsyncClient() as client:
-        # Step 1: Exchange code for access token
-        token_res = await client.post("https://oauth2.googleapis.com/token", data={
-            "code": code, 
-            "client_id": GOOGLE_CLIENT_ID,
-            "client_secret": GOOGLE_CLIENT_SECRET, 
-            "redirect_uri": GOOGLE_REDIRECT_URI,
-            "grant_type": "authorization_code",
-        })
-        token_data = token_res.json()
-        
-        if "access_token" not in token_data:
-            raise HTTPException(status_code=400, detail=f"Google Token Error: {token_data}")
-            
-        access_token = token_data.get("access_token")
-        
-        # Step 2: Get user info using the access token
-        user_res = await client.get("https://www.googleapis.com/oauth2/v1/userinfo", 
-                                    headers={"Authorization": f"Bearer {access_token}"})
-        user_info = user_res.json()
-        
-        raw_email = user_info.get("email")
-        if not raw_email:
-             raise HTTPException(status_code=400, detail=f"Google UserInfo Error: {user_info}")
-        
-        email = raw_email.lower().strip()
+def _google_sign_in(email: str) -> tuple:
+    """Finds or creates the Google identity in its own short session; returns (role, level)."""
+    with session_scope() as db:
         db_user = db.query(User).filter(User.email == email).first()
-        
-        if not db_user:
-            # Generate safe 32-byte password to bypass Bcrypt 72-byte limit
-            safe_generated_password = secrets.token_urlsafe(32)
-            db_user = User(
-                email=email, 
-                hashed_password=get_password_hash(safe_generated_password),
-                role="professional", 
-                level="intermediate", 
-                is_verified=True
-            )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
+        if db_user:
+            return db_user.role, db_user.level
+
+        # OAuth-only identity: no password at all (hashed_password is nullable), so no
+        # bcrypt work on sign-up. /api/reset-password can still add one later.
+        role, level = "professional", "intermediate"
+        db.add(User(
+            email=email,
+            hashed_password=None,
+            role=role,
+            level=level,
+            is_verified=True
+        ))
+        db.commit()
+        return role, level
 
-        internal_token = create_access_token({"sub": email})
-        
-        # Redirect to frontend with auth details
-        return RedirectResponse(
-            url=f"/?auth_token={internal_token}&email={email}&role={db_user.role}&level={db_user.level}"
-        )
+@app.get("/api/auth/google/callback")
+@query_budget(2)
+async def google_callback(code: str):
+    # Step 1: Exchange code for tokens over the shared keep-alive client
+    try:
+        token_data = await exchange_code(code, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Google Token Exchange Failure: {str(e)}")
+
+    if "id_token" not in token_data:
+        raise HTTPException(status_code=400, detail=f"Google Token Error: {token_data}")
+
+    # Step 2: Verify the id_token locally against Google's cached signing keys
+    # (replaces the userinfo round trip)
+    try:
+        claims = await verify_id_token(token_data["id_token"], GOOGLE_CLIENT_ID, token_data.get("access_token"))
+    except (JWTError, httpx.HTTPError) as e:
+        raise HTTPException(status_code=401, detail=f"Google Identity Verification Failure: {str(e)}")
+
+    raw_email = claims.get("email")
+    if not raw_email or not claims.get("email_verified", False):
+        raise HTTPException(status_code=400, detail="Google account has no verified email.")
+
+    # Step 3: Blocking lookup/sign-up off the event loop, as /api/ai/chat does
+    email = raw_email.lower().strip()
+    role, level = await asyncio.to_thread(_google_sign_in, email)
+
+    internal_token = create_access_token({"sub": email})
+
+    # Redirect to frontend with auth details
+    return RedirectResponse(
+        url=f"/?auth_token={internal_token}&email={email}&role={role}&level={level}"
+    )
 
 # --- 2. GOAL ARCHITECTURE ---
 
 @app.post("/api/goals")
+@query_budget(3)
 def establish_goal(goal_data: GoalCreate, db: Session = Depends(get_db)):
     email_normalized = goal_data.user_email.lower().strip()
     user = db.query(User).filter(User.email == email_normalized).first()
@@ -273,13 +456,16 @@ def establish_goal(goal_data: GoalCreate, db: Session = Depends(get_db)):
         db.add(new_goal)
         db.commit()
         db.refresh(new_goal)
+        pin_to_primary(email_normalized)
+        invalidate_stats(email_normalized)
         return {"status": "Objective Established", "id": new_goal.id}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database Handshake Failure: {str(e)}")
 
-@app.get("/api/goals")
-def list_objectives(email: str, db: Session = Depends(get_db)):
+@app.get("/api/goals", response_model=List[GoalOut])
+@query_budget(1)
+def list_objectives(email: str, db: Session = Depends(get_read_db)):
     return db.query(Goal).filter(Goal.user_email == email.lower().strip()).all()
 
 
@@ -287,31 +473,111 @@ def list_objectives(email: str, db: Session = Depends(get_db)):
 
 @app.get("/api/market-status")
 def market_intel():
-    return get_nifty_analysis()
+    # Reuse the ticker's last broadcast when it is fresh; otherwise go through the
+    # shared cache so N workers make one upstream fetch per tick, not N
+    return market_ticker.latest("NIFTY 50") or shared_cache.get_or_compute(
+        "market:NIFTY 50", snapshot_ttl, get_nifty_analysis)
+
+@app.websocket("/ws/market")
+async def market_stream(websocket: WebSocket):
+    """Live index ticker: subscribe once, receive a frame per tick."""
+    await market_ticker.serve(websocket)
+
+def _load_chat_context(email: str) -> dict:
+    with session_scope() as db:
+        return load_advisor_context(db, email)
+
+def _persist_chat(context: dict, query: str, advice: str):
+    with session_scope() as db:
+        db.add(ChatHistory(
+            user_id=context["user_id"],
+            user_email=context["email"],
+            query=query,
+            response=advice
+        ))
+        db.commit()
 
 @app.post("/api/ai/chat")
-async def intelligence_protocol(request: ChatRequest, db: Session = Depends(get_db)):
-    advice = await get_ai_finance_advice(db, request.email, request.query)
-    user = db.query(User).filter(User.email == request.email.lower()).first()
-    new_chat = ChatHistory(
-        user_id=user.id if user else None,
-        user_email=request.email.lower(), 
-        query=request.query, 
-        response=advice
-    )
-    db.add(new_chat)
-    db.commit()
+@query_budget(4)
+async def intelligence_protocol(request: ChatRequest):
+    """
+    Three phases so no pooled connection is held across the multi-second LLM call:
+    load context (short session) -> await the model (no session) -> persist (short session).
+    """
+    try:
+        context = await asyncio.to_thread(_load_chat_context, request.email)
+    except Exception as e:
+        return {"response": advisor_unavailable(e)}
+
+    advice = await generate_advice(context["system_context"], request.query)
+    await asyncio.to_thread(_persist_chat, context, request.query, advice)
     return {"response": advice}
 
+@app.get("/api/ai/history/search")
+@query_budget(1)
+def search_advisor_history(
+    email: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Ranked full-text search over the user's advisor conversations, with <mark> highlights."""
+    return search_chat_history(db, email, q, page=page, page_size=page_size)
+
+@app.get("/api/diagnostics/pool")
+def pool_diagnostics():
+    """Connection-pool occupancy per route (DEBUG only)."""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"pool": engine.pool.status(), "routes": pool_usage.snapshot()}
+
+@app.get("/api/diagnostics/jobs")
+def job_diagnostics():
+    """Background job schedule and timing metrics (DEBUG only)."""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return scheduler.metrics()
+
+@app.post("/api/diagnostics/jobs/{name}/run", dependencies=[Depends(require_admin)])
+def trigger_job(name: str):
+    """Runs a background job now instead of at its next slot (operators only)."""
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if not scheduler.trigger(name):
+        raise HTTPException(status_code=503, detail="Scheduler is not running (SCHEDULER_ENABLED=false).")
+    return {"status": "Triggered", "job": name}
+
 # --- MISSING ENDPOINT RESTORED: COMPREHENSIVE STATS ---
-@app.get("/api/analytics/comprehensive")
-def dashboard_intelligence(email: str, db: Session = Depends(get_db)):
-    return get_comprehensive_stats(db, email.lower().strip())
+@app.get("/api/analytics/comprehensive", response_model=ComprehensiveStats, response_model_exclude_unset=True)
+@query_budget(2)
+def dashboard_intelligence(email: str, layout: str = CHART_LAYOUT, db: Session = Depends(get_read_db)):
+    stats = get_cached_stats(db, email.lower().strip())
+    if layout == "columnar" and "projections" in stats:
+        # Copy, never mutate: the payload may be the in-process cache entry itself
+        stats = {**stats, "projections": {
+            **stats["projections"], "chart_data": rows_to_columns(stats["projections"]["chart_data"])}}
+    return stats
+
+
+@app.get("/api/analytics/cohort", dependencies=[Depends(require_admin)])
+@query_budget(1)
+def cohort_intelligence(db: Session = Depends(get_read_db)):
+    """Advisor view: population-wide health-score, runway and projection aggregates (operators only)."""
+    report = get_cached_cohort_report()
+    if report is not None:
+        return report
+    # Cold cache: the full scan belongs to the background job, not this request
+    if scheduler.trigger("precompute_cohort_report"):
+        return JSONResponse(status_code=503, headers={"Retry-After": "30"},
+                            content={"status": "Warming", "detail": "Cohort report is being computed."})
+    return refresh_cohort_report(db)   # Scheduler disabled: compute inline
 
 
 # --- 4. PORTFOLIO SYNC & PROJECTIONS ---
 
 @app.post("/api/portfolio/sync")
+@query_budget(4)
 def sync_financial_data(data: PortfolioUpdate, db: Session = Depends(get_db)):
     email_normalized = data.email.lower().strip()
     user = db.query(User).filter(User.email == email_normalized).first()
@@ -319,21 +585,187 @@ def sync_financial_data(data: PortfolioUpdate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Authority identity not found.")
         
     portfolio = db.query(Portfolio).filter(Portfolio.user_id == user.id).first()
+    apply_portfolio_update(db, user, portfolio, data.income, data.expenses, data.savings, data.investments)
+    return {"status": "Quantum Sync Complete"}
+
+def portfolio_health_score(portfolio: Portfolio) -> int:
+    return calculate_health_score(float(portfolio.savings or 0.0), float(portfolio.monthly_expenses or 0.0),
+                                  float(portfolio.monthly_income or 0.0))
+
+def apply_portfolio_update(db: Session, user: User, portfolio: Optional[Portfolio],
+                           income: float, expenses: float, savings: float, investments: float):
+    """Shared write path for manual syncs and statement imports: snapshot, upsert, re-rank."""
+    previous_score = portfolio_health_score(portfolio) if portfolio else None
+    # Time-series history: append a snapshot only when the figures actually changed
+    snapshot_if_changed(db, portfolio, user.id, {
+        "monthly_income": income,
+        "monthly_expenses": expenses,
+        "savings": savings,
+        "investments": investments
+    })
     if not portfolio:
-        portfolio = Portfolio(user_id=user.id, owner_email=email_normalized)
+        portfolio = Portfolio(user_id=user.id, owner_email=user.email)
         db.add(portfolio)
     
-    portfolio.monthly_income = data.income
-    portfolio.monthly_expenses = data.expenses
-    portfolio.savings = data.savings
-    portfolio.investments = data.investments
+    portfolio.monthly_income = income
+    portfolio.monthly_expenses = expenses
+    portfolio.savings = savings
+    portfolio.investments = investments
+    # Captured before commit: expired attributes would cost a refresh query
+    role, level, email = user.role, user.level, user.email
     db.commit()
-    return {"status": "Quantum Sync Complete"}
+    # Re-rank before the dashboard is invalidated and re-warmed, so the warm-up sees the new rank
+    percentile_index.record_score(role, level, previous_score, calculate_health_score(savings, expenses, income))
+    pin_to_primary(email)
+    invalidate_stats(email)
+    mark_analytics_stale(email)
+
+@app.post("/api/statements/import")
+@query_budget(4)
+def import_bank_statement(
+    email: str = Form(...),
+    statement: UploadFile = File(...),
+    apply: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Streams a CSV/OFX bank statement and categorizes every row. Returns a preview of the
+    monthly income/expenses averaged over the recent complete months; only apply=true
+    writes them to the portfolio.
+    """
+    user = db.query(User).filter(User.email == email.lower().strip()).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Authority identity not found.")
+
+    summary = ingest_statement(statement.file, statement.filename or "")
+    if summary["rows"] == 0:
+        raise HTTPException(status_code=400, detail="No transactions recognized in statement.")
+
+    proposed = monthly_averages(summary)
+    summary["proposed"] = proposed
+    summary["applied"] = None
+    if apply:
+        if proposed is None:
+            raise HTTPException(status_code=400, detail="Statement does not cover a complete month; nothing applied.")
+        portfolio = db.query(Portfolio).filter(Portfolio.user_id == user.id).first()
+        apply_portfolio_update(
+            db, user, portfolio, proposed["monthly_income"], proposed["monthly_expenses"],
+            float(portfolio.savings or 0.0) if portfolio else 0.0,
+            float(portfolio.investments or 0.0) if portfolio else 0.0
+        )
+        summary["applied"] = proposed
+    return summary
+
+@app.get("/api/portfolio/history")
+@query_budget(1)
+def portfolio_trend(
+    email: str,
+    bucket: str = Query("weekly", pattern="^(daily|weekly|monthly)$"),
+    days: Optional[int] = Query(None, gt=0),
+    db: Session = Depends(get_read_db)
+):
+    """Downsampled net-worth / savings-rate trend built from sync snapshots."""
+    return get_portfolio_trend(db, email, bucket=bucket, days=days)
+
+# --- 4.5 TRANSACTION LEDGER & CAPITAL GAINS ---
+
+@app.post("/api/transactions")
+@query_budget(2)
+def import_transactions(ledger: LedgerImport, db: Session = Depends(get_db)):
+    """Appends buy/sell rows to the user's ledger in one batched INSERT."""
+    user = db.query(User).filter(User.email == ledger.email.lower().strip()).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Identity node not found.")
+    if not ledger.transactions:
+        return {"status": "Ledger Unchanged", "imported": 0}
+
+    db.execute(insert(Transaction), [
+        {"user_id": user.id, **entry.model_dump()} for entry in ledger.transactions
+    ])
+    db.commit()
+    pin_to_primary(ledger.email.lower().strip())
+    return {"status": "Ledger Updated", "imported": len(ledger.transactions)}
+
+@app.get("/api/tax/capital-gains")
+@query_budget(3)
+def capital_gains_report(email: str, db: Session = Depends(get_read_db)):
+    """FIFO STCG/LTCG breakdown per financial year, cached per ledger version."""
+    user = db.query(User).filter(User.email == email.lower().strip()).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Identity node not found.")
+    return get_capital_gains(db, user.id)
+
+# --- 4.7 DATA EXPORT ---
+
+def _export_response(request: Request, fmt: str, dataset: str, compress: bool,
+                     email: Optional[str], filename: str) -> StreamingResponse:
+    if fmt == "csv" and dataset == "all":
+        raise HTTPException(status_code=400, detail="CSV exports one dataset at a time; pass dataset=.")
+    datasets = list(EXPORT_DATASETS) if dataset == "all" else [dataset]
+    gzip = compress and "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}_{dataset}_{date.today().isoformat()}.{fmt}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    # Sync generator: Starlette drains it in the threadpool, one chunk (one short session) at a time
+    return StreamingResponse(stream_export(fmt, datasets, email=email, compress=gzip),
+                             media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+
+@app.get("/api/export")
+@query_budget(1)
+def export_user_data(
+    request: Request,
+    email: str,
+    fmt: str = EXPORT_FORMAT,
+    dataset: str = EXPORT_DATASET,
+    compress: bool = True
+):
+    """Streams the user's portfolio, goals and chat history as NDJSON or CSV (gzip when accepted)."""
+    email_normalized = email.lower().strip()
+    # Own short session: a Depends(get_db) session would stay checked out until the stream ends
+    with session_scope() as db:
+        if db.query(User.id).filter(User.email == email_normalized).first() is None:
+            raise HTTPException(status_code=404, detail="Authority identity not found.")
+    return _export_response(request, fmt, dataset, compress, email_normalized, "financepro")
+
+@app.get("/api/admin/export", dependencies=[Depends(require_admin)])
+def export_tenant_data(
+    request: Request,
+    fmt: str = EXPORT_FORMAT,
+    dataset: str = EXPORT_DATASET,
+    compress: bool = True
+):
+    """Full-tenant export for operators (X-Admin-Token)."""
+    return _export_response(request, fmt, dataset, compress, None, "financepro_tenant")
+
 
 # --- MISSING ENDPOINT RESTORED: SIP CALCULATOR ---
-@app.get("/api/calculate-sip")
-def sip_projection(amount: float, rate: float, years: int, step_up: float = 0):
-    return calculate_sip(amount, rate, years, step_up_percent=step_up)
+@app.get("/api/calculate-sip", response_model=SIPProjection)
+def sip_projection(amount: float, rate: float, years: int, step_up: float = 0, layout: str = CHART_LAYOUT):
+    return calculate_sip(amount, rate, years, step_up_percent=step_up, columnar=layout == "columnar")
+
+@app.get("/api/calculate-sip/historical")
+def historical_sip_projection(
+    amount: float,
+    years: int,
+    index: str = "NIFTY 50",
+    step_up: float = 0,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """Actual rolling SIP outcomes (XIRR distribution) over stored index history."""
+    symbol = MARKET_INDICES.get(index, index)
+    try:
+        return simulate_historical_sip(
+            symbol, amount, years, step_up_percent=step_up,
+            start=start.isoformat() if start else None,
+            end=end.isoformat() if end else None
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No stored price history for {index}.")
 
 
 # --- 5. UNIFIED FRONTEND SERVING ---
@@ -350,4 +782,9 @@ async def serve_frontend(full_path: str):
     if os.path.exists(index_path):
         return FileResponse(index_path)
     
-    return {"error": "Frontend UI is building or static files are missing."}
\ No newline at end of file
+    return {"error": "Frontend UI is building or static files are missing."}
+
+
+# --- 6. ON-DEMAND PROFILING ---
+# Registered last: wraps every route above. No-op unless PROFILING_ENABLED.
+install_profiling(app)
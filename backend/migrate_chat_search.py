@@ -0,0 +1,83 @@
+import argparse
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+DEFAULT_BATCH_ROWS = 5000
+
+
+# --- 1. ONE-OFF POSTGRESQL MIGRATION ---
+# Adds the chat_history full-text index without rewriting or long-locking the table:
+#   * a plain nullable tsvector column (catalog-only ALTER, no table rewrite),
+#   * a row trigger that keeps it current for new and edited messages,
+#   * a batched backfill, each batch in its own short transaction,
+#   * the GIN index built CONCURRENTLY (readers and writers keep going).
+# Every step is idempotent, so an interrupted run can simply be repeated.
+
+_VECTOR_EXPR = (
+    "setweight(to_tsvector('english', coalesce({row}.query, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}.response, '')), 'B')"
+)
+
+_SCHEMA_DDL = (
+    "SET lock_timeout = '5s'",
+    "ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE OR REPLACE FUNCTION chat_history_search_vector() RETURNS trigger AS $$ BEGIN "
+    f"NEW.search_vector := {_VECTOR_EXPR.format(row='NEW')}; RETURN NEW; END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS chat_history_search_vector_trg ON chat_history",
+    "CREATE TRIGGER chat_history_search_vector_trg BEFORE INSERT OR UPDATE OF query, response "
+    "ON chat_history FOR EACH ROW EXECUTE FUNCTION chat_history_search_vector()",
+)
+
+_BACKFILL_BATCH = (
+    f"UPDATE chat_history c SET search_vector = {_VECTOR_EXPR.format(row='c')} "
+    "WHERE c.id IN (SELECT id FROM chat_history WHERE search_vector IS NULL ORDER BY id LIMIT :batch)"
+)
+
+_INDEX_DDL = "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_history_search ON chat_history USING GIN (search_vector)"
+
+
+def migrate(batch_rows: int = DEFAULT_BATCH_ROWS, pause: float = 0.0) -> int:
+    """Runs every step; returns the number of backfilled rows."""
+    if engine.dialect.name != "postgresql":
+        print(f"Nothing to do on {engine.dialect.name}: the FTS5 index is created at startup.")
+        return 0
+
+    with engine.begin() as conn:
+        for statement in _SCHEMA_DDL:
+            conn.execute(text(statement))
+    print("Column and trigger in place.")
+
+    backfilled = 0
+    while True:
+        with engine.begin() as conn:
+            updated = conn.execute(text(_BACKFILL_BATCH), {"batch": batch_rows}).rowcount
+        backfilled += updated
+        if updated < batch_rows:
+            break
+        print(f"Backfilled {backfilled} rows...")
+        if pause:
+            time.sleep(pause)   # Lets replication and autovacuum keep up on large tables
+    print(f"Backfill complete: {backfilled} rows.")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(_INDEX_DDL))
+    print("GIN index ix_chat_history_search ready. Restart workers to enable chat search.")
+    return backfilled
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="One-off migration: full-text index on chat_history (PostgreSQL).")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Rows updated per backfill transaction.")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between backfill batches.")
+    args = parser.parse_args(argv)
+    migrate(args.batch_rows, args.pause)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
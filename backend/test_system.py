@@ -3,6 +3,19 @@ import sys
 
 BASE_URL = "http://127.0.0.1:8000"
 TEST_EMAIL = "abhijitsahoo2024@gift.edu.in"
+BUDGET_BREACHES = []
+
+def audit_query_budget(label, res):
+    """Checks X-DB-* headers (emitted when the server runs with DEBUG=true) against the route budget."""
+    count = res.headers.get("X-DB-Query-Count")
+    budget = res.headers.get("X-DB-Query-Budget")
+    if count is None or budget is None:
+        return
+    if int(count) > int(budget):
+        BUDGET_BREACHES.append(label)
+        print(f"❌ [QUERY BUDGET]: {label} ran {count} queries (budget {budget}, {res.headers.get('X-DB-Time-Ms')} ms)")
+    else:
+        print(f"✅ [QUERY BUDGET]: {label} {count}/{budget} queries in {res.headers.get('X-DB-Time-Ms')} ms")
 
 def run_tests():
     print(f"🚀 Initializing Authority Engine Audit...")
@@ -34,6 +47,7 @@ def run_tests():
             "query": "Hello, explain my current financial status.",
             "email": TEST_EMAIL
         })
+        audit_query_budget("/api/ai/chat", res)
         data = res.json()
         if "response" in data:
             print(f"✅ [AI ADVISOR]: Connected. Response received ({len(data['response'])} chars)")
@@ -48,6 +62,7 @@ def run_tests():
     # 4. Analytics & Database Link
     try:
         res = requests.get(f"{BASE_URL}/api/analytics/comprehensive?email={TEST_EMAIL}")
+        audit_query_budget("/api/analytics/comprehensive", res)
         if res.status_code == 200:
             print(f"✅ [ANALYTICS]: Database Link Active. Health Score: {res.json()['summary']['health_score']}")
         else:
@@ -55,8 +70,17 @@ def run_tests():
     except Exception as e:
         print(f"❌ [ANALYTICS]: Query failed. {e}")
 
+    # 5. Goal Listing Query Budget
+    try:
+        res = requests.get(f"{BASE_URL}/api/goals", params={"email": TEST_EMAIL})
+        audit_query_budget("/api/goals", res)
+    except Exception as e:
+        print(f"❌ [GOALS]: Query failed. {e}")
+
     print("-" * 50)
     print("🏁 Audit Complete.")
+    if BUDGET_BREACHES:
+        sys.exit(1)
 
 if __name__ == "__main__":
     run_tests()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import os
+import uuid
+import tempfile
+
+import pytest
+
+# Configure the app for an isolated SQLite database before anything imports settings
+_DB_DIR = tempfile.mkdtemp(prefix="financepro-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["PROFILING_ENABLED"] = "false"
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user_email(client):
+    """A freshly registered user (unique per test)."""
+    email = f"user-{uuid.uuid4().hex[:10]}@example.com"
+    assert client.post("/api/register", json={"email": email, "password": "s3cret-pass"}).status_code == 200
+    return email
@@ -0,0 +1,24 @@
+def test_comprehensive_stats_schema(client, user_email):
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 90000, "expenses": 40000,
+                                             "savings": 300000, "investments": 50000})
+    stats = client.get("/api/analytics/comprehensive", params={"email": user_email}).json()
+
+    assert set(stats) == {"summary", "benchmark", "goals", "projections", "insights", "status"}
+    assert stats["summary"]["net_worth"] == 350000
+    chart = stats["projections"]["chart_data"]
+    assert len(chart) == 10 and set(chart[0]) == {"year", "value"} and chart[0]["year"] == "Y1"
+
+    columnar = client.get("/api/analytics/comprehensive", params={"email": user_email, "layout": "columnar"}).json()
+    assert columnar["projections"]["chart_data"]["year"][:2] == ["Y1", "Y2"]
+    assert columnar["summary"] == stats["summary"]
+
+
+def test_comprehensive_fallback_keeps_its_shape(client):
+    stats = client.get("/api/analytics/comprehensive", params={"email": "nobody@example.com"}).json()
+    assert stats["status"] == "No Authority Record Found"
+    assert "benchmark" not in stats and "insights" not in stats   # Unset keys are not filled with nulls
+    assert stats["projections"] == {"chart_data": [], "ten_year_total": 0}
+
+    columnar = client.get("/api/analytics/comprehensive",
+                          params={"email": "nobody@example.com", "layout": "columnar"}).json()
+    assert columnar["projections"]["chart_data"] == {}
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.backtester import SIGNAL_NAMES, TRADING_DAYS_PER_MONTH, WINDOW, evaluate_signals, sip_vs_lump
+from app.services.indicators import SymbolState
+from app.services.market_engine import classify_market
+
+
+def _synthetic_prices(bars: int = 400) -> tuple:
+    """Random walk with a rally, a crash and a choppy stretch, so every signal shows up."""
+    rng = np.random.default_rng(11)
+    returns = rng.normal(0.0005, 0.012, bars)
+    returns[100:130] += 0.006    # Rally to fresh highs (BULLISH / PEAK)
+    returns[200:215] -= 0.012    # Crash (BEARISH / CRASH)
+    returns[300:330:3] -= 0.025  # Sharp down days below the average (VOLATILE)
+    close = 10000 * np.exp(np.cumsum(returns))
+    high = close * (1 + rng.uniform(0, 0.01, bars))
+    return high, close
+
+
+def test_vectorized_signals_match_the_live_classifier():
+    high, close = _synthetic_prices()
+    signals = evaluate_signals(high, close)
+    assert (signals[:WINDOW - 1] == -1).all()
+
+    # Replay the live path: the incremental indicator state feeding classify_market bar by bar
+    state = SymbolState(WINDOW)
+    live = []
+    for t in range(close.size):
+        preview = state.preview(high[t], high[t], close[t])
+        if t >= WINDOW - 1:
+            live.append(classify_market(close[t], preview["prev_close"], preview["sma"], preview["recent_max"])["status"])
+        state.push(t, high[t], high[t], close[t])
+
+    assert [SIGNAL_NAMES[code] for code in signals[WINDOW - 1:]] == live
+    assert set(live) == set(SIGNAL_NAMES.values())
+
+
+def test_sip_vs_lump_known_answer():
+    # Price doubles every month: lump sum over two months returns 300%; two monthly
+    # instalments buy 1 + 1/2 units per 2 invested and exit at 4x -> 200%
+    close = 2.0 ** (np.arange(120) / TRADING_DAYS_PER_MONTH)
+    lump, sip = sip_vs_lump(close, horizon=2 * TRADING_DAYS_PER_MONTH, sip_months=2)
+    assert lump.size == sip.size == 120 - 2 * TRADING_DAYS_PER_MONTH
+    assert lump == pytest.approx(np.full(lump.size, 3.0))
+    assert sip == pytest.approx(np.full(sip.size, 2.0))
+
+
+def test_sip_instalments_stop_before_the_exit_bar():
+    close = 2.0 ** (np.arange(60) / TRADING_DAYS_PER_MONTH)
+    # A one-month horizon leaves room for a single instalment: SIP degenerates to lump sum
+    lump, sip = sip_vs_lump(close, horizon=TRADING_DAYS_PER_MONTH, sip_months=12)
+    assert sip == pytest.approx(lump)
+    assert [a.size for a in sip_vs_lump(close, horizon=60, sip_months=12)] == [0, 0]
@@ -0,0 +1,15 @@
+import bench_system
+
+
+def test_kernels_match_frozen_references():
+    assert bench_system.check_equivalence() == []
+
+
+def test_check_mode_fails_without_baseline(tmp_path):
+    assert bench_system.main(["--check", "--baseline", str(tmp_path / "missing.json")]) == 2
+
+
+def test_regressions_are_reported():
+    assert bench_system.compare_to_baseline({"k": 2.0, "new": 1.0}, {"k": 1.0}, 0.25) == [
+        "k: 2000000.0µs vs baseline 1000000.0µs (2.00x)"
+    ]
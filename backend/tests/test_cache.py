@@ -0,0 +1,50 @@
+import threading
+import time
+
+from app.core.cache import MemoryCache, SQLiteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=3)
+    for key in "abc":
+        cache.set(key, key.upper(), 60)
+    assert cache.get("a") == "A"          # "a" is now most recently used
+    cache.set("d", "D", 60)
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["A", "C", "D"]
+
+
+def test_memory_cache_sweeps_expired_entries_and_leases():
+    cache = MemoryCache()
+    cache.set("stale", 1, -1)
+    assert cache.acquire("lease", -1)
+    for i in range(MemoryCache.SWEEP_EVERY):
+        cache.set(f"k{i}", i, 60)
+    assert "stale" not in cache._data
+    assert "lease" not in cache._leases
+
+
+def test_memory_cache_single_flight_releases_inflight_lock():
+    cache = MemoryCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 42
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=("key", 60, compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache._inflight == {}
+
+
+def test_ttl_may_depend_on_the_value(tmp_path):
+    for cache in (MemoryCache(), SQLiteCache(str(tmp_path / "cache.sqlite3"))):
+        cache.get_or_compute("bad", lambda value: -1 if value["status"] == "ERROR" else 60, lambda: {"status": "ERROR"})
+        assert cache.get("bad") is None
+        cache.get_or_compute("good", lambda value: -1 if value["status"] == "ERROR" else 60, lambda: {"status": "OK"})
+        assert cache.get("good") == {"status": "OK"}
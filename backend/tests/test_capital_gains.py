@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from app.services.capital_gains import compute_capital_gains, tax_rates, ltcg_exemption, is_long_term
+
+
+def _year(report, fy):
+    return next(y for y in report["years"] if y["financial_year"] == fy)
+
+
+@pytest.mark.parametrize("sell_date, rates", [
+    (date(2024, 7, 22), (0.15, 0.10)),
+    (date(2024, 7, 23), (0.20, 0.125)),
+    (date(2019, 1, 1), (0.15, 0.10)),
+    (date(2017, 6, 1), (0.15, 0.0)),
+])
+def test_rates_follow_the_sell_date(sell_date, rates):
+    assert tax_rates(sell_date) == rates
+
+
+def test_exemption_follows_the_financial_year():
+    assert ltcg_exemption(2023) == 100000.0
+    assert ltcg_exemption(2024) == 125000.0
+
+
+def test_older_years_use_the_rates_in_force():
+    report = compute_capital_gains([
+        ("INFY", "BUY", date(2021, 5, 3), 100, 1000.0),
+        ("INFY", "SELL", date(2023, 6, 1), 100, 4000.0),      # LTCG 300,000 in FY2023-24
+        ("TCS", "BUY", date(2023, 1, 2), 10, 3000.0),
+        ("TCS", "SELL", date(2023, 6, 1), 10, 4000.0),        # STCG 10,000 in FY2023-24
+    ])
+    fy = _year(report, "FY2023-24")
+    assert fy["ltcg_exemption_used"] == 100000.0
+    assert fy["estimated_tax"] == pytest.approx(200000 * 0.10 + 10000 * 0.15)
+
+
+def test_year_straddling_the_rate_change_applies_exemption_to_higher_rate_first():
+    report = compute_capital_gains([
+        ("A", "BUY", date(2022, 1, 3), 1, 0.0),
+        ("A", "SELL", date(2024, 6, 3), 1, 100000.0),         # LTCG at 10%
+        ("B", "BUY", date(2022, 1, 3), 1, 0.0),
+        ("B", "SELL", date(2024, 9, 2), 1, 100000.0),         # LTCG at 12.5%
+    ])
+    fy = _year(report, "FY2024-25")
+    assert fy["ltcg"] == 200000.0
+    assert fy["ltcg_exemption_used"] == 125000.0
+    # 125,000 exemption wipes the 12.5% gain and 25,000 of the 10% gain
+    assert fy["estimated_tax"] == pytest.approx(75000 * 0.10)
+
+
+@pytest.mark.parametrize("buy, sell, long_term", [
+    (date(2023, 3, 1), date(2024, 3, 1), False),    # 366 days across Feb 29, exactly 12 months
+    (date(2023, 3, 1), date(2024, 3, 2), True),
+    (date(2024, 2, 29), date(2025, 2, 28), False),  # Anniversary clamps to Feb 28
+    (date(2024, 2, 29), date(2025, 3, 1), True),
+    (date(2023, 12, 15), date(2024, 12, 16), True),
+])
+def test_holding_period_uses_calendar_months(buy, sell, long_term):
+    assert is_long_term(buy, sell) is long_term
+
+
+def test_fifo_consumes_oldest_lots_first_and_splits_partial_lots():
+    report = compute_capital_gains([
+        ("RELIANCE", "BUY", date(2022, 4, 4), 10, 100.0),
+        ("RELIANCE", "BUY", date(2024, 1, 1), 10, 200.0),
+        ("RELIANCE", "SELL", date(2024, 6, 3), 15, 300.0),   # 10 long-term @100, 5 short-term @200
+    ])
+    fy = _year(report, "FY2024-25")
+    assert (fy["ltcg"], fy["stcg"]) == (2000.0, 500.0)
+    assert report["realized_lots"] == 2
+    assert report["open_holdings"] == [{"instrument": "RELIANCE", "quantity": 5, "average_cost": 200.0}]
+
+
+def test_unmatched_sells_are_reported():
+    report = compute_capital_gains([
+        ("X", "BUY", date(2024, 5, 1), 1, 10.0),
+        ("X", "SELL", date(2024, 5, 2), 3, 12.0),
+    ])
+    assert report["unmatched_sells"] == {"X": 2}
+
+
+def test_short_term_losses_offset_stcg_then_ltcg_and_long_term_losses_only_ltcg():
+    report = compute_capital_gains([
+        ("ST_GAIN", "BUY", date(2024, 8, 1), 1, 0.0),
+        ("ST_GAIN", "SELL", date(2024, 9, 2), 1, 50000.0),
+        ("ST_LOSS", "BUY", date(2024, 8, 1), 1, 130000.0),
+        ("ST_LOSS", "SELL", date(2024, 9, 2), 1, 0.0),        # -130,000 short term
+        ("LT_GAIN", "BUY", date(2020, 8, 3), 1, 0.0),
+        ("LT_GAIN", "SELL", date(2024, 9, 2), 1, 400000.0),
+        ("LT_LOSS", "BUY", date(2020, 8, 3), 1, 100000.0),
+        ("LT_LOSS", "SELL", date(2024, 9, 2), 1, 0.0),        # -100,000 long term
+    ])
+    fy = _year(report, "FY2024-25")
+    assert fy["taxable_stcg"] == 0.0
+    # 400,000 - 80,000 (leftover ST loss) - 100,000 (LT loss) - 125,000 exemption
+    assert fy["taxable_ltcg"] == 95000.0
+    assert fy["estimated_tax"] == pytest.approx(95000 * 0.125)
+
+
+def test_long_term_losses_do_not_reduce_stcg():
+    report = compute_capital_gains([
+        ("S", "BUY", date(2024, 8, 1), 1, 0.0),
+        ("S", "SELL", date(2024, 9, 2), 1, 10000.0),
+        ("L", "BUY", date(2020, 8, 3), 1, 50000.0),
+        ("L", "SELL", date(2024, 9, 2), 1, 0.0),
+    ])
+    assert _year(report, "FY2024-25")["estimated_tax"] == pytest.approx(10000 * 0.20)
@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.core.database import SessionLocal, engine
+from app.models.history import ChatHistory
+from app.services.chat_search import ensure_search_index, search_chat_history
+
+
+@pytest.fixture
+def db(client):   # `client` boots main, which creates the tables and the FTS5 index
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _owner():
+    return f"search-{uuid.uuid4().hex[:8]}@example.com"
+
+
+def _chat(db, email, query, response):
+    row = ChatHistory(user_email=email, query=query, response=response)
+    db.add(row)
+    db.commit()
+    return row
+
+
+def test_matches_are_scoped_to_the_owner_inside_the_fts_query(db):
+    mine, theirs = _owner(), _owner()
+    _chat(db, theirs, "capital gains tax on equity", "Tax is due after a year.")
+    own = _chat(db, mine, "how do I save tax", "Use the 80C tax deduction.")
+
+    result = search_chat_history(db, mine, "tax")
+    assert result["status"] == "Success"
+    assert [hit["id"] for hit in result["results"]] == [own.id]
+    assert "<mark>tax</mark>" in result["results"][0]["response_highlight"]
+
+    # The other user's rows never reach the ranker: a match on their text alone finds nothing
+    assert search_chat_history(db, mine, "equity")["results"] == []
+
+
+def test_query_matches_outrank_response_matches_and_pages(db):
+    email = _owner()
+    in_response = _chat(db, email, "monthly budget", "Keep an emergency fund of six months.")
+    in_query = _chat(db, email, "emergency fund size", "Three to six months of expenses.")
+
+    first = search_chat_history(db, email, "emergency fund", page=1, page_size=1)
+    assert [hit["id"] for hit in first["results"]] == [in_query.id] and first["has_more"]
+    second = search_chat_history(db, email, "emergency fund", page=2, page_size=1)
+    assert [hit["id"] for hit in second["results"]] == [in_response.id] and not second["has_more"]
+
+
+def test_deleted_and_reassigned_rows_leave_the_index(db):
+    email, other = _owner(), _owner()
+    row = _chat(db, email, "gold etf", "Gold ETFs track the metal price.")
+    assert len(search_chat_history(db, email, "gold")["results"]) == 1
+
+    row.user_email = other
+    db.commit()
+    assert search_chat_history(db, email, "gold")["results"] == []
+    assert len(search_chat_history(db, other, "gold")["results"]) == 1
+
+    db.delete(row)
+    db.commit()
+    assert search_chat_history(db, other, "gold")["results"] == []
+
+
+def test_legacy_index_without_owner_column_is_rebuilt(db):
+    email = _owner()
+    _chat(db, email, "index fund", "Low-cost index funds suit beginners.")
+    with engine.begin() as conn:
+        for name in ("chat_history_fts_ai", "chat_history_fts_ad", "chat_history_fts_au"):
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DROP TABLE chat_history_fts"))
+        conn.execute(text("CREATE VIRTUAL TABLE chat_history_fts USING fts5("
+                          "query, response, content='chat_history', content_rowid='id')"))
+
+    ensure_search_index(engine)
+    assert len(search_chat_history(db, email, "index")["results"]) == 1
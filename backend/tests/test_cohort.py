@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.cache import shared_cache
+from app.services.cohort_analytics import COHORT_CACHE_KEY, _CohortAccumulator
+
+ADMIN = {"x-admin-token": "operator-secret"}
+
+
+def _rows(role, level, n):
+    return [(role, level, 100000.0, 40000.0, 300000.0, 50000.0, 0.0, 0.0)] * n
+
+
+def test_small_segments_are_withheld():
+    accumulator = _CohortAccumulator()
+    accumulator.add(_rows("student", "beginner", 12) + _rows("business", "pro", 1))
+    report = accumulator.report(min_segment_size=10)
+    assert [(s["role"], s["users"]) for s in report["segments"]] == [("student", 12)]
+    assert report["suppressed_segments"] == 1
+
+
+def test_tiny_population_reports_nothing_individual():
+    accumulator = _CohortAccumulator()
+    accumulator.add(_rows("business", "pro", 2))
+    report = accumulator.report(min_segment_size=10)
+    assert report["status"] == "Cohort Too Small"
+    assert report["health_score"] == {} and report["segments"] == []
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr("main.settings.ADMIN_TOKEN", ADMIN["x-admin-token"])
+
+
+def test_cohort_route_is_hidden_without_admin_token(client):
+    assert client.get("/api/analytics/cohort").status_code == 404
+
+
+def test_cohort_route_requires_the_token(client, admin_token):
+    assert client.get("/api/analytics/cohort").status_code == 403
+    assert client.get("/api/analytics/cohort", headers={"x-admin-token": "guess"}).status_code == 403
+
+
+def test_cohort_route_serves_cache_and_computes_inline_without_scheduler(client, admin_token, user_email):
+    shared_cache.delete(COHORT_CACHE_KEY)
+    response = client.get("/api/analytics/cohort", headers=ADMIN)
+    assert response.status_code == 200
+    assert response.json()["status"] in ("Success", "Cohort Too Small", "No Cohort Data")
+    shared_cache.set(COHORT_CACHE_KEY, {"status": "Success", "population": 42}, 60)
+    assert client.get("/api/analytics/cohort", headers=ADMIN).json()["population"] == 42
+    shared_cache.delete(COHORT_CACHE_KEY)
+
+
+def test_cold_cache_defers_to_the_job_when_scheduler_runs(client, admin_token, monkeypatch):
+    shared_cache.delete(COHORT_CACHE_KEY)
+    triggered = []
+    monkeypatch.setattr("main.scheduler.trigger", lambda name: triggered.append(name) or True)
+    response = client.get("/api/analytics/cohort", headers=ADMIN)
+    assert response.status_code == 503
+    assert triggered == ["precompute_cohort_report"]
@@ -0,0 +1,92 @@
+import csv
+import io
+import gzip
+import json
+
+import pytest
+
+from app.services.data_export import stream_export
+
+ADMIN = {"x-admin-token": "operator-secret"}
+
+
+def _add_goals(client, email, count):
+    for i in range(count):
+        assert client.post("/api/goals", json={"user_email": email, "title": f"Goal {i}", "target_amount": 1000 + i,
+                                               "category": "Savings"}).status_code == 200
+
+
+def _ndjson(response) -> list:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_export_contains_only_the_users_records(client, user_email):
+    other = f"other-{user_email}"
+    client.post("/api/register", json={"email": other, "password": "s3cret-pass"})
+    _add_goals(client, user_email, 2)
+    _add_goals(client, other, 1)
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 90000, "expenses": 40000,
+                                             "savings": 300000, "investments": 0})
+
+    response = client.get("/api/export", params={"email": user_email, "compress": "false"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in response.headers
+    records = _ndjson(response)
+    assert [r["record"] for r in records] == ["portfolio", "goals", "goals"]
+    assert records[0]["owner_email"] == user_email and records[0]["monthly_income"] == 90000
+    assert {r["title"] for r in records[1:]} == {"Goal 0", "Goal 1"}
+    assert all(r["user_email"] == user_email for r in records[1:])
+
+
+def test_csv_export_has_a_header_row(client, user_email):
+    _add_goals(client, user_email, 2)
+    response = client.get("/api/export", params={"email": user_email, "format": "csv", "dataset": "goals",
+                                                 "compress": "false"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="financepro_goals_')
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "user_email", "title", "category", "target_amount", "current_amount",
+                       "deadline", "status", "created_at", "updated_at"]
+    assert [row[2] for row in rows[1:]] == ["Goal 0", "Goal 1"]
+
+    assert client.get("/api/export", params={"email": user_email, "format": "csv"}).status_code == 400
+
+
+@pytest.mark.parametrize("count", [6, 7])   # Exactly two chunks, and two chunks plus a partial one
+def test_keyset_chunks_neither_drop_nor_repeat_rows(client, user_email, monkeypatch, count):
+    monkeypatch.setattr("app.services.data_export.settings.EXPORT_CHUNK_ROWS", 3)
+    _add_goals(client, user_email, count)
+
+    ids = [r["id"] for r in _ndjson(client.get("/api/export", params={
+        "email": user_email, "dataset": "goals", "compress": "false"}))]
+    expected = sorted(goal["id"] for goal in client.get("/api/goals", params={"email": user_email}).json())
+    assert ids == expected and len(ids) == count
+
+
+def test_gzip_output_decompresses_to_the_plain_bytes(client, user_email, monkeypatch):
+    monkeypatch.setattr("app.services.data_export.settings.EXPORT_CHUNK_ROWS", 2)
+    _add_goals(client, user_email, 5)
+
+    plain = b"".join(stream_export("ndjson", ["goals"], email=user_email))
+    compressed = b"".join(stream_export("ndjson", ["goals"], email=user_email, compress=True))
+    assert gzip.decompress(compressed) == plain and plain.count(b"\n") == 5
+
+    response = client.get("/api/export", params={"email": user_email, "dataset": "goals"},
+                          headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == plain   # Decoded by the client
+
+
+def test_admin_export_covers_every_tenant(client, user_email, monkeypatch):
+    monkeypatch.setattr("main.settings.ADMIN_TOKEN", ADMIN["x-admin-token"])
+    other = f"other-{user_email}"
+    client.post("/api/register", json={"email": other, "password": "s3cret-pass"})
+    _add_goals(client, user_email, 1)
+    _add_goals(client, other, 1)
+    assert client.get("/api/admin/export").status_code == 403
+
+    response = client.get("/api/admin/export", params={"dataset": "goals", "compress": "false"}, headers=ADMIN)
+    owners = {r["user_email"] for r in _ndjson(response)}
+    assert {user_email, other} <= owners
+    assert response.headers["content-disposition"].startswith('attachment; filename="financepro_tenant_goals_')
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.services.historical_sip import _shift_months, xirr
+
+
+def _monthly_sip_flows(months: int, final_value: float) -> np.ndarray:
+    return np.append(np.full(months, -1.0), final_value)
+
+
+def test_xirr_known_answers():
+    months = 12
+    times = np.tile(np.arange(months + 1) / 12, (4, 1))
+    growth = 0.01   # 1% every month: the annualized rate is exactly 1.01**12 - 1
+    grown_value = sum((1 + growth) ** (months - k) for k in range(months))
+    amounts = np.vstack([
+        _monthly_sip_flows(months, grown_value),
+        _monthly_sip_flows(months, 0.0),                 # Total loss
+        _monthly_sip_flows(months, float(months)),       # Flat prices: get back what went in
+        np.append(np.append(-100.0, np.zeros(months - 1)), 121.0),   # Lump sum, 21% in one year
+    ])
+
+    rates = xirr(amounts, times)
+    assert rates[0] == pytest.approx((1 + growth) ** 12 - 1, abs=1e-9)
+    assert -1 < rates[1] < -0.999   # Pinned to the bracket's lower bound
+    assert rates[2] == pytest.approx(0.0, abs=1e-9)
+    assert rates[3] == pytest.approx(0.21, abs=1e-9)
+
+
+def test_xirr_converges_far_from_the_initial_guess():
+    # Doubling (or halving) in a quarter: +1500% / -93.75% a year, far from the 10% starting guess
+    amounts = np.array([[-1.0, 2.0], [-1.0, 0.5]])
+    times = np.array([[0.0, 0.25], [0.0, 0.25]])
+    assert xirr(amounts, times) == pytest.approx([2.0 ** 4 - 1, 0.5 ** 4 - 1], abs=1e-9)
+
+
+def _dates(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def test_shift_months_clamps_to_month_end():
+    shifted = _shift_months(_dates("2024-01-31", "2023-01-31", "2024-03-15"), np.arange(4))
+    assert shifted.tolist() == _dates(
+        "2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30",   # Leap year February
+        "2023-01-31", "2023-02-28", "2023-03-31", "2023-04-30",
+        "2024-03-15", "2024-04-15", "2024-05-15", "2024-06-15",
+    ).reshape(3, 4).tolist()
+
+
+def test_shift_months_across_year_end():
+    assert _shift_months(_dates("2023-11-30"), np.array([3, 14]))[0].tolist() == _dates("2024-02-29", "2025-01-30").tolist()
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.indicators import SymbolState
+
+WINDOW = 20
+PERIOD = 14
+BARS = 1500   # Long enough to cross the SMA's periodic re-sum (every 1024 updates)
+
+
+def _seeded_recursive(values: pd.Series, period: int, alpha: float) -> pd.Series:
+    """Mean of the first `period` values, then x_t = x_{t-1} + alpha * (v_t - x_{t-1})."""
+    seeded = values.copy()
+    seeded.iloc[:period - 1] = np.nan
+    seeded.iloc[period - 1] = values.iloc[:period].mean()
+    seeded.iloc[period - 1:] = seeded.iloc[period - 1:].ewm(alpha=alpha, adjust=False).mean()
+    return seeded
+
+
+def _reference(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.DataFrame:
+    """Naive whole-series pandas versions of every indicator SymbolState keeps."""
+    change = close.diff()
+    gain = _seeded_recursive(change.clip(lower=0).iloc[1:], PERIOD, 1 / PERIOD).reindex(close.index)
+    loss = _seeded_recursive((-change).clip(lower=0).iloc[1:], PERIOD, 1 / PERIOD).reindex(close.index)
+    true_range = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    mean = close.rolling(WINDOW).mean()
+    std = close.rolling(WINDOW).std(ddof=0)
+    return pd.DataFrame({
+        "sma": mean,
+        "ema": _seeded_recursive(close, WINDOW, 2 / (WINDOW + 1)),
+        "rsi": 100 - 100 / (1 + gain / loss),
+        "lower": mean - 2 * std,
+        "upper": mean + 2 * std,
+        "recent_max": high.rolling(WINDOW, min_periods=1).max(),
+        "atr": _seeded_recursive(true_range, PERIOD, 1 / PERIOD),
+    })
+
+
+@pytest.fixture(scope="module")
+def bars():
+    rng = np.random.default_rng(7)
+    close = pd.Series(20000 * np.exp(np.cumsum(rng.normal(0, 0.01, BARS))))
+    spread = close * rng.uniform(0.001, 0.02, BARS)
+    high, low = close + spread * rng.uniform(0, 1, BARS), close - spread * rng.uniform(0, 1, BARS)
+    return high, low, close
+
+
+def _flatten(preview: dict) -> dict:
+    lower, upper = preview["bollinger"] or (None, None)
+    return {**{k: preview[k] for k in ("sma", "ema", "rsi", "recent_max", "atr")}, "lower": lower, "upper": upper}
+
+
+def _assert_matches(actual, expected, label):
+    if isinstance(expected, float) and math.isnan(expected):
+        assert actual is None, label
+    else:
+        assert actual == pytest.approx(expected, rel=1e-9), label
+
+
+def test_live_preview_matches_the_pandas_reference(bars):
+    high, low, close = bars
+    expected = _reference(high, low, close)
+    state = SymbolState(WINDOW)
+
+    for i in range(BARS):
+        # An intraday tick that is later revised must leave no trace in the committed state
+        state.preview(high[i] * 1.05, low[i] * 0.9, close[i] * 1.03)
+        preview = _flatten(state.preview(high[i], low[i], close[i]))
+        for name, value in preview.items():
+            _assert_matches(value, expected[name][i], f"{name} at bar {i}")
+        assert state.preview(high[i], low[i], close[i])["prev_close"] == (close[i - 1] if i else None)
+        state.push(i, high[i], low[i], close[i])
+
+    assert state.bars == BARS and state.last_ts == BARS - 1
+
+
+def test_warm_up_periods(bars):
+    high, low, close = bars
+    state = SymbolState(WINDOW)
+    first_value = {}
+    for i in range(40):
+        for name, value in _flatten(state.preview(high[i], low[i], close[i])).items():
+            if value is not None:
+                first_value.setdefault(name, i)
+        state.push(i, high[i], low[i], close[i])
+
+    # Window indicators need WINDOW bars including the live one; RSI needs PERIOD changes,
+    # ATR PERIOD true ranges (the first bar's is its high-low range); the max is always defined
+    assert first_value == {"sma": WINDOW - 1, "ema": WINDOW - 1, "lower": WINDOW - 1, "upper": WINDOW - 1,
+                           "rsi": PERIOD, "atr": PERIOD - 1, "recent_max": 0}
+
+
+def test_committed_state_equals_previewed_state(bars):
+    high, low, close = bars
+    state = SymbolState(WINDOW)
+    for i in range(60):
+        state.push(i, high[i], low[i], close[i])
+    previewed = state.preview(high[60], low[60], close[60])
+
+    # update() commits exactly what peek() reported for the same bar
+    state.push(60, high[60], low[60], close[60])
+    assert state.sma.total / WINDOW == pytest.approx(previewed["sma"], rel=1e-12)
+    assert state.ema.value == pytest.approx(previewed["ema"], rel=1e-12)
+    assert state.rsi._rsi(state.rsi.gain.value, state.rsi.loss.value) == pytest.approx(previewed["rsi"], rel=1e-12)
+    assert state.atr.avg.value == pytest.approx(previewed["atr"], rel=1e-12)
+    assert state.high_max.items[0][1] == previewed["recent_max"]
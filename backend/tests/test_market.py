@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from app.core.cache import shared_cache
+from app.core.config import settings
+from app.services import market_engine
+
+
+def _bars(symbol, period):
+    stamps = [datetime(2024, 1, 1) + timedelta(days=i) for i in range(30)]
+    closes = [100.0 + i for i in range(30)]
+    return stamps, [c + 1 for c in closes], [c - 1 for c in closes], closes
+
+
+def _offline(symbol, period):
+    raise ConnectionError("yfinance unreachable")
+
+
+def test_failed_fetch_is_not_served_for_a_whole_tick(client, monkeypatch):
+    shared_cache.delete("market:NIFTY 50")
+    monkeypatch.setattr(settings, "MARKET_ERROR_RETRY_SECONDS", -1.0)
+    monkeypatch.setattr(market_engine, "_STATES", {})
+
+    monkeypatch.setattr(market_engine, "_fetch_bars", _offline)
+    assert client.get("/api/market-status").json()["status"] == "DATA_ERROR"
+
+    monkeypatch.setattr(market_engine, "_fetch_bars", _bars)
+    assert client.get("/api/market-status").json()["index"] == "NIFTY 50"
+    shared_cache.delete("market:NIFTY 50")
+
+
+def test_snapshot_ttl():
+    assert market_engine.snapshot_ttl({"status": "OFFLINE"}) == settings.MARKET_ERROR_RETRY_SECONDS
+    assert market_engine.snapshot_ttl({"status": "STABLE"}) == settings.MARKET_TICK_SECONDS
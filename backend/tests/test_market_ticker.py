@@ -0,0 +1,94 @@
+import json
+import asyncio
+
+import pytest
+
+from app.services import market_ticker
+from app.services.market_ticker import MAX_CONSECUTIVE_DROPS, SEND_QUEUE_SIZE, MarketTicker, _Subscriber
+
+
+@pytest.mark.parametrize("frame", [
+    {"action": "subscribe", "indices": 7},
+    {"action": "subscribe", "indices": "NIFTY 50"},
+    {"action": "subscribe", "indices": [["NIFTY 50"], {"x": 1}]},
+    ["subscribe"],
+])
+def test_malformed_frames_keep_the_socket_open(client, frame):
+    with client.websocket_connect("/ws/market") as ws:
+        ws.send_json(frame)
+        reply = ws.receive_json()
+        if isinstance(frame, dict) and isinstance(frame["indices"], list):
+            assert reply == {"type": "subscribed", "indices": []}   # Unknown entries are ignored
+        else:
+            assert reply == {"type": "error", "detail": "Malformed message."}
+        # Still serving after the bad frame
+        ws.send_json({"action": "unsubscribe", "indices": []})
+        assert ws.receive_json() == {"type": "subscribed", "indices": []}
+
+
+def test_invalid_json_is_reported(client):
+    with client.websocket_connect("/ws/market") as ws:
+        ws.send_text("{not json")
+        assert ws.receive_json()["type"] == "error"
+
+
+class _Socket:
+    """Stand-in WebSocket: records frames, or stalls forever on its first send when `stalled`."""
+
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.frames = []
+        self.closed_with = None
+
+    async def send_text(self, payload: str):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.frames.append(json.loads(payload)["data"]["seq"])
+
+    async def close(self, code: int):
+        self.closed_with = code
+
+
+class _PassThroughCache:
+    def get_or_compute(self, key, ttl, compute):
+        return compute()
+
+
+def test_slow_subscriber_drops_oldest_frames_then_is_evicted(monkeypatch):
+    seq = iter(range(1, 100))
+    monkeypatch.setattr(market_ticker, "shared_cache", _PassThroughCache())
+    monkeypatch.setattr(market_ticker, "get_index_analysis", lambda index: {"status": "Success", "seq": next(seq)})
+
+    async def scenario():
+        ticker = MarketTicker(interval=60)
+        slow, fast = _Subscriber(_Socket(stalled=True)), _Subscriber(_Socket())
+        for sub in (slow, fast):
+            sub.indices.add("NIFTY 50")
+            sub.sender = asyncio.create_task(ticker._pump(sub))
+            ticker._subscribers.add(sub)
+
+        async def tick():
+            await ticker._refresh("NIFTY 50")
+            await asyncio.sleep(0.01)   # Let the pumps run
+
+        # Frame 1 is stuck in the slow socket's send; frames 2-5 fill its queue
+        for _ in range(5):
+            await tick()
+        assert slow.dropped == 0 and slow.queue.qsize() == SEND_QUEUE_SIZE
+
+        # Each further frame pushes out the stalest queued one
+        for _ in range(MAX_CONSECUTIVE_DROPS - 1):
+            await tick()
+        assert slow.dropped == MAX_CONSECUTIVE_DROPS - 1 and slow in ticker._subscribers
+        assert [json.loads(frame)["data"]["seq"] for frame in slow.queue._queue] == [9, 10, 11, 12]
+
+        await tick()   # The MAX_CONSECUTIVE_DROPS-th drop evicts it
+        assert slow not in ticker._subscribers
+        assert slow.sender.cancelled() and slow.websocket.closed_with == 1013
+
+        await tick()   # Everyone else keeps receiving every frame
+        assert fast in ticker._subscribers
+        assert fast.websocket.frames == list(range(1, 15))
+        fast.sender.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,152 @@
+import time
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import JWTError, jwk, jwt
+
+from app.core import oauth
+from app.core.database import SessionLocal
+from app.models.user import User
+
+CLIENT_ID = "financepro-test.apps.googleusercontent.com"
+
+
+def _rsa_pem() -> bytes:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption())
+
+
+class _Signer:
+    """A locally generated signing key and its public JWKS entry."""
+
+    def __init__(self, kid: str):
+        self.kid = kid
+        self.pem = _rsa_pem()
+        self.jwk = {**jwk.construct(self.pem, "RS256").public_key().to_dict(), "kid": kid, "use": "sig"}
+
+    def token(self, **overrides) -> str:
+        now = int(time.time())
+        claims = {"iss": "https://accounts.google.com", "aud": CLIENT_ID, "sub": "1234567890",
+                  "email": "Google.User@Example.com", "email_verified": True, "iat": now, "exp": now + 600}
+        claims.update(overrides)
+        return jwt.encode(claims, self.pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+@pytest.fixture(scope="module")
+def signers():
+    return _Signer("key-1"), _Signer("key-2")
+
+
+@pytest.fixture
+def jwks(monkeypatch, signers):
+    """Serves a mutable JWKS through a mock transport and counts fetches; fresh key cache per test."""
+    served = {"keys": [signers[0].jwk], "fetches": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert str(request.url) == oauth.GOOGLE_JWKS_URL
+        served["fetches"] += 1
+        return httpx.Response(200, json={"keys": served["keys"]},
+                              headers={"cache-control": "public, max-age=3600"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(oauth, "get_http_client", lambda: client)
+    monkeypatch.setattr(oauth, "google_keys", oauth.GoogleKeySet())
+    return served
+
+
+def test_valid_id_token_is_verified(jwks, signers):
+    claims = asyncio.run(oauth.verify_id_token(signers[0].token(), CLIENT_ID))
+    assert claims["email"] == "Google.User@Example.com" and claims["email_verified"] is True
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "someone-else.apps.googleusercontent.com"},
+    {"iss": "https://evil.example.com"},
+    {"exp": int(time.time()) - 60},
+])
+def test_wrong_claims_are_rejected(jwks, signers, overrides):
+    with pytest.raises(JWTError):
+        asyncio.run(oauth.verify_id_token(signers[0].token(**overrides), CLIENT_ID))
+
+
+def test_forged_signature_is_rejected(jwks, signers):
+    forged = _Signer("key-1")   # Same kid, different private key
+    with pytest.raises(JWTError):
+        asyncio.run(oauth.verify_id_token(forged.token(), CLIENT_ID))
+
+
+def test_keys_are_cached_for_max_age(jwks, signers):
+    async def scenario():
+        keys = oauth.google_keys
+        assert await keys.get("key-1") is not None
+        assert await keys.get("key-1") is not None
+        assert jwks["fetches"] == 1
+
+        keys._expires = time.monotonic() - 1   # max-age elapsed
+        assert await keys.get("key-1") is not None
+        assert jwks["fetches"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kid_forces_one_rate_limited_refresh(jwks, signers):
+    async def scenario():
+        keys = oauth.google_keys
+        await keys.get("key-1")
+
+        # Google rotated in key-2: the first token signed with it forces a refetch
+        jwks["keys"] = [signers[0].jwk, signers[1].jwk]
+        assert await keys.get("key-2") is not None
+        assert jwks["fetches"] == 2
+
+        # Unknown kids (e.g. forged tokens) can't force another fetch inside the window
+        assert await keys.get("no-such-key") is None
+        assert jwks["fetches"] == 2
+
+        keys._last_forced -= oauth.MIN_FORCED_REFRESH
+        assert await keys.get("no-such-key") is None
+        assert jwks["fetches"] == 3
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def google_flow(client, jwks, monkeypatch):
+    """Points the callback at the mock JWKS and returns a function that fakes the code exchange."""
+    monkeypatch.setattr("main.GOOGLE_CLIENT_ID", CLIENT_ID)
+
+    def sign_in(id_token: str):
+        async def exchange(code, client_id, client_secret, redirect_uri):
+            return {"id_token": id_token}
+        monkeypatch.setattr("main.exchange_code", exchange)
+        return client.get("/api/auth/google/callback", params={"code": "auth-code"}, follow_redirects=False)
+
+    return sign_in
+
+
+def test_callback_requires_a_verified_email(google_flow, signers):
+    response = google_flow(signers[0].token(email_verified=False))
+    assert response.status_code == 400
+
+
+def test_callback_signs_up_then_signs_in(google_flow, signers):
+    email = f"g-{time.time_ns()}@example.com"
+    response = google_flow(signers[0].token(email=email.upper()))
+    assert response.status_code == 307
+    params = parse_qs(urlparse(response.headers["location"]).query)
+    assert params["email"] == [email] and params["role"] == ["professional"]
+
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).one()
+        assert user.hashed_password is None and user.is_verified
+        user.role = "student"
+        db.commit()
+
+    # Second sign-in finds the existing identity instead of creating another
+    params = parse_qs(urlparse(google_flow(signers[0].token(email=email)).headers["location"]).query)
+    assert params["role"] == ["student"]
@@ -0,0 +1,61 @@
+from app.core.cache import MemoryCache
+from app.services.percentile_index import HealthScorePercentileIndex, MAX_SCORE
+
+
+def _histograms(scores_by_segment: dict) -> dict:
+    histograms = {}
+    for segment, scores in scores_by_segment.items():
+        counts = histograms.setdefault(segment, [0] * (MAX_SCORE + 1))
+        for score in scores:
+            counts[score] += 1
+    return histograms
+
+
+def _workers(monkeypatch, scores_by_segment: dict) -> tuple:
+    """Two processes' indexes over one shared cache, the first one having built it."""
+    cache = MemoryCache()
+    builder, other = HealthScorePercentileIndex(cache), HealthScorePercentileIndex(cache)
+    monkeypatch.setattr(builder, "_scan", lambda db, chunk: _histograms(scores_by_segment))
+    builder.build(db=None)
+    return builder, other
+
+
+def test_every_worker_ranks_against_the_shared_histograms(monkeypatch):
+    builder, other = _workers(monkeypatch, {"student/beginner": [40, 60]})
+    assert other.rank("student", "beginner", 40) == {"percentile": 25.0, "segment": "student/beginner", "peers": 2}
+
+    # A sync served by one worker is visible to the other on its next lookup
+    builder.record_score("student", "beginner", 60, 10)
+    assert other.rank("student", "beginner", 10) == {"percentile": 25.0, "segment": "student/beginner", "peers": 2}
+    assert other.rank("student", "beginner", 40)["percentile"] == 75.0
+
+    other.record_score("student", "beginner", None, 90)   # First sync: a new member
+    assert builder.rank("student", "beginner", 90)["peers"] == 3
+
+
+def test_persona_change_moves_the_member(monkeypatch):
+    builder, other = _workers(monkeypatch, {"student/beginner": [40, 60]})
+    other.record_persona("student", "beginner", "professional", "pro", 60)
+    assert builder.rank("student", "beginner", 40)["peers"] == 1
+    assert builder.rank("professional", "pro", 60) == {"percentile": 50.0, "segment": "professional/pro", "peers": 1}
+
+    other.record_persona("student", "beginner", "business", "pro", None)   # No portfolio: not ranked
+    assert builder.rank("business", "pro", 50)["peers"] == 0
+
+
+def test_updates_before_the_first_build_are_left_to_it():
+    index = HealthScorePercentileIndex(MemoryCache())
+    index.record_score("student", "beginner", None, 50)
+    assert index.rank("student", "beginner", 50)["percentile"] is None
+
+
+def test_rank_before_build_is_empty():
+    assert HealthScorePercentileIndex(MemoryCache()).rank("student", "beginner", 50) == {"percentile": None, "segment": None, "peers": 0}
+
+
+def test_index_builds_lazily_without_scheduler(client, user_email):
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 90000, "expenses": 40000,
+                                             "savings": 300000, "investments": 0})
+    benchmark = client.get("/api/analytics/comprehensive", params={"email": user_email}).json()["benchmark"]
+    assert benchmark["percentile"] is not None
+    assert benchmark["segment"] == "student/beginner"
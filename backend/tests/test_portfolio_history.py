@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.snapshot import PortfolioSnapshot
+from app.services import portfolio_history
+from app.services.portfolio_history import get_portfolio_trend
+
+SYNC = {"income": 100000, "expenses": 40000, "savings": 300000, "investments": 50000}
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _user_id(db, email) -> int:
+    return db.query(User.id).filter(User.email == email).scalar()
+
+
+def _snapshot_count(db, email) -> int:
+    return db.query(PortfolioSnapshot).filter(PortfolioSnapshot.user_id == _user_id(db, email)).count()
+
+
+def test_unchanged_sync_adds_no_snapshot(client, user_email, db):
+    client.post("/api/portfolio/sync", json={"email": user_email, **SYNC})
+    client.post("/api/portfolio/sync", json={"email": user_email, **SYNC})
+    assert _snapshot_count(db, user_email) == 1
+
+    client.post("/api/portfolio/sync", json={"email": user_email, **SYNC, "savings": 310000})
+    assert _snapshot_count(db, user_email) == 2
+
+
+@pytest.fixture
+def history(user_email, db):
+    """Five syncs: two on Mon 1 Jan 2024, Wed 3 Jan, Mon 8 Jan and Thu 15 Feb."""
+    user_id = _user_id(db, user_email)
+    for ts, income, savings in [
+        (datetime(2024, 1, 1, 9, 30), 100000, 100000),
+        (datetime(2024, 1, 1, 18, 0), 100000, 200000),
+        (datetime(2024, 1, 3, 12, 0), 100000, 300000),
+        (datetime(2024, 1, 8, 8, 0), 120000, 400000),
+        (datetime(2024, 2, 15, 20, 0), 80000, 500000),
+    ]:
+        db.add(PortfolioSnapshot(user_id=user_id, ts=ts, monthly_income=income, monthly_expenses=40000,
+                                 savings=savings, investments=0))
+    db.commit()
+    return user_email
+
+
+def _series(trend: dict) -> list:
+    return [(p["date"], p["net_worth"], p["syncs"]) for p in trend["points"]]
+
+
+def test_daily_buckets(history, db):
+    trend = get_portfolio_trend(db, history, bucket="daily")
+    assert _series(trend) == [("2024-01-01", 150000, 2), ("2024-01-03", 300000, 1),
+                              ("2024-01-08", 400000, 1), ("2024-02-15", 500000, 1)]
+    assert trend["points"][0]["savings_rate"] == 60.0
+
+
+def test_weekly_buckets_start_on_monday(history, db):
+    assert _series(get_portfolio_trend(db, history, bucket="weekly")) == [
+        ("2024-01-01", 200000, 3), ("2024-01-08", 400000, 1), ("2024-02-12", 500000, 1)]
+
+
+def test_monthly_buckets_average_their_syncs(history, db):
+    trend = get_portfolio_trend(db, history, bucket="monthly")
+    assert _series(trend) == [("2024-01-01", 250000, 4), ("2024-02-01", 500000, 1)]
+    assert trend["points"][0]["monthly_income"] == 105000
+    assert trend["points"][1]["savings_rate"] == 50.0
+
+
+def test_point_cap_keeps_the_newest_buckets(history, db, monkeypatch):
+    monkeypatch.setattr(portfolio_history, "MAX_POINTS", 3)
+    assert [p["date"] for p in get_portfolio_trend(db, history, bucket="daily")["points"]] == [
+        "2024-01-03", "2024-01-08", "2024-02-15"]
+
+
+def test_unknown_bucket_is_rejected(db):
+    assert get_portfolio_trend(db, "anyone@example.com", bucket="hourly")["status"] == "Invalid Bucket"
@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+import main
+from app.core.database import get_db, session_scope
+from app.core.query_metrics import query_budget
+from app.models.goal import Goal
+from app.models.user import User
+
+ADMIN = {"x-admin-token": "budget-admin"}
+
+
+@pytest.fixture(autouse=True)
+def enforce_budgets(monkeypatch):
+    monkeypatch.setattr(main.settings, "ENFORCE_QUERY_BUDGETS", True)
+    monkeypatch.setattr(main.settings, "DEBUG", True)
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", ADMIN["x-admin-token"])
+
+
+def within_budget(response):
+    assert response.status_code != 500, response.text
+    count, budget = response.headers["X-DB-Query-Count"], response.headers.get("X-DB-Query-Budget")
+    assert budget is not None, "route has no @query_budget"
+    assert int(count) <= int(budget), f"{count} statements (budget {budget})"
+    return response
+
+
+async def _advice(system_context, query):
+    return "Keep six months of expenses in a liquid fund."
+
+
+def test_every_budgeted_route_stays_within_budget(client, monkeypatch):
+    monkeypatch.setattr(main, "generate_advice", _advice)
+    email = f"budget-{uuid.uuid4().hex[:8]}@example.com"
+    credentials = {"email": email, "password": "s3cret-pass"}
+
+    within_budget(client.post("/api/register", json=credentials))
+    within_budget(client.post("/api/login", json=credentials))
+    within_budget(client.post("/api/user/update-persona", json={"email": email, "role": "professional", "level": "pro"}))
+    within_budget(client.post("/api/reset-password", json={"email": email, "new_password": "n3w-pass"}))
+    within_budget(client.post("/api/goals", json={"user_email": email, "title": "Car", "target_amount": 800000,
+                                                   "category": "Lifestyle"}))
+    within_budget(client.get("/api/goals", params={"email": email}))
+    within_budget(client.post("/api/portfolio/sync", json={"email": email, "income": 120000, "expenses": 50000,
+                                                           "savings": 400000, "investments": 250000}))
+    within_budget(client.post("/api/portfolio/sync", json={"email": email, "income": 125000, "expenses": 50000,
+                                                           "savings": 410000, "investments": 250000}))
+    within_budget(client.get("/api/portfolio/history", params={"email": email}))
+    within_budget(client.get("/api/analytics/comprehensive", params={"email": email}))
+    within_budget(client.get("/api/analytics/comprehensive", params={"email": email}))   # Cached
+    within_budget(client.get("/api/analytics/cohort", headers=ADMIN))
+    within_budget(client.post("/api/ai/chat", json={"email": email, "query": "How big should my emergency fund be?"}))
+    within_budget(client.get("/api/ai/history/search", params={"email": email, "q": "emergency fund"}))
+    within_budget(client.post("/api/transactions", json={"email": email, "transactions": [
+        {"instrument": "INFY", "side": "BUY", "trade_date": "2023-01-02", "quantity": 10, "price": 1500},
+        {"instrument": "INFY", "side": "SELL", "trade_date": "2024-09-02", "quantity": 10, "price": 1900},
+    ]}))
+    within_budget(client.get("/api/tax/capital-gains", params={"email": email}))
+    within_budget(client.post("/api/statements/import", data={"email": email, "apply": "true"}, files={
+        "statement": ("s.csv", b"Date,Narration,Amount\n2024-01-01,NEFT-SALARY,90000\n2024-01-30,UPI/SWIGGY,-500\n")}))
+    within_budget(client.get("/api/export", params={"email": email, "dataset": "goals"}))
+
+
+# A deliberately greedy write route: two lookups against a budget of one, then a commit
+@main.app.post("/__tests__/greedy-write")
+@query_budget(1)
+def _greedy_write(email: str, db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.email == email).first()
+    db.query(Goal).filter(Goal.user_email == email).all()
+    db.add(Goal(user_id=user.id, user_email=email, title="Should never persist", target_amount=1.0))
+    db.commit()
+    return {"status": "Committed"}
+
+
+def test_over_budget_write_fails_before_commit(client, user_email):
+    response = client.post("/__tests__/greedy-write", params={"email": user_email})
+    assert response.status_code == 500
+    assert "Query budget exceeded" in response.json()["detail"]
+    with session_scope() as db:
+        assert db.query(Goal).filter(Goal.user_email == user_email).count() == 0
+
+
+def test_over_budget_read_is_rejected(client, user_email, monkeypatch):
+    monkeypatch.setattr(main.list_objectives, "__query_budget__", 0)
+    assert client.get("/api/goals", params={"email": user_email}).status_code == 500
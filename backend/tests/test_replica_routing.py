@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+from app.core import database
+from app.core.database import ReplicaRouter, get_read_db, pin_to_primary
+
+
+def _node(path, name):
+    node = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with node.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS node (name TEXT)"))
+        conn.execute(text("DELETE FROM node"))
+        conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": name})
+    return node
+
+
+def _served_by(bind) -> str:
+    with bind.connect() as conn:
+        return conn.execute(text("SELECT name FROM node")).scalar()
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    """A primary and two replicas, each a separate SQLite file."""
+    return (_node(tmp_path / "primary.db", "primary"),
+            _node(tmp_path / "replica_a.db", "replica_a"),
+            _node(tmp_path / "replica_b.db", "replica_b"))
+
+
+def test_reads_round_robin_over_replicas(nodes):
+    primary, replica_a, replica_b = nodes
+    router = ReplicaRouter(primary, [replica_a, replica_b])
+    assert [_served_by(router.engine_for()) for _ in range(4)] == ["replica_a", "replica_b"] * 2
+
+
+def test_no_replicas_reads_from_primary(nodes):
+    assert ReplicaRouter(nodes[0], []).engine_for() is nodes[0]
+
+
+def test_marked_down_replica_is_skipped_until_it_probes_healthy(nodes, monkeypatch):
+    primary, replica_a, replica_b = nodes
+    router = ReplicaRouter(primary, [replica_a, replica_b])
+    router.mark_down(replica_a)
+    assert {_served_by(router.engine_for()) for _ in range(4)} == {"replica_b"}
+
+    router.mark_down(replica_b)
+    assert router.engine_for() is primary
+
+    monkeypatch.setattr(database.settings, "REPLICA_HEALTH_INTERVAL", 0.0)
+    assert {_served_by(router.engine_for()) for _ in range(4)} == {"replica_a", "replica_b"}
+
+
+def test_unreachable_replica_fails_its_probe(nodes, tmp_path, monkeypatch):
+    primary = nodes[0]
+    missing = create_engine(f"sqlite:///{tmp_path / 'no_such_dir' / 'replica.db'}")
+    router = ReplicaRouter(primary, [missing])
+    monkeypatch.setattr(database.settings, "REPLICA_HEALTH_INTERVAL", 0.0)
+    assert router.engine_for() is primary
+
+
+def test_pinned_user_reads_from_primary(nodes, monkeypatch):
+    primary, replica_a, _ = nodes
+    router = ReplicaRouter(primary, [replica_a])
+    monkeypatch.setattr(database, "replica_engines", [replica_a])
+
+    pin_to_primary("writer@example.com")
+    assert router.engine_for("writer@example.com") is primary
+    assert router.engine_for("reader@example.com") is replica_a
+
+
+def _request(query: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": query.encode()})
+
+
+def test_get_read_db_routes_and_takes_a_failing_replica_out(nodes, monkeypatch):
+    primary, replica_a, _ = nodes
+    router = ReplicaRouter(primary, [replica_a])
+    monkeypatch.setattr(database, "replica_router", router)
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "replica_engines", [replica_a])
+
+    session = get_read_db(_request("email=Reader@Example.com"))
+    assert _served_by(next(session).get_bind()) == "replica_a"
+    with pytest.raises(OperationalError):
+        session.throw(OperationalError("SELECT 1", {}, Exception("replica went away")))
+    assert router.engine_for() is primary
+
+    pin_to_primary("writer@example.com")
+    session = get_read_db(_request("email=Writer@Example.com"))
+    assert next(session).get_bind() is primary
+    session.close()
+
+
+def test_writes_pin_before_invalidating_the_dashboard(client, user_email, monkeypatch):
+    calls = []
+    monkeypatch.setattr("main.pin_to_primary", lambda key: calls.append("pin"))
+    monkeypatch.setattr("main.invalidate_stats", lambda key: calls.append("invalidate"))
+
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 1000, "expenses": 500,
+                                             "savings": 100, "investments": 0})
+    client.post("/api/user/update-persona", json={"email": user_email, "role": "student", "level": "pro"})
+    client.post("/api/goals", json={"user_email": user_email, "title": "Car", "target_amount": 1000,
+                                    "category": "purchase"})
+    assert calls == ["pin", "invalidate"] * 3
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.core.scheduler import Scheduler
+
+
+def test_on_demand_job_runs_at_start_and_on_trigger(monkeypatch):
+    scheduler = Scheduler()
+    runs = []
+
+    @scheduler.on_demand(exclusive=False, run_at_start=True)
+    def rebuild():
+        runs.append(1)
+
+    job = scheduler.jobs["rebuild"]
+    assert job.next_delay(datetime.now(timezone.utc)) is None
+    assert scheduler.metrics()["rebuild"]["schedule"] == "on demand"
+
+    async def scenario():
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        scheduler.trigger("rebuild")
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        assert scheduler.trigger("rebuild") is False
+
+    monkeypatch.setattr("app.core.scheduler.settings.SCHEDULER_ENABLED", True)
+    asyncio.run(scenario())
+    assert len(runs) == 2
+
+
+def test_trigger_reports_a_stopped_scheduler():
+    scheduler = Scheduler()
+    scheduler.on_demand()(lambda: None)
+    assert scheduler.trigger("<lambda>") is False
+
+
+def test_trigger_endpoint_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr("main.settings.DEBUG", True)   # DEBUG alone no longer opens it
+    assert client.post("/api/diagnostics/jobs/refresh_stale_analytics/run").status_code == 404
+    monkeypatch.setattr("main.settings.ADMIN_TOKEN", "operator-secret")
+    assert client.post("/api/diagnostics/jobs/refresh_stale_analytics/run").status_code == 403
+    assert client.post("/api/diagnostics/jobs/refresh_stale_analytics/run",
+                       headers={"x-admin-token": "guess"}).status_code == 403
+
+
+def test_trigger_endpoint_without_scheduler(client, monkeypatch):
+    monkeypatch.setattr("main.settings.ADMIN_TOKEN", "operator-secret")
+    admin = {"x-admin-token": "operator-secret"}
+    assert client.post("/api/diagnostics/jobs/refresh_stale_analytics/run", headers=admin).status_code == 503
+    assert client.post("/api/diagnostics/jobs/no_such_job/run", headers=admin).status_code == 404
+
+
+def test_portfolio_write_warms_the_dashboard_cache(monkeypatch, user_email, client):
+    from app.services import background_jobs
+    from app.services.analytics import _stats_key
+    from app.core.cache import shared_cache
+
+    monkeypatch.setattr(background_jobs.scheduler, "trigger", lambda name: True)
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 1000, "expenses": 500,
+                                             "savings": 100, "investments": 0})
+    assert shared_cache.get(_stats_key(user_email)) is None
+    background_jobs.refresh_stale_analytics()
+    assert shared_cache.get(_stats_key(user_email))["status"] == "Success"
+
+
+def test_portfolio_write_re_ranks_before_the_warm_up(monkeypatch, user_email, client):
+    from app.services import background_jobs
+
+    calls = []
+    monkeypatch.setattr("main.percentile_index.record_score", lambda *args: calls.append("rank"))
+    monkeypatch.setattr("main.invalidate_stats", lambda email: calls.append("invalidate"))
+    monkeypatch.setattr(background_jobs.scheduler, "trigger", lambda name: calls.append("warm") or True)
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 1000, "expenses": 500,
+                                             "savings": 100, "investments": 0})
+    assert calls == ["rank", "invalidate", "warm"]
@@ -0,0 +1,151 @@
+import io
+from datetime import date
+
+import pytest
+
+from app.services.statement_ingest import (
+    default_matcher, parse_csv, parse_ofx, summarize_statement, monthly_averages, ingest_statement
+)
+
+
+# --- Categorizer ---
+
+@pytest.mark.parametrize("narration, category", [
+    ("UPI/AMAZON REFUND/123", "refund"),
+    ("FLIPKART REVERSAL", "refund"),
+    ("SWIGGY REFUND", "refund"),
+    ("AMAZON PAY CASHBACK", "refund"),
+    ("IMPS TO SELF ZOMATO", "transfer"),
+    ("UPI/SWIGGY8812/lunch", "food"),
+    ("POS AMAZON RETAIL", "shopping"),
+    ("NEFT-SALARY ACME CORP", "income"),
+    ("CURRENT ACCOUNT FEE", "other"),   # "rent" inside "current" is not a keyword hit
+])
+def test_categorize(narration, category):
+    assert default_matcher.categorize(narration) == category
+
+
+def test_refund_credits_are_not_income():
+    rows = [
+        (date(2024, 1, 1), "NEFT-SALARY ACME", 50000.0),
+        (date(2024, 1, 5), "UPI/AMAZON REFUND/123", 5000.0),
+        (date(2024, 1, 6), "SWIGGY REFUND", 300.0),
+        (date(2024, 1, 7), "UPI/SWIGGY8812", -800.0),
+    ]
+    summary = summarize_statement(iter(rows))
+    assert summary["months"] == [{"month": "2024-01", "income": 50000.0, "expenses": 800.0}]
+    assert summary["expense_categories"] == {"food": 800.0}
+
+
+# --- Parsers ---
+
+def test_parse_csv_skips_preamble_and_footer():
+    statement = (
+        "HDFC BANK LTD\n"
+        "Statement of account\n"
+        "Date,Narration,Withdrawal Amt.,Deposit Amt.,Closing Balance\n"
+        "01/02/24,NEFT-SALARY ACME,,\"50,000.00\",60000\n"
+        "03/02/24,UPI/AMAZON REFUND/991,,499.00,60499\n"
+        "04/02/24,UPI/ZOMATO,250.00,,60249\n"
+        "Total,,250.00,50499.00,\n"
+    )
+    rows = list(parse_csv(io.StringIO(statement)))
+    assert rows == [
+        (date(2024, 2, 1), "NEFT-SALARY ACME", 50000.0),
+        (date(2024, 2, 3), "UPI/AMAZON REFUND/991", 499.0),
+        (date(2024, 2, 4), "UPI/ZOMATO", -250.0),
+    ]
+
+
+def test_parse_csv_signed_amount_column():
+    statement = "Transaction Date,Description,Amount\n2024-03-01,FLIPKART REVERSAL,1200 Cr\n2024-03-02,FLIPKART,1200 Dr\n"
+    assert list(parse_csv(io.StringIO(statement))) == [
+        (date(2024, 3, 1), "FLIPKART REVERSAL", 1200.0),
+        (date(2024, 3, 2), "FLIPKART", -1200.0),
+    ]
+
+
+def test_parse_ofx_sgml_single_line():
+    ofx = ("OFXHEADER:100\n<OFX><BANKTRANLIST>"
+           "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240105<TRNAMT>5000.00<NAME>AMAZON<MEMO>REFUND</STMTTRN>"
+           "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240106<TRNAMT>-350.50<NAME>UBER<MEMO>TRIP</STMTTRN>"
+           "</BANKTRANLIST></OFX>")
+    rows = list(parse_ofx(io.StringIO(ofx), chunk_size=16))
+    assert rows == [(date(2024, 1, 5), "AMAZON REFUND", 5000.0), (date(2024, 1, 6), "UBER TRIP", -350.5)]
+    assert default_matcher.categorize(rows[0][1]) == "refund"
+
+
+def test_ingest_detects_ofx_without_extension():
+    ofx = b"OFXHEADER:100\n<OFX><STMTTRN><DTPOSTED>20240105<TRNAMT>-99<NAME>NETFLIX</STMTTRN></OFX>"
+    summary = ingest_statement(io.BytesIO(ofx), "statement.txt")
+    assert summary["format"] == "OFX"
+    assert summary["expense_categories"] == {"entertainment": 99.0}
+
+
+# --- Monthly averages ---
+
+def _salary_statement(start: date, end: date) -> dict:
+    """Salary of 100,000 on the 1st and rent of 30,000 on the 5th of each month in range."""
+    rows = [(start, "OPENING UPI/ZOMATO", -100.0)]
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        for day, narration, amount in ((1, "NEFT-SALARY ACME", 100000.0), (5, "NOBROKER RENT", -30000.0)):
+            if start <= date(year, month, day) <= end:
+                rows.append((date(year, month, day), narration, amount))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    rows.append((end, "UPI/ZOMATO", -100.0))
+    return summarize_statement(iter(rows))
+
+
+def test_monthly_averages_drop_partial_boundary_months():
+    # Mid-January to mid-April: only February and March are complete
+    summary = _salary_statement(date(2024, 1, 15), date(2024, 4, 2))
+    assert monthly_averages(summary) == {
+        "monthly_income": 100000.0, "monthly_expenses": 30000.0, "months": ["2024-02", "2024-03"]
+    }
+
+
+def test_monthly_averages_keep_months_covered_edge_to_edge():
+    summary = _salary_statement(date(2024, 1, 1), date(2024, 3, 30))
+    assert monthly_averages(summary)["months"] == ["2024-01", "2024-02", "2024-03"]
+
+
+def test_monthly_averages_need_a_complete_month():
+    assert monthly_averages(_salary_statement(date(2024, 1, 10), date(2024, 1, 20))) is None
+
+
+# --- Import endpoint ---
+
+SAMPLE_CSV = "Date,Narration,Amount\n" + "".join(
+    f"{d},{n},{a}\n" for d, n, a in [
+        ("2024-01-01", "NEFT-SALARY ACME", "100000"), ("2024-01-28", "UPI/SWIGGY", "-20000"),
+        ("2024-02-01", "NEFT-SALARY ACME", "100000"), ("2024-02-28", "UPI/SWIGGY", "-20000"),
+        ("2024-03-01", "NEFT-SALARY ACME", "50000"),  ("2024-03-09", "UPI/SWIGGY", "-1000"),
+    ]
+)
+
+
+def _stored_income(email):
+    from app.core.database import session_scope
+    from app.models.portfolio import Portfolio
+    with session_scope() as db:
+        return db.query(Portfolio.monthly_income).filter(Portfolio.owner_email == email).scalar()
+
+
+def _import(client, email, **form):
+    return client.post("/api/statements/import", data={"email": email, **form},
+                       files={"statement": ("statement.csv", SAMPLE_CSV.encode(), "text/csv")})
+
+
+def test_import_previews_by_default(client, user_email):
+    client.post("/api/portfolio/sync", json={"email": user_email, "income": 1, "expenses": 2, "savings": 3, "investments": 4})
+    body = _import(client, user_email).json()
+    assert body["proposed"] == {"monthly_income": 100000.0, "monthly_expenses": 20000.0, "months": ["2024-01", "2024-02"]}
+    assert body["applied"] is None
+    assert _stored_income(user_email) == 1.0
+
+
+def test_import_applies_only_when_asked(client, user_email):
+    body = _import(client, user_email, apply="true").json()
+    assert body["applied"]["monthly_income"] == 100000.0
+    assert _stored_income(user_email) == 100000.0